@@ -1,55 +1,1262 @@
-import json
+import asyncio
+import inspect
+import math
+import orjson
+import random
+import time
+import uuid
+from collections import Counter, defaultdict
 import redis.asyncio as redis
-from typing import Any, Optional
+from decimal import Decimal
+from redis.exceptions import RedisError
+from typing import Any, Callable, Optional
 
 from core.settings import settings
+from core.cache_local import CacheLocal
+from core.compresion import COMPRESORES
+from core.circuito import CircuitBreaker
 
 
 # =====================================================
 # Redis client (async)
 # =====================================================
-redis_client = redis.Redis(
+# Timeouts estrictos: con Redis lento o caído una operación de cache
+# falla rápido y el request sigue contra PostgreSQL.
+_opciones_redis = dict(
     host=settings.redis_host,
     port=settings.redis_port,
     db=settings.redis_db,
-    decode_responses=True
+    socket_timeout=settings.redis_timeout,
+    socket_connect_timeout=settings.redis_timeout,
+    retry_on_timeout=False
 )
 
+redis_client = redis.Redis(**_opciones_redis, decode_responses=True)
+
+# Cliente sin decodificar: el cache por familia guarda bytes
+# (JSON crudo y variantes comprimidas)
+redis_binario = redis.Redis(**_opciones_redis, decode_responses=False)
+
+# Tras varios fallos seguidos se deja de intentar Redis un tiempo
+breaker = CircuitBreaker(
+    "redis",
+    umbral=settings.redis_breaker_fallos,
+    enfriamiento=settings.redis_breaker_enfriamiento
+)
+ERRORES_REDIS = (RedisError, OSError, asyncio.TimeoutError)
+
+# Invalidaciones que no llegaron a Redis: usuario → familias.
+# Mientras estén pendientes, ese usuario no lee del cache ni recibe
+# ETag, y una tarea de fondo las reintenta.
+_invalidaciones_pendientes: dict[str, set[str]] = {}
+
+
+# Resultado de cada lectura por familia (por worker):
+# hit | miss | sin_cache (Redis no disponible o invalidación pendiente)
+_estadisticas: dict[str, Counter] = defaultdict(Counter)
+
+
+def _registrar(familia: str, resultado: str) -> None:
+    _estadisticas[familia][resultado] += 1
+
+
+def _pendiente(usuario_id: str, familia: str | None = None) -> bool:
+    familias = _invalidaciones_pendientes.get(usuario_id)
+
+    if familias is None:
+        return False
+
+    return familia is None or familia in familias
+
 
 # =====================================================
-# Cache helpers
+# Versión de datos por usuario (ETag / GET condicional)
 # =====================================================
-async def cache_get(key: str) -> Optional[Any]:
+def _version_key(usuario_id: str) -> str:
+    return f"version:{usuario_id}"
+
+
+def _version_inicial() -> int:
+    """
+    Las versiones arrancan en el timestamp actual (ms) para que,
+    si Redis pierde la key, la nueva versión nunca repita una
+    versión ya entregada a un cliente.
     """
-    Obtiene un valor desde Redis y lo deserializa desde JSON.
+    return time.time_ns() // 1_000_000
+
+
+async def data_version_get(usuario_id: str) -> int | None:
     """
-    value = await redis_client.get(key)
+    Obtiene la versión actual de los datos del usuario.
 
-    if value is None:
+    La versión es monótona creciente y cambia en cada mutación.
+    Retorna None si no se puede garantizar (Redis no disponible o
+    invalidación pendiente): en ese caso no se emite ETag.
+
+    La key vence (REDIS_TTL_VERSION, renovado en cada invalidación):
+    si una invalidación se pierde (quedó pendiente en un worker que se
+    reinició, o los demás workers no la ven), la versión vieja deja de
+    validar ETags a lo sumo en ese tiempo.
+    """
+    if _pendiente(usuario_id) or not breaker.permitido():
         return None
 
-    return json.loads(value)
+    try:
+        value = await redis_client.get(_version_key(usuario_id))
+
+        if value is None:
+            await redis_client.set(
+                _version_key(usuario_id),
+                _version_inicial(),
+                nx=True,
+                ex=settings.redis_ttl_version
+            )
+            value = await redis_client.get(_version_key(usuario_id))
+
+    except ERRORES_REDIS as e:
+        breaker.fallo(e)
+        return None
+
+    breaker.exito()
+
+    return int(value)
+
+
+# =====================================================
+# Cache por familia con generaciones (invalidación O(1))
+# =====================================================
+# Cada (usuario, familia) tiene un contador de generación embebido en
+# las keys:  {familia}:{usuario_id}:g{generacion}:{recurso}
+# Invalidar es un INCR del contador: las keys de la generación anterior
+# dejan de leerse y expiran solas por TTL. No se recorre el keyspace.
+#
+# Protección contra estampidas:
+# - El valor se guarda como "{expira_ms}|{costo_ms}|{json}" con un TTL
+#   físico mayor al lógico (gracia). Pasado el TTL lógico el valor sigue
+#   siendo correcto (la generación no cambió), así que se sirve mientras
+#   un solo request lo recalcula.
+# - Refresco temprano probabilístico (XFetch): cuanto más cerca de expirar
+#   y más caro de calcular, más probable que un request lo refresque antes.
+# - En un miss, solo el request que obtiene el lock calcula; el resto
+#   espera brevemente a que aparezca el valor.
+#
+# Respuestas JSON crudas (bytes) por encima de un umbral se guardan además
+# precomprimidas por codificación en "{key}:{codificacion}", para no
+# comprimir el mismo payload en cada request.
+
+# Lee la generación (inicializándola si no existe), el valor de la
+# generación vigente y, si se pide, su variante comprimida, en un solo
+# round trip.
+_LUA_GET_GENERACION = """
+local gen = redis.call('GET', KEYS[1])
+if not gen then
+    redis.call('SET', KEYS[1], ARGV[1], 'NX')
+    gen = redis.call('GET', KEYS[1])
+end
+local key = ARGV[2] .. gen .. ARGV[3]
+local comprimido = false
+if ARGV[4] ~= '' then
+    comprimido = redis.call('GET', key .. ':' .. ARGV[4]) or false
+end
+return {gen, redis.call('GET', key) or false, comprimido}
+"""
+
+# Libera el lock solo si sigue siendo nuestro.
+_LUA_LIBERAR_LOCK = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+# Factor XFetch (> 1 refresca antes, < 1 más tarde)
+XFETCH_BETA = 1.0
+
+# Espera máxima de un request que no obtuvo el lock en un miss
+ESPERA_LOCK_SEGUNDOS = 2.0
+_INTERVALO_ESPERA = 0.05
+
+# Vida de la marca fallo:{key} que deja el dueño del lock si su cálculo
+# lanza una excepción (los que esperan la ven y no esperan más)
+_MARCA_FALLO_MS = 1000
+
+_scripts = {}
+
+# Tier local (opcional, por worker) y canal de invalidación entre workers
+cache_local = CacheLocal(
+    max_bytes=settings.cache_local_max_bytes,
+    ttl=settings.cache_local_ttl
+)
+CANAL_INVALIDACIONES = "cache:invalidaciones"
+
+
+def _script(lua: str):
+    """
+    Registra (una vez por cliente) un script Lua; se ejecuta con
+    EVALSHA y reintenta con EVAL si Redis no lo tiene cargado.
+    """
+    script = _scripts.get(lua)
+
+    if script is None or script.registered_client is not redis_binario:
+        script = _scripts[lua] = redis_binario.register_script(lua)
+
+    return script
+
+
+def _generacion_key(usuario_id: str, familia: str) -> str:
+    return f"cache:gen:{usuario_id}:{familia}"
+
+
+def _familia_prefijo(familia: str, usuario_id: str) -> str:
+    return f"{familia}:{usuario_id}:g"
+
+
+def _ahora_ms() -> int:
+    return time.time_ns() // 1_000_000
+
+
+def _empaquetar(value: Any, ttl: int, costo_ms: int, crudo: bool) -> bytes:
+    payload = value if crudo else orjson.dumps(value)
+    return f"{_ahora_ms() + ttl * 1000}|{costo_ms}|".encode() + payload
+
+
+def _desempaquetar(raw: bytes, crudo: bool) -> tuple[int, int, Any]:
+    expira, costo, payload = raw.split(b"|", 2)
+    value = payload if crudo else orjson.loads(payload)
+    return int(expira), int(costo), value
 
 
-async def cache_set(
+def _refrescar_antes(expira_ms: int, costo_ms: int) -> bool:
+    """
+    XFetch: decide si este request refresca el valor antes de que
+    expire. Siempre True si el TTL lógico ya pasó.
+    """
+    azar = 1.0 - random.random()  # (0, 1]
+    adelanto = costo_ms * XFETCH_BETA * -math.log(azar)
+
+    return _ahora_ms() + adelanto >= expira_ms
+
+
+def _guardar_local(
     key: str,
     value: Any,
-    ttl: int | None = None
+    size: int,
+    expira_ms: int
 ) -> None:
     """
-    Guarda un valor en Redis serializado como JSON.
+    Copia un valor al tier local sin que sobreviva a su TTL lógico
+    (así el refresco temprano sigue ocurriendo en Redis).
+    """
+    restante = (expira_ms - _ahora_ms()) / 1000
+
+    if cache_local.activo and restante > 0:
+        cache_local.set(key, value, size, restante)
+
+
+async def _calcular_y_guardar(
+    key: str,
+    calcular: Callable[[], Any],
+    ttl: int,
+    crudo: bool,
+    codificacion: str | None
+) -> tuple[Any, Optional[bytes]]:
+    inicio = time.perf_counter()
+
+    value = calcular()
+    if inspect.isawaitable(value):
+        value = await value
+
+    costo_ms = int((time.perf_counter() - inicio) * 1000)
+    raw = _empaquetar(value, ttl, costo_ms, crudo)
+    expira_ms = _ahora_ms() + ttl * 1000
+
+    # 🗜️ Variantes precomprimidas (solo JSON crudo sobre el umbral)
+    variantes = {}
+    if crudo and len(value) >= settings.cache_compresion_min_bytes:
+        variantes = {
+            nombre: comprimir(value)
+            for nombre, comprimir in COMPRESORES.items()
+        }
+
+    pipe = redis_binario.pipeline(transaction=False)
+    pipe.set(key, raw, ex=ttl + settings.redis_ttl_gracia)
+    for nombre, contenido in variantes.items():
+        pipe.set(
+            f"{key}:{nombre}",
+            contenido,
+            ex=ttl + settings.redis_ttl_gracia
+        )
+
+    try:
+        await pipe.execute()
+    except ERRORES_REDIS as e:
+        breaker.fallo(e)
+
+    _guardar_local(key, value, len(raw), expira_ms)
+    for nombre, contenido in variantes.items():
+        _guardar_local(f"{key}:{nombre}", contenido, len(contenido), expira_ms)
+
+    return value, variantes.get(codificacion)
+
+
+async def _cache_familia(
+    familia: str,
+    usuario_id: str,
+    recurso: str,
+    calcular: Callable[[], Any],
+    ttl: int | None,
+    crudo: bool,
+    codificacion: str | None = None
+) -> tuple[Any, Optional[bytes]]:
+    """
+    Implementación común de cache_familia / cache_familia_json.
+
+    Retorna (valor, variante comprimida | None). Si Redis no está
+    disponible (breaker abierto, timeout) o hay una invalidación
+    pendiente para la familia, calcula directo contra PostgreSQL.
+    """
+    if _pendiente(usuario_id, familia) or not breaker.permitido():
+        _registrar(familia, "sin_cache")
+        return await _calcular_sin_cache(calcular), None
+
+    calculado = False
+
+    def calcular_y_contar():
+        nonlocal calculado
+        calculado = True
+        return calcular()
+
+    try:
+        resultado = await _cache_familia_redis(
+            familia, usuario_id, recurso, calcular_y_contar,
+            ttl, crudo, codificacion
+        )
+    except ERRORES_REDIS as e:
+        breaker.fallo(e)
+        _registrar(familia, "sin_cache")
+        return await _calcular_sin_cache(calcular), None
+
+    breaker.exito()
+    _registrar(familia, "miss" if calculado else "hit")
+
+    return resultado
+
+
+async def _calcular_sin_cache(calcular: Callable[[], Any]) -> Any:
+    value = calcular()
+    if inspect.isawaitable(value):
+        value = await value
+    return value
+
+
+async def _cache_familia_redis(
+    familia: str,
+    usuario_id: str,
+    recurso: str,
+    calcular: Callable[[], Any],
+    ttl: int | None,
+    crudo: bool,
+    codificacion: str | None
+) -> tuple[Any, Optional[bytes]]:
+    ttl = ttl or settings.redis_ttl
+    prefijo = _familia_prefijo(familia, usuario_id)
+
+    # ⚡ Tier local: sin round trip si la generación es conocida
+    if cache_local.activo:
+        generacion = cache_local.generacion(usuario_id, familia)
+
+        if generacion is not None:
+            key = f"{prefijo}{generacion}:{recurso}"
+            value = cache_local.get(key)
+
+            comprimido = (
+                cache_local.get(f"{key}:{codificacion}")
+                if codificacion else None
+            )
+
+            # Si falta la variante comprimida de un payload grande,
+            # se busca en Redis en vez de servirlo sin comprimir
+            sin_variante = (
+                codificacion is not None
+                and comprimido is None
+                and crudo
+                and value is not None
+                and len(value) >= settings.cache_compresion_min_bytes
+            )
+
+            if value is not None and not sin_variante:
+                return value, comprimido
+
+    generacion, raw, comprimido = await _script(_LUA_GET_GENERACION)(
+        keys=[_generacion_key(usuario_id, familia)],
+        args=[
+            _version_inicial(),
+            prefijo,
+            f":{recurso}",
+            codificacion or ""
+        ]
+    )
+
+    generacion = int(generacion)
+    key = f"{prefijo}{generacion}:{recurso}"
+    lock_key = f"lock:{key}"
+    token = uuid.uuid4().hex
+
+    if raw is not None:
+        expira_ms, costo_ms, value = _desempaquetar(raw, crudo)
+
+        if not _refrescar_antes(expira_ms, costo_ms):
+            if cache_local.activo:
+                cache_local.guardar_generacion(usuario_id, familia, generacion)
+                _guardar_local(key, value, len(raw), expira_ms)
+                if comprimido is not None:
+                    _guardar_local(
+                        f"{key}:{codificacion}",
+                        comprimido,
+                        len(comprimido),
+                        expira_ms
+                    )
+            return value, comprimido
+
+        # 🔄 Refresco: solo quien obtiene el lock; el resto sirve el vigente
+        if not await redis_binario.set(
+            lock_key, token, nx=True, ex=settings.redis_lock_ttl
+        ):
+            return value, comprimido
+
+    elif not await redis_binario.set(
+        lock_key, token, nx=True, ex=settings.redis_lock_ttl
+    ):
+        # ⏳ Otro request está calculando: esperar a que aparezca
+        limite = time.monotonic() + ESPERA_LOCK_SEGUNDOS
+
+        while time.monotonic() < limite:
+            await asyncio.sleep(_INTERVALO_ESPERA)
+
+            raw, dueño, fallo = await redis_binario.mget(
+                key, lock_key, f"fallo:{key}"
+            )
+            if raw is not None:
+                expira_ms, _, value = _desempaquetar(raw, crudo)
+                _guardar_local(key, value, len(raw), expira_ms)
+
+                if codificacion:
+                    comprimido = await redis_binario.get(
+                        f"{key}:{codificacion}"
+                    )
+
+                return value, comprimido
+
+            # ❌ El cálculo del dueño falló (p. ej. un 404): no se espera
+            # más, cada request calcula (y obtiene su propio error)
+            if fallo is not None:
+                return await _calcular_y_guardar(
+                    key, calcular, ttl, crudo, codificacion
+                )
+
+            # 🔓 Lock liberado sin valor ni marca (dueño cancelado o lock
+            # vencido): se toma el relevo
+            if dueño is None and await redis_binario.set(
+                lock_key, token, nx=True, ex=settings.redis_lock_ttl
+            ):
+                break
+
+        else:
+            # Fallback: calcular sin lock (el dueño tardó demasiado)
+            return await _calcular_y_guardar(
+                key, calcular, ttl, crudo, codificacion
+            )
+
+    if cache_local.activo:
+        cache_local.guardar_generacion(usuario_id, familia, generacion)
+
+    try:
+        return await _calcular_y_guardar(
+            key, calcular, ttl, crudo, codificacion
+        )
+    except Exception:
+        # Marca corta para que los que esperan dejen de hacerlo
+        try:
+            await redis_binario.set(
+                f"fallo:{key}", b"1", px=_MARCA_FALLO_MS
+            )
+        except ERRORES_REDIS as e:
+            breaker.fallo(e)
+        raise
+    finally:
+        try:
+            await _script(_LUA_LIBERAR_LOCK)(keys=[lock_key], args=[token])
+        except ERRORES_REDIS as e:
+            breaker.fallo(e)
+
+
+async def cache_familia(
+    familia: str,
+    usuario_id: str,
+    recurso: str,
+    calcular: Callable[[], Any],
+    ttl: int | None = None
+) -> Any:
+    """
+    Obtiene un valor de la generación vigente de la familia o lo
+    calcula con `calcular` (síncrono o async) y lo guarda.
+
+    Un solo request por key recalcula a la vez (lock corto en Redis);
+    los demás sirven el valor vigente o, en un miss, esperan a que
+    aparezca. Si hubo una invalidación mientras se calculaba, el valor
+    queda en una generación ya descartada y nunca se sirve.
+    """
+    value, _ = await _cache_familia(
+        familia, usuario_id, recurso, calcular, ttl, crudo=False
+    )
+    return value
+
+
+async def cache_familia_json(
+    familia: str,
+    usuario_id: str,
+    recurso: str,
+    calcular: Callable[[], bytes],
+    codificacion: str | None = None,
+    ttl: int | None = None
+) -> tuple[bytes, str | None]:
+    """
+    Como cache_familia, pero `calcular` retorna el JSON final (bytes)
+    y en un hit se retornan esos bytes sin deserializar.
+
+    Si se indica una codificación (gzip | zstd) y el payload supera el
+    umbral de compresión, retorna la variante precomprimida.
+
+    Retorna (contenido, codificacion | None).
     """
-    await redis_client.set(
-        key,
-        json.dumps(value),
-        ex=ttl or settings.redis_ttl
+    contenido, comprimido = await _cache_familia(
+        familia, usuario_id, recurso, calcular, ttl,
+        crudo=True,
+        codificacion=codificacion
     )
 
+    if comprimido is not None:
+        return comprimido, codificacion
+
+    return contenido, None
+
+
+# =====================================================
+# Saldos actuales (write-through por deltas)
+# =====================================================
+# El saldo de cada cuenta se guarda en un hash por usuario dentro de la
+# generación vigente de la familia "saldos":
+#
+#   saldos:{usuario_id}:g{gen}:hash
+#     seq       → secuencia de cambios (sync_secuencia) que incluye
+#     cuentas   → JSON [[cuenta_id, nombre], ...] en el orden de la API
+#     c:{id}    → saldo en centavos (entero: HINCRBY sin redondeo)
+#
+# Cada escritura de flujo aplica su delta después del commit junto con
+# la secuencia obtenida en su transacción. El delta solo se aplica si el
+# hash está exactamente en la secuencia anterior; si ya la incluye se
+# ignora, y ante un hueco (escritura concurrente aún no aplicada, o un
+# cambio que no es de flujo) el hash se reemplaza por una marca
+# "pendiente" y la siguiente lectura recalcula. Una lectura cuyo snapshot
+# es anterior a la marca no guarda su resultado.
+
+_RECURSO_SALDOS = ":hash"
+
+# Lee la generación (inicializándola si no existe) y el hash vigente.
+_LUA_GET_SALDOS = """
+local gen = redis.call('GET', KEYS[1])
+if not gen then
+    redis.call('SET', KEYS[1], ARGV[1], 'NX')
+    gen = redis.call('GET', KEYS[1])
+end
+return {gen, redis.call('HGETALL', ARGV[2] .. gen .. ARGV[3])}
+"""
+
+# Guarda el hash salvo que ya exista uno igual o más nuevo.
+# ARGV: seq, ttl, campo1, valor1, ...
+_LUA_GUARDAR_SALDOS = """
+local seq = tonumber(ARGV[1])
+local actual = redis.call('HGET', KEYS[1], 'seq')
+if actual and tonumber(actual) >= seq then
+    return 0
+end
+local pendiente = redis.call('HGET', KEYS[1], 'pendiente')
+if pendiente and tonumber(pendiente) > seq then
+    return 0
+end
+redis.call('DEL', KEYS[1])
+redis.call('HSET', KEYS[1], 'seq', ARGV[1], unpack(ARGV, 3))
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+return 1
+"""
+
+# Aplica los deltas de una escritura con secuencia ARGV[4].
+# ARGV: generación inicial, prefijo, recurso, seq, ttl, cuenta1, centavos1, ...
+# Retorna 1 aplicado/ya incluido, 0 sin hash, -1 descartado.
+_LUA_DELTA_SALDOS = """
+local gen = redis.call('GET', KEYS[1])
+if not gen then
+    redis.call('SET', KEYS[1], ARGV[1], 'NX')
+    gen = redis.call('GET', KEYS[1])
+end
+local key = ARGV[2] .. gen .. ARGV[3]
+local seq = tonumber(ARGV[4])
+
+local function descartar()
+    local pendiente = tonumber(redis.call('HGET', key, 'pendiente') or '0')
+    redis.call('DEL', key)
+    redis.call('HSET', key, 'pendiente', math.max(seq, pendiente))
+    redis.call('EXPIRE', key, ARGV[5])
+end
+
+local actual = redis.call('HGET', key, 'seq')
+if not actual then
+    descartar()
+    return 0
+end
+actual = tonumber(actual)
+if actual >= seq then
+    return 1
+end
+if actual ~= seq - 1 then
+    descartar()
+    return -1
+end
+for i = 6, #ARGV, 2 do
+    if redis.call('HEXISTS', key, 'c:' .. ARGV[i]) == 0 then
+        descartar()
+        return -1
+    end
+end
+for i = 6, #ARGV, 2 do
+    redis.call('HINCRBY', key, 'c:' .. ARGV[i], ARGV[i + 1])
+end
+redis.call('HSET', key, 'seq', seq)
+return 1
+"""
+
+
+def _filas_desde_hash(campos: dict) -> list[dict] | None:
+    if b"seq" not in campos:
+        return None
+
+    return [
+        {
+            "cuenta_id": cuenta_id,
+            "cuenta": nombre,
+            "saldo": Decimal(int(campos[f"c:{cuenta_id}".encode()])).scaleb(-2)
+        }
+        for cuenta_id, nombre in orjson.loads(campos[b"cuentas"])
+    ]
+
+
+def _args_guardar_saldos(filas: list, secuencia: int) -> list:
+    args = [secuencia, settings.redis_ttl, "cuentas", orjson.dumps([
+        [fila["cuenta_id"], fila["cuenta"]] for fila in filas
+    ])]
+
+    for fila in filas:
+        args += [f"c:{fila['cuenta_id']}", int(fila["saldo"].scaleb(2))]
+
+    return args
+
+
+async def saldos_actuales(
+    usuario_id: str,
+    calcular: Callable[[], tuple[list, int]]
+) -> list[dict]:
+    """
+    Saldo actual de cada cuenta del usuario desde el hash write-through.
+
+    `calcular` retorna (filas, secuencia) leídos en un mismo snapshot;
+    solo se llama en un miss (o con Redis no disponible).
+
+    Retorna filas {cuenta_id, cuenta, saldo}.
+    """
+    if _pendiente(usuario_id, "saldos") or not breaker.permitido():
+        _registrar("saldos", "sin_cache")
+        filas, _ = await _calcular_sin_cache(calcular)
+        return filas
+
+    prefijo = _familia_prefijo("saldos", usuario_id)
+
+    try:
+        generacion, campos = await _script(_LUA_GET_SALDOS)(
+            keys=[_generacion_key(usuario_id, "saldos")],
+            args=[_version_inicial(), prefijo, _RECURSO_SALDOS]
+        )
+    except ERRORES_REDIS as e:
+        breaker.fallo(e)
+        _registrar("saldos", "sin_cache")
+        filas, _ = await _calcular_sin_cache(calcular)
+        return filas
+
+    breaker.exito()
+
+    filas = _filas_desde_hash(dict(zip(campos[::2], campos[1::2])))
+    if filas is not None:
+        _registrar("saldos", "hit")
+        return filas
+
+    _registrar("saldos", "miss")
+
+    filas, secuencia = await _calcular_sin_cache(calcular)
+
+    try:
+        await _script(_LUA_GUARDAR_SALDOS)(
+            keys=[f"{prefijo}{int(generacion)}{_RECURSO_SALDOS}"],
+            args=_args_guardar_saldos(filas, secuencia)
+        )
+    except ERRORES_REDIS as e:
+        breaker.fallo(e)
+
+    return filas
+
+
+async def aplicar_deltas_saldo(
+    usuario_id: str,
+    secuencia: int,
+    deltas: dict[int, int]
+) -> None:
+    """
+    Aplica al hash de saldos los deltas (centavos por cuenta) de una
+    escritura de flujo ya confirmada, cuya transacción dejó la
+    secuencia de cambios del usuario en `secuencia`.
+
+    Debe llamarse después del commit, incluso sin deltas (estado
+    pendiente, cambios de descripción): la secuencia avanza igual.
+    Si Redis falla, la familia "saldos" se invalida (o queda pendiente).
+    """
+    if not _pendiente(usuario_id, "saldos") and breaker.permitido():
+        args = [
+            _version_inicial(),
+            _familia_prefijo("saldos", usuario_id),
+            _RECURSO_SALDOS,
+            secuencia,
+            settings.redis_ttl
+        ]
+        for cuenta_id, centavos in deltas.items():
+            args += [cuenta_id, centavos]
+
+        try:
+            await _script(_LUA_DELTA_SALDOS)(
+                keys=[_generacion_key(usuario_id, "saldos")],
+                args=args
+            )
+        except ERRORES_REDIS as e:
+            breaker.fallo(e)
+        else:
+            breaker.exito()
+            return
+
+    await invalidar(usuario_id, "saldos")
+
+
+# =====================================================
+# Lectura de varias entradas en un round trip (agregados)
+# =====================================================
+# Lee la generación (inicializándola si no existe) y el valor de cada
+# entrada. ARGV: generación inicial, con_saldos, prefijo1, recurso1, ...
+# Si con_saldos = '1', la última entrada es el hash de saldos actuales.
+_LUA_GET_MULTIPLE = """
+local resultado = {}
+for i = 1, #KEYS do
+    local gen = redis.call('GET', KEYS[i])
+    if not gen then
+        redis.call('SET', KEYS[i], ARGV[1], 'NX')
+        gen = redis.call('GET', KEYS[i])
+    end
+    local key = ARGV[2 * i + 1] .. gen .. ARGV[2 * i + 2]
+    if ARGV[2] == '1' and i == #KEYS then
+        resultado[i] = {gen, redis.call('HGETALL', key)}
+    else
+        resultado[i] = {gen, redis.call('GET', key) or false}
+    end
+end
+return resultado
+"""
+
+
+async def _calcular_en_hilo(calcular: Callable[[], Any]) -> Any:
+    if inspect.iscoroutinefunction(calcular):
+        return await calcular()
+
+    return await asyncio.to_thread(calcular)
+
+
+async def _tomar_locks(keys: dict[str, str], token: str) -> set[str]:
+    """
+    Intenta tomar lock:{key} de cada parte {nombre: key} en un solo
+    round trip. Retorna los nombres cuyo lock ya tenía otro request.
+
+    Si Redis falla se calculan todas (sin coordinación), igual que sin
+    cache.
+    """
+    if not keys:
+        return set()
+
+    pipe = redis_binario.pipeline(transaction=False)
+    for key in keys.values():
+        pipe.set(f"lock:{key}", token, nx=True, ex=settings.redis_lock_ttl)
+
+    try:
+        tomados = await pipe.execute()
+    except ERRORES_REDIS as e:
+        breaker.fallo(e)
+        return set()
+
+    return {nombre for nombre, tomado in zip(keys, tomados) if not tomado}
+
+
+async def _liberar_locks(keys: list[str], token: str) -> None:
+    if not keys:
+        return
+
+    pipe = redis_binario.pipeline(transaction=False)
+    for key in keys:
+        await _script(_LUA_LIBERAR_LOCK)(
+            keys=[f"lock:{key}"], args=[token], client=pipe
+        )
+
+    try:
+        await pipe.execute()
+    except ERRORES_REDIS as e:
+        breaker.fallo(e)
+
+
+async def _marcar_fallos(keys: list[str]) -> None:
+    if not keys:
+        return
+
+    pipe = redis_binario.pipeline(transaction=False)
+    for key in keys:
+        pipe.set(f"fallo:{key}", b"1", px=_MARCA_FALLO_MS)
+
+    try:
+        await pipe.execute()
+    except ERRORES_REDIS as e:
+        breaker.fallo(e)
+
+
+async def _esperar_partes(
+    pendientes: dict[str, tuple[str, bool]]
+) -> dict[str, Any]:
+    """
+    Espera (hasta ESPERA_LOCK_SEGUNDOS) las partes {nombre: (key,
+    es_hash_saldos)} que otros requests están calculando.
+
+    Retorna las que aparecieron. Deja de esperar una parte si su dueño
+    falló o liberó el lock sin guardarla: el llamador la calcula.
+    """
+    pendientes = dict(pendientes)
+    encontrados: dict[str, Any] = {}
+    limite = time.monotonic() + ESPERA_LOCK_SEGUNDOS
+
+    while pendientes and time.monotonic() < limite:
+        await asyncio.sleep(_INTERVALO_ESPERA)
+
+        nombres = list(pendientes)
+        pipe = redis_binario.pipeline(transaction=False)
+
+        for nombre in nombres:
+            key, es_hash = pendientes[nombre]
+            if es_hash:
+                pipe.hgetall(key)
+            else:
+                pipe.get(key)
+            pipe.get(f"lock:{key}")
+            pipe.get(f"fallo:{key}")
+
+        try:
+            leidos = await pipe.execute()
+        except ERRORES_REDIS as e:
+            breaker.fallo(e)
+            break
+
+        for i, nombre in enumerate(nombres):
+            raw, dueño, fallo = leidos[3 * i:3 * i + 3]
+
+            if pendientes[nombre][1]:
+                value = _filas_desde_hash(raw)
+            elif raw is not None:
+                value = _desempaquetar(raw, crudo=False)[2]
+            else:
+                value = None
+
+            if value is not None:
+                encontrados[nombre] = value
+                del pendientes[nombre]
+
+            elif fallo is not None or dueño is None:
+                del pendientes[nombre]
+
+    return encontrados
+
+
+async def cache_multiple(
+    usuario_id: str,
+    partes: dict[str, tuple[str, str, Callable[[], Any]]],
+    saldos: Callable[[], tuple[list, int]] | None = None
+) -> dict[str, Any]:
+    """
+    Obtiene varias entradas de cache del usuario en un solo round trip.
+
+    `partes` es {nombre: (familia, recurso, calcular)}; si se indica
+    `saldos`, el resultado incluye además los saldos actuales (ver
+    saldos_actuales) bajo la clave "saldos".
+
+    Los misses se calculan de forma concurrente en hilos (cada
+    `calcular` debe usar su propia sesión de base de datos) y se
+    guardan en un solo pipeline. Un valor vencido se trata como miss.
+
+    Cada parte faltante se calcula bajo su lock:{key}, como en
+    cache_familia: si otro request ya la está calculando se sirve su
+    valor vencido (si lo hay) o se espera a que aparezca.
+
+    Retorna {nombre: valor}.
+    """
+    entradas = [
+        (nombre, familia, recurso, calcular)
+        for nombre, (familia, recurso, calcular) in partes.items()
+    ]
+    if saldos is not None:
+        entradas.append(("saldos", "saldos", "hash", saldos))
+
+    resultados: dict[str, Any] = {}
+    generaciones: dict[str, int] = {}
+    vencidos: dict[str, Any] = {}
+
+    if breaker.permitido():
+        args = [_version_inicial(), "1" if saldos is not None else "0"]
+        for _, familia, recurso, _ in entradas:
+            args += [_familia_prefijo(familia, usuario_id), f":{recurso}"]
+
+        try:
+            leidos = await _script(_LUA_GET_MULTIPLE)(
+                keys=[
+                    _generacion_key(usuario_id, familia)
+                    for _, familia, _, _ in entradas
+                ],
+                args=args
+            )
+        except ERRORES_REDIS as e:
+            breaker.fallo(e)
+        else:
+            breaker.exito()
+
+            for (nombre, familia, _, _), (generacion, raw) in zip(
+                entradas, leidos
+            ):
+                if _pendiente(usuario_id, familia):
+                    continue
+
+                generaciones[nombre] = int(generacion)
 
-async def cache_delete_pattern(pattern: str) -> None:
+                if nombre == "saldos" and saldos is not None:
+                    filas = _filas_desde_hash(dict(zip(raw[::2], raw[1::2])))
+                    if filas is not None:
+                        resultados[nombre] = filas
+                    continue
+
+                if raw is None:
+                    continue
+
+                expira_ms, _, value = _desempaquetar(raw, crudo=False)
+                if expira_ms > _ahora_ms():
+                    resultados[nombre] = value
+                else:
+                    vencidos[nombre] = value
+
+    # 🧮 Misses: cada parte con generación se calcula bajo su propio
+    # lock:{key} (single-flight); las que otro request ya está
+    # calculando se sirven vencidas si las hay, o se esperan
+    faltantes = [
+        (nombre, familia, recurso, calcular)
+        for nombre, familia, recurso, calcular in entradas
+        if nombre not in resultados
+    ]
+
+    for nombre, familia, _, _ in entradas:
+        if nombre in resultados:
+            _registrar(familia, "hit")
+        else:
+            _registrar(familia, "miss" if nombre in generaciones else "sin_cache")
+
+    keys = {
+        nombre: (
+            f"{_familia_prefijo(familia, usuario_id)}"
+            f"{generaciones[nombre]}:{recurso}"
+        )
+        for nombre, familia, recurso, _ in faltantes
+        if nombre in generaciones
+    }
+    token = uuid.uuid4().hex
+    ajenas = await _tomar_locks(keys, token)
+    propias = [keys[nombre] for nombre in keys if nombre not in ajenas]
+
+    for nombre in ajenas & vencidos.keys():
+        resultados[nombre] = vencidos[nombre]
+
+    esperar = {
+        nombre: (keys[nombre], nombre == "saldos" and saldos is not None)
+        for nombre in ajenas - vencidos.keys()
+    }
+    calcular_ahora = [
+        entrada for entrada in faltantes if entrada[0] not in ajenas
+    ]
+
+    try:
+        inicio = time.perf_counter()
+        calculados, esperados = await asyncio.gather(
+            asyncio.gather(*(
+                _calcular_en_hilo(calcular)
+                for _, _, _, calcular in calcular_ahora
+            )),
+            _esperar_partes(esperar)
+        )
+        costo_ms = int((time.perf_counter() - inicio) * 1000)
+
+        resultados.update(esperados)
+
+        # Las que no aparecieron (dueño caído o lento) se calculan aquí
+        tardias = [
+            entrada for entrada in faltantes
+            if entrada[0] in esperar and entrada[0] not in esperados
+        ]
+        calcular_ahora += tardias
+        calculados = list(calculados) + list(await asyncio.gather(*(
+            _calcular_en_hilo(calcular) for _, _, _, calcular in tardias
+        )))
+
+        pipe = redis_binario.pipeline(transaction=False)
+        guardar = False
+
+        for (nombre, _, _, _), value in zip(calcular_ahora, calculados):
+            if nombre == "saldos" and saldos is not None:
+                filas, secuencia = value
+                resultados[nombre] = filas
+            else:
+                resultados[nombre] = value
+
+            # Solo se guarda en la generación leída (si hubo lectura)
+            if nombre not in keys:
+                continue
+
+            guardar = True
+
+            if nombre == "saldos" and saldos is not None:
+                await _script(_LUA_GUARDAR_SALDOS)(
+                    keys=[keys[nombre]],
+                    args=_args_guardar_saldos(filas, secuencia),
+                    client=pipe
+                )
+            else:
+                pipe.set(
+                    keys[nombre],
+                    _empaquetar(value, settings.redis_ttl, costo_ms, crudo=False),
+                    ex=settings.redis_ttl + settings.redis_ttl_gracia
+                )
+
+        if guardar:
+            try:
+                await pipe.execute()
+            except ERRORES_REDIS as e:
+                breaker.fallo(e)
+
+    except Exception:
+        await _marcar_fallos(propias)
+        raise
+
+    finally:
+        await _liberar_locks(propias, token)
+
+    return resultados
+
+
+def _encolar_invalidacion(pipe, usuario_id: str, familias, inicial: int):
+    # Generación y versión vencen si no hay invalidaciones durante
+    # REDIS_TTL_VERSION: al recrearse arrancan en un timestamp mayor
+    # que cualquier valor anterior, así que nada viejo vuelve a validar
+    for familia in familias:
+        pipe.set(_generacion_key(usuario_id, familia), inicial, nx=True)
+        pipe.incr(_generacion_key(usuario_id, familia))
+        pipe.expire(
+            _generacion_key(usuario_id, familia),
+            settings.redis_ttl_version
+        )
+
+    if familias and cache_local.activo:
+        pipe.publish(
+            CANAL_INVALIDACIONES,
+            f"{usuario_id}|{','.join(familias)}"
+        )
+
+    pipe.set(_version_key(usuario_id), inicial, nx=True)
+    pipe.incr(_version_key(usuario_id))
+    pipe.expire(_version_key(usuario_id), settings.redis_ttl_version)
+
+
+async def _aplicar_invalidacion(usuario_id: str, familias) -> int:
+    pipe = redis_client.pipeline(transaction=True)
+    _encolar_invalidacion(pipe, usuario_id, familias, _version_inicial())
+
+    resultados = await pipe.execute()
+
+    return int(resultados[-2])
+
+
+async def invalidar(usuario_id: str, *familias: str) -> int | None:
+    """
+    Invalida las familias de cache indicadas del usuario e incrementa
+    su versión de datos (ETag), en un solo round trip.
+
+    Debe llamarse después del commit de cualquier escritura.
+    Retorna la nueva versión de datos, o None si Redis no estaba
+    disponible: la invalidación queda pendiente y se reintenta.
+    """
+    if familias and cache_local.activo:
+        cache_local.descartar(usuario_id, list(familias))
+
+    if breaker.permitido():
+        try:
+            version = await _aplicar_invalidacion(usuario_id, familias)
+        except ERRORES_REDIS as e:
+            breaker.fallo(e)
+        else:
+            breaker.exito()
+            return version
+
+    _invalidaciones_pendientes.setdefault(usuario_id, set()).update(familias)
+    return None
+
+
+async def invalidar_lote(cambios: dict[str, set[str]]) -> None:
+    """
+    Invalida familias de varios usuarios en un solo pipeline
+    ({usuario_id: familias}). Mismo efecto que llamar a invalidar por
+    cada usuario; si Redis no está disponible quedan pendientes.
+    """
+    if cache_local.activo:
+        for usuario_id, familias in cambios.items():
+            cache_local.descartar(usuario_id, list(familias))
+
+    if breaker.permitido():
+        inicial = _version_inicial()
+        pipe = redis_client.pipeline(transaction=False)
+
+        for usuario_id, familias in cambios.items():
+            _encolar_invalidacion(pipe, usuario_id, sorted(familias), inicial)
+
+        try:
+            await pipe.execute()
+        except ERRORES_REDIS as e:
+            breaker.fallo(e)
+        else:
+            breaker.exito()
+            return
+
+    for usuario_id, familias in cambios.items():
+        _invalidaciones_pendientes.setdefault(usuario_id, set()).update(familias)
+
+
+async def reintentar_invalidaciones() -> None:
+    """
+    Tarea de fondo (una por worker): reaplica en Redis las
+    invalidaciones que fallaron, en cuanto el breaker lo permite.
+    """
+    while True:
+        await asyncio.sleep(1)
+
+        for usuario_id in list(_invalidaciones_pendientes):
+            if not breaker.permitido():
+                break
+
+            familias = _invalidaciones_pendientes[usuario_id]
+
+            try:
+                await _aplicar_invalidacion(usuario_id, sorted(familias))
+            except ERRORES_REDIS as e:
+                breaker.fallo(e)
+                break
+
+            breaker.exito()
+
+            # Solo se descarta si no llegaron nuevas familias mientras
+            # tanto (en ese caso se reintenta en la próxima vuelta)
+            if _invalidaciones_pendientes.get(usuario_id) == familias:
+                del _invalidaciones_pendientes[usuario_id]
+
+
+def estadisticas_cache() -> dict:
     """
-    Elimina múltiples keys usando un patrón (wildcard).
-    Ideal para invalidaciones masivas.
+    Hits, misses y lecturas sin cache por familia (tag) en este worker,
+    con su hit ratio (hits / (hits + misses)).
     """
-    async for key in redis_client.scan_iter(pattern):
-        await redis_client.delete(key)
+    resumen = {}
+
+    for familia, conteo in sorted(_estadisticas.items()):
+        consultas = conteo["hit"] + conteo["miss"]
+        resumen[familia] = {
+            "hits": conteo["hit"],
+            "misses": conteo["miss"],
+            "sin_cache": conteo["sin_cache"],
+            "hit_ratio": (
+                round(conteo["hit"] / consultas, 3) if consultas else None
+            )
+        }
+
+    return resumen
+
+
+def estado_cache() -> dict:
+    """
+    Estado del cache para observabilidad (breaker, pendientes y
+    estadísticas por familia).
+    """
+    return {
+        "redis": breaker.resumen(),
+        "invalidaciones_pendientes": len(_invalidaciones_pendientes),
+        "cache_local": {
+            "activo": cache_local.activo,
+            "bytes": cache_local.bytes,
+            "max_bytes": cache_local.max_bytes
+        },
+        "familias": estadisticas_cache()
+    }
+
+
+async def escuchar_invalidaciones() -> None:
+    """
+    Tarea de fondo (una por worker): aplica al tier local las
+    invalidaciones publicadas por los demás workers/nodos.
+
+    Si la suscripción se cae se pueden perder mensajes, así que al
+    (re)conectar se vacía el tier local completo.
+    """
+    while True:
+        pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+
+        try:
+            await pubsub.subscribe(CANAL_INVALIDACIONES)
+            cache_local.limpiar()
+
+            # get_message con timeout propio: el socket_timeout corto
+            # del cliente no corta la espera de mensajes
+            while True:
+                mensaje = await pubsub.get_message(timeout=1.0)
+                if mensaje is None:
+                    continue
+
+                usuario_id, familias = mensaje["data"].split("|", 1)
+                cache_local.descartar(usuario_id, familias.split(","))
+
+        except asyncio.CancelledError:
+            raise
+
+        except Exception as e:
+            print("⚠️ Suscripción de invalidaciones caída:", e)
+            cache_local.limpiar()
+            await asyncio.sleep(1)
+
+        finally:
+            await pubsub.aclose()
@@ -0,0 +1,154 @@
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+
+# =====================================================
+# Cache local (por worker) acotado en bytes
+# =====================================================
+# Costo estimado de una generación guardada (tupla clave + entrada
+# del dict)
+_BYTES_GENERACION = 256
+
+class CacheLocal:
+    """
+    LRU en memoria del proceso, delante de Redis.
+
+    Guarda dos cosas:
+    - La generación vigente de cada (usuario, familia), para no tener
+      que preguntarla a Redis en cada lectura.
+    - Los valores ya deserializados, indexados por la key completa
+      (que incluye la generación).
+
+    La coherencia entre workers se mantiene con mensajes pub/sub que
+    descartan generaciones; como pub/sub no garantiza entrega, toda
+    entrada local vive como máximo `ttl` segundos.
+
+    Ambas cuentan para `max_bytes` (cada generación con un costo fijo
+    estimado). Las generaciones vencidas se barren al guardar una nueva
+    (todas viven lo mismo, así que las vencidas están al principio).
+    """
+
+    def __init__(self, max_bytes: int, ttl: float):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.bytes = 0
+        self._valores: OrderedDict[str, tuple[float, int, Any]] = OrderedDict()
+        self._generaciones: OrderedDict[tuple[str, str], tuple[float, int]] = OrderedDict()
+
+    @property
+    def activo(self) -> bool:
+        return self.max_bytes > 0
+
+    # -------------------------------------------------
+    # Generaciones
+    # -------------------------------------------------
+    def generacion(self, usuario_id: str, familia: str) -> Optional[int]:
+        entrada = self._generaciones.get((usuario_id, familia))
+
+        if entrada is None:
+            return None
+
+        expira, generacion = entrada
+        if time.monotonic() >= expira:
+            self._quitar_generacion((usuario_id, familia))
+            return None
+
+        return generacion
+
+    def guardar_generacion(
+        self,
+        usuario_id: str,
+        familia: str,
+        generacion: int
+    ) -> None:
+        clave = (usuario_id, familia)
+        ahora = time.monotonic()
+
+        self._quitar_generacion(clave)
+        self._generaciones[clave] = (ahora + self.ttl, generacion)
+        self.bytes += _BYTES_GENERACION
+
+        # 🧹 Barrido de vencidas (en orden de vencimiento)
+        for vieja, (expira, _) in list(self._generaciones.items()):
+            if expira > ahora:
+                break
+            self._quitar_generacion(vieja)
+
+        self._ajustar()
+
+    def descartar(self, usuario_id: str, familias: list[str]) -> None:
+        """
+        Olvida la generación local de las familias: la próxima lectura
+        la consulta en Redis. Los valores de la generación vieja ya no
+        se alcanzan y salen por LRU/TTL.
+        """
+        for familia in familias:
+            self._quitar_generacion((usuario_id, familia))
+
+    # -------------------------------------------------
+    # Valores
+    # -------------------------------------------------
+    def get(self, key: str) -> Optional[Any]:
+        entrada = self._valores.get(key)
+
+        if entrada is None:
+            return None
+
+        expira, size, value = entrada
+        if time.monotonic() >= expira:
+            self._quitar(key)
+            return None
+
+        self._valores.move_to_end(key)
+        return value
+
+    def set(
+        self,
+        key: str,
+        value: Any,
+        size: int,
+        ttl: float | None = None
+    ) -> None:
+        if size > self.max_bytes:
+            return
+
+        self._quitar(key)
+
+        self._valores[key] = (
+            time.monotonic() + min(ttl or self.ttl, self.ttl),
+            size,
+            value
+        )
+        self.bytes += size
+
+        self._ajustar()
+
+    def limpiar(self) -> None:
+        self._valores.clear()
+        self._generaciones.clear()
+        self.bytes = 0
+
+    def _ajustar(self) -> None:
+        """
+        Expulsa por LRU hasta entrar en `max_bytes`: primero valores
+        y, si no quedan, generaciones.
+        """
+        while self.bytes > self.max_bytes:
+            if self._valores:
+                self._quitar(next(iter(self._valores)))
+            elif self._generaciones:
+                self._quitar_generacion(next(iter(self._generaciones)))
+            else:
+                break
+
+    def _quitar(self, key: str) -> None:
+        entrada = self._valores.pop(key, None)
+
+        if entrada is not None:
+            self.bytes -= entrada[1]
+
+    def _quitar_generacion(self, clave: tuple[str, str]) -> None:
+        if self._generaciones.pop(clave, None) is not None:
+            self.bytes -= _BYTES_GENERACION
+
@@ -0,0 +1,117 @@
+import asyncio
+from contextlib import aclosing
+
+import psycopg
+
+from core.settings import settings
+from core.cache import invalidar_lote
+from database import engine
+
+
+# =====================================================
+# Invalidación por LISTEN/NOTIFY (escrituras fuera de la API)
+# =====================================================
+# Los triggers fn_trg_notificar_cache publican "{usuario_id}|{entidad}"
+# en este canal por cada sentencia que no viene de la API.
+CANAL_CAMBIOS = "finanzas_cache"
+
+# Un solo worker escucha a la vez: el que tiene este advisory lock de
+# sesión. Si su conexión se cae el lock se libera y otro lo toma.
+_ESPERA_LOCK_SEGUNDOS = 5.0
+
+# Familias de cache que dependen de cada entidad
+FAMILIAS_POR_ENTIDAD = {
+    "flujo": ("flujo", "saldos", "historial", "resumen"),
+    "transferencia": ("transferencias",),
+    "cuenta": ("cuentas", "saldos", "historial", "propiedad"),
+    "categoria": ("categorias", "resumen", "propiedad"),
+}
+
+
+def _url_listen() -> str:
+    # psycopg no entiende el driver de SQLAlchemy (postgresql+psycopg)
+    return engine.url.set(drivername="postgresql").render_as_string(
+        hide_password=False
+    )
+
+
+async def _tomar_escucha(conn) -> bool:
+    cursor = await conn.execute(
+        "SELECT pg_try_advisory_lock(hashtext(%s))",
+        (CANAL_CAMBIOS,)
+    )
+    return (await cursor.fetchone())[0]
+
+
+async def escuchar_cambios_db() -> None:
+    """
+    Tarea de fondo (en todos los workers, pero solo uno escucha a la
+    vez): escucha el canal de cambios de PostgreSQL e invalida el cache
+    de los usuarios afectados.
+
+    La invalidación va a Redis (generaciones y versión) y se publica a
+    los tiers locales de los demás workers, así que basta un listener:
+    el que obtiene el advisory lock. El resto reintenta tomarlo cada
+    pocos segundos, para relevarlo si se cae.
+
+    Las notificaciones se acumulan durante una ventana corta
+    (CACHE_NOTIFICACIONES_VENTANA) y se aplican en un solo pipeline:
+    un batch que modifica miles de filas de un usuario cuesta una
+    invalidación, no miles.
+
+    Si la conexión se cae se pueden perder notificaciones; esas
+    entradas quedan acotadas por el TTL del cache.
+    """
+    loop = asyncio.get_running_loop()
+
+    while True:
+        try:
+            async with await psycopg.AsyncConnection.connect(
+                _url_listen(),
+                autocommit=True
+            ) as conn:
+                while not await _tomar_escucha(conn):
+                    await asyncio.sleep(_ESPERA_LOCK_SEGUNDOS)
+
+                await conn.execute(f"LISTEN {CANAL_CAMBIOS}")
+
+                pendientes: dict[str, set[str]] = {}
+                limite = None
+
+                while True:
+                    espera = 1.0 if limite is None else limite - loop.time()
+
+                    # notifies() fija su plazo al entrar: al abrir una
+                    # ventana se sale y se vuelve a entrar con lo que
+                    # queda de ella (las notificaciones que lleguen
+                    # mientras tanto quedan en el backlog de psycopg)
+                    async with aclosing(
+                        conn.notifies(timeout=max(espera, 0))
+                    ) as avisos:
+                        async for aviso in avisos:
+                            usuario_id, entidad = aviso.payload.split("|", 1)
+                            pendientes.setdefault(usuario_id, set()).update(
+                                FAMILIAS_POR_ENTIDAD.get(entidad, ())
+                            )
+
+                            if limite is None:
+                                limite = (
+                                    loop.time()
+                                    + settings.cache_notificaciones_ventana
+                                )
+                                break
+
+                            if loop.time() >= limite:
+                                break
+
+                    if limite is not None and loop.time() >= limite:
+                        await invalidar_lote(pendientes)
+                        pendientes = {}
+                        limite = None
+
+        except asyncio.CancelledError:
+            raise
+
+        except Exception as e:
+            print("⚠️ Escucha de cambios en PostgreSQL caída:", e)
+            await asyncio.sleep(1)
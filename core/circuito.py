@@ -0,0 +1,73 @@
+import time
+
+
+# =====================================================
+# Circuit breaker (por worker)
+# =====================================================
+class CircuitBreaker:
+    """
+    Corta el acceso a una dependencia degradada.
+
+    - cerrado: las operaciones pasan; `umbral` fallos consecutivos
+      lo abren.
+    - abierto: las operaciones se omiten (fallback inmediato) durante
+      `enfriamiento` segundos.
+    - semiabierto: pasado el enfriamiento se deja pasar una sola
+      operación de prueba (el resto sigue omitiéndose otro periodo);
+      si funciona se cierra, si falla se reabre.
+    """
+
+    def __init__(self, nombre: str, umbral: int, enfriamiento: float):
+        self.nombre = nombre
+        self.umbral = umbral
+        self.enfriamiento = enfriamiento
+        self.fallos = 0
+        self.abierto_hasta = 0.0
+        self.ultimo_error: str | None = None
+        self.aperturas = 0
+
+    @property
+    def estado(self) -> str:
+        if self.fallos < self.umbral:
+            return "cerrado"
+
+        if time.monotonic() < self.abierto_hasta:
+            return "abierto"
+
+        return "semiabierto"
+
+    def permitido(self) -> bool:
+        estado = self.estado
+
+        if estado == "cerrado":
+            return True
+
+        if estado == "semiabierto":
+            self.abierto_hasta = time.monotonic() + self.enfriamiento
+            return True
+
+        return False
+
+    def exito(self) -> None:
+        self.fallos = 0
+
+    def fallo(self, error: Exception) -> None:
+        self.fallos += 1
+        self.ultimo_error = f"{type(error).__name__}: {error}"
+
+        if self.fallos >= self.umbral:
+            if self.fallos == self.umbral:
+                self.aperturas += 1
+            self.abierto_hasta = time.monotonic() + self.enfriamiento
+
+    def resumen(self) -> dict:
+        restante = max(0.0, self.abierto_hasta - time.monotonic())
+
+        return {
+            "nombre": self.nombre,
+            "estado": self.estado,
+            "fallos_consecutivos": self.fallos,
+            "aperturas": self.aperturas,
+            "reintento_en_segundos": round(restante, 1),
+            "ultimo_error": self.ultimo_error
+        }
@@ -0,0 +1,85 @@
+import gzip
+from typing import Callable
+
+from fastapi import Request
+
+from core.settings import settings
+
+try:
+    import zstandard
+except ImportError:  # dependencia opcional
+    zstandard = None
+
+
+# =====================================================
+# Compresores disponibles (Content-Encoding → función)
+# =====================================================
+COMPRESORES: dict[str, Callable[[bytes], bytes]] = {
+    "gzip": lambda data: gzip.compress(data, compresslevel=6),
+}
+
+if zstandard is not None:
+    _zstd = zstandard.ZstdCompressor(level=3)
+    COMPRESORES["zstd"] = _zstd.compress
+
+# Preferencia del servidor ante empate de calidad (q)
+_PREFERENCIA = ("zstd", "gzip")
+
+
+def negociar_codificacion(request: Request) -> str | None:
+    """
+    Elige la codificación de la respuesta según Accept-Encoding
+    (RFC 9110), entre las que el servidor puede producir.
+
+    Retorna None si el cliente no acepta ninguna (identity).
+    """
+    header = request.headers.get("accept-encoding")
+
+    if not header:
+        return None
+
+    calidades = {}
+    for parte in header.split(","):
+        nombre, _, parametros = parte.strip().partition(";")
+        nombre = nombre.strip().lower()
+        q = 1.0
+
+        parametro = parametros.strip()
+        if parametro.startswith("q="):
+            try:
+                q = float(parametro[2:])
+            except ValueError:
+                q = 0.0
+
+        calidades[nombre] = q
+
+    comodin = calidades.get("*", 0.0)
+
+    candidatos = [
+        (calidades.get(nombre, comodin), -i, nombre)
+        for i, nombre in enumerate(_PREFERENCIA)
+        if nombre in COMPRESORES
+    ]
+    candidatos = [c for c in candidatos if c[0] > 0]
+
+    if not candidatos:
+        return None
+
+    return max(candidatos)[2]
+
+
+def comprimir(
+    contenido: bytes,
+    codificacion: str | None
+) -> tuple[bytes, str | None]:
+    """
+    Comprime al vuelo una respuesta que no se guarda como JSON final
+    en el cache (p. ej. los saldos, que se arman desde un hash), con el
+    mismo umbral que las variantes precomprimidas.
+
+    Retorna (contenido, codificacion | None).
+    """
+    if codificacion is None or len(contenido) < settings.cache_compresion_min_bytes:
+        return contenido, None
+
+    return COMPRESORES[codificacion](contenido), codificacion
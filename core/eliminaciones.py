@@ -0,0 +1,106 @@
+import asyncio
+
+from core.settings import settings
+from core.cache import invalidar
+from database import SessionLocal
+from repositories.eliminaciones import (
+    tomar_eliminacion,
+    ejecutar_lote,
+    marcar_fallida
+)
+
+
+# =====================================================
+# Eliminación por lotes (tarea de fondo)
+# =====================================================
+# DELETE /cuentas/{id} (con movimientos) y DELETE /usuarios/me solo
+# registran una fila en finanzas.eliminaciones. Esta tarea la toma y
+# la ejecuta con finanzas.fn_eliminar_lote: cada lote es una
+# transacción corta de a lo sumo ELIMINACION_LOTE filas, con una pausa
+# entre lotes para no acaparar la base. El progreso queda en la fila y
+# el cliente lo consulta en GET /eliminaciones/{id}.
+
+# Familias de cache afectadas por cada lote (las escrituras del worker
+# usan el origen 'api': los triggers de NOTIFY las omiten)
+FAMILIAS_POR_ENTIDAD = {
+    "cuenta": (
+        "flujo", "transferencias", "saldos", "historial",
+        "resumen", "cuentas", "propiedad"
+    ),
+    "usuario": (
+        "flujo", "transferencias", "saldos", "historial",
+        "resumen", "cuentas", "categorias", "propiedad"
+    ),
+}
+
+
+def _en_sesion(funcion, *args):
+    db = SessionLocal()
+    try:
+        return funcion(db, *args)
+    finally:
+        db.close()
+
+
+async def _procesar(eliminacion: dict) -> None:
+    familias = FAMILIAS_POR_ENTIDAD[eliminacion["entidad"]]
+
+    try:
+        while True:
+            eliminados = await asyncio.to_thread(
+                _en_sesion,
+                ejecutar_lote,
+                eliminacion["id"],
+                settings.eliminacion_lote
+            )
+
+            await invalidar(eliminacion["usuario_id"], *familias)
+
+            if eliminados == 0:
+                return
+
+            await asyncio.sleep(settings.eliminacion_pausa)
+
+    except asyncio.CancelledError:
+        # Queda en curso: otro worker la retoma pasado el abandono
+        raise
+
+    except Exception as e:
+        print("⚠️ Eliminación", eliminacion["id"], "falló:", e)
+        await asyncio.to_thread(
+            _en_sesion,
+            marcar_fallida,
+            eliminacion["id"],
+            f"{type(e).__name__}: {e}"
+        )
+
+
+async def procesar_eliminaciones() -> None:
+    """
+    Tarea de fondo (una por worker): toma eliminaciones pendientes y
+    las ejecuta lote a lote hasta terminarlas.
+
+    Varios workers reparten los trabajos (FOR UPDATE SKIP LOCKED); uno
+    que muere a mitad deja su trabajo en curso y otro lo retoma tras
+    ELIMINACION_ABANDONO segundos sin progreso.
+    """
+    while True:
+        try:
+            eliminacion = await asyncio.to_thread(
+                _en_sesion,
+                tomar_eliminacion,
+                settings.eliminacion_abandono
+            )
+
+            if eliminacion is None:
+                await asyncio.sleep(settings.eliminacion_intervalo)
+                continue
+
+            await _procesar(eliminacion)
+
+        except asyncio.CancelledError:
+            raise
+
+        except Exception as e:
+            print("⚠️ Worker de eliminaciones caído:", e)
+            await asyncio.sleep(settings.eliminacion_intervalo)
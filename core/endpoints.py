@@ -0,0 +1,250 @@
+import functools
+import inspect
+from typing import Any, Callable
+
+from fastapi import HTTPException, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+
+from core.cache import cache_familia_json, invalidar
+from core import idempotencia
+from core.etag import etag_usuario, etag_coincide, no_modificado
+from core.respuestas import a_json, json_crudo
+from core.compresion import negociar_codificacion
+
+
+# =====================================================
+# Endpoints cacheados declarativos
+# =====================================================
+# Lectura:
+#
+#   @router.get("/", response_model=list[CuentaOut])
+#   @cacheado("cuentas", "list", list[CuentaOut])
+#   def listar_cuentas(user=..., db=...):
+#       return db.query(Cuenta)...
+#
+# Escritura:
+#
+#   @router.post("/", response_model=CuentaOut)
+#   @invalida("cuentas", "saldos")
+#   def crear_cuenta(data, user=..., db=...):
+#       ...
+#
+# Escritura con reintentos seguros (header Idempotency-Key):
+#
+#   @router.post("/", response_model=FlujoOut)
+#   @idempotente(FlujoOut)
+#   @invalida("flujo")
+#   async def crear_movimiento(data, user=..., db=...):
+#       ...
+#
+# Los tags son las familias de cache (ver core.cache): una lectura vive
+# en la generación de su familia y una escritura invalida las familias
+# que declara. Los endpoints deben recibir `user` (CurrentUser).
+
+
+async def _ejecutar(endpoint: Callable, *args, **kwargs) -> Any:
+    """
+    Ejecuta el endpoint envuelto. Los `def` síncronos (consultas
+    bloqueantes) van al threadpool, como si FastAPI los llamara
+    directamente: la envoltura es async y no debe bloquear el loop.
+    """
+    if not inspect.iscoroutinefunction(endpoint):
+        return await run_in_threadpool(endpoint, *args, **kwargs)
+
+    return await endpoint(*args, **kwargs)
+
+
+def _con_request(endpoint: Callable) -> tuple[inspect.Signature, bool]:
+    """
+    Firma del endpoint con un parámetro `request` (si no lo declara),
+    para que FastAPI lo inyecte. Retorna (firma, agregado).
+    """
+    firma = inspect.signature(endpoint)
+
+    if "request" in firma.parameters:
+        return firma, False
+
+    parametros = list(firma.parameters.values()) + [
+        inspect.Parameter(
+            "request",
+            inspect.Parameter.KEYWORD_ONLY,
+            annotation=Request
+        )
+    ]
+
+    return firma.replace(parameters=parametros), True
+
+
+def cacheado(
+    familia: str,
+    clave: str,
+    modelo: Any,
+    ttl: int | None = None
+):
+    """
+    Cachea la respuesta de un endpoint de lectura.
+
+    - familia: tag de cache; cualquier escritura que lo invalide
+      descarta todas sus entradas del usuario
+    - clave: plantilla del recurso con los parámetros del endpoint,
+      p. ej. "detail:{transferencia_id}"
+    - modelo: tipo de la respuesta (el mismo response_model); se valida
+      y serializa una sola vez por miss. Si el endpoint ya retorna bytes
+      (JSON final, p. ej. de FilasJSON) se guardan tal cual
+
+    La respuesta se guarda como JSON final (con variantes comprimidas)
+    y soporta GET condicional (ETag / If-None-Match → 304). Las
+    HTTPException del endpoint se propagan sin cachear.
+    """
+    def decorador(endpoint: Callable):
+        firma, agregado = _con_request(endpoint)
+
+        @functools.wraps(endpoint)
+        async def envoltura(*args, **kwargs):
+            request = kwargs.pop("request") if agregado else kwargs["request"]
+            user = kwargs["user"]
+
+            etag = await etag_usuario(user.id)
+            if etag_coincide(request, etag):
+                return no_modificado(etag)
+
+            async def calcular():
+                resultado = await _ejecutar(endpoint, *args, **kwargs)
+
+                if isinstance(resultado, bytes):
+                    return resultado
+
+                return a_json(modelo, resultado)
+
+            contenido, codificacion = await cache_familia_json(
+                familia,
+                user.id,
+                clave.format(**kwargs),
+                calcular,
+                codificacion=negociar_codificacion(request),
+                ttl=ttl
+            )
+
+            return json_crudo(contenido, etag, codificacion)
+
+        envoltura.__signature__ = firma
+        return envoltura
+
+    return decorador
+
+
+def invalida(*familias: str):
+    """
+    Invalida las familias indicadas del usuario (y su ETag) cuando el
+    endpoint de escritura termina sin errores, es decir, después de su
+    commit. Si el endpoint lanza una excepción no se invalida nada.
+    """
+    def decorador(endpoint: Callable):
+        @functools.wraps(endpoint)
+        async def envoltura(*args, **kwargs):
+            resultado = await _ejecutar(endpoint, *args, **kwargs)
+
+            await invalidar(kwargs["user"].id, *familias)
+
+            return resultado
+
+        return envoltura
+
+    return decorador
+
+
+def _respuesta_idempotente(
+    contenido: bytes,
+    status_code: int,
+    repetida: bool
+) -> Response:
+    headers = {"Idempotent-Replayed": "true"} if repetida else None
+
+    return Response(
+        content=contenido,
+        status_code=status_code,
+        media_type="application/json",
+        headers=headers
+    )
+
+
+def idempotente(modelo: Any):
+    """
+    Soporte del header Idempotency-Key en un endpoint de escritura.
+
+    - El primer request con una key se ejecuta y su respuesta (JSON de
+      `modelo`) queda guardada en Redis por `idempotencia_ttl`.
+    - Los reintentos con la misma key, ruta y cuerpo reciben esa misma
+      respuesta (header Idempotent-Replayed) sin ejecutar el endpoint;
+      si llegan mientras el original sigue en curso, lo esperan.
+    - La misma key con otra ruta o cuerpo → 422; original aún en curso
+      tras la espera máxima → 409.
+
+    Si el endpoint falla no se guarda nada y un reintento lo vuelve a
+    ejecutar. Sin header, o con Redis no disponible, el endpoint se
+    ejecuta normalmente.
+    """
+    def decorador(endpoint: Callable):
+        firma, agregado = _con_request(endpoint)
+
+        @functools.wraps(endpoint)
+        async def envoltura(*args, **kwargs):
+            request = kwargs.pop("request") if agregado else kwargs["request"]
+            clave = request.headers.get("Idempotency-Key")
+
+            if clave is None:
+                return await _ejecutar(endpoint, *args, **kwargs)
+
+            if not clave or len(clave) > idempotencia.MAX_LARGO_CLAVE:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Idempotency-Key inválida"
+                )
+
+            huella = idempotencia.huella_peticion(
+                request.method,
+                request.url.path,
+                await request.body()
+            )
+
+            try:
+                reserva = await idempotencia.reservar(
+                    kwargs["user"].id, clave, huella
+                )
+            except idempotencia.ClaveReutilizada:
+                raise HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    detail="Idempotency-Key ya usada con otra petición"
+                )
+            except idempotencia.PeticionEnCurso:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="La petición original sigue en curso"
+                )
+
+            if reserva is None:
+                return await _ejecutar(endpoint, *args, **kwargs)
+
+            if reserva.respuesta_guardada:
+                return _respuesta_idempotente(
+                    reserva.cuerpo, reserva.status, repetida=True
+                )
+
+            try:
+                contenido = a_json(
+                    modelo, await _ejecutar(endpoint, *args, **kwargs)
+                )
+            except BaseException:
+                await idempotencia.liberar(reserva)
+                raise
+
+            await idempotencia.guardar(reserva, status.HTTP_200_OK, contenido)
+
+            return _respuesta_idempotente(
+                contenido, status.HTTP_200_OK, repetida=False
+            )
+
+        envoltura.__signature__ = firma
+        return envoltura
+
+    return decorador
@@ -0,0 +1,60 @@
+import re
+
+from fastapi import Request, Response
+
+from core.cache import data_version_get
+
+
+_SUFIJO_CODIFICACION = re.compile(r'-(gzip|zstd)"$')
+
+
+# =====================================================
+# ETag fuerte derivado de la versión de datos del usuario
+# =====================================================
+async def etag_usuario(usuario_id: str) -> str | None:
+    """
+    Construye el ETag de los listados del usuario.
+
+    No depende del contenido de la respuesta: cualquier mutación
+    incrementa la versión y, por lo tanto, cambia el ETag.
+    Retorna None si la versión no está disponible (Redis degradado):
+    la respuesta se envía completa y sin ETag.
+    """
+    version = await data_version_get(usuario_id)
+
+    if version is None:
+        return None
+
+    return f'"{usuario_id}.{version}"'
+
+
+def etag_coincide(request: Request, etag: str | None) -> bool:
+    """
+    Evalúa If-None-Match contra el ETag actual (RFC 9110).
+    """
+    header = request.headers.get("if-none-match")
+
+    if not header or etag is None:
+        return False
+
+    if header.strip() == "*":
+        return True
+
+    # Se ignora el sufijo de codificación (-gzip / -zstd) de las
+    # representaciones comprimidas: todas comparten versión de datos
+    candidatos = (
+        _SUFIJO_CODIFICACION.sub('"', valor.strip().removeprefix("W/"))
+        for valor in header.split(",")
+    )
+
+    return etag in candidatos
+
+
+def no_modificado(etag: str) -> Response:
+    """
+    Respuesta 304 sin cuerpo.
+    """
+    return Response(
+        status_code=304,
+        headers={"ETag": etag}
+    )
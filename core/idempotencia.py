@@ -0,0 +1,164 @@
+import asyncio
+import hashlib
+import time
+import uuid
+from dataclasses import dataclass
+
+from core.settings import settings
+from core.cache import ERRORES_REDIS, breaker, _script
+
+
+# =====================================================
+# Idempotency-Key (reintentos de escrituras)
+# =====================================================
+# Una key por (usuario, Idempotency-Key), como hash en Redis:
+#
+#   idem:{user_id}:{idempotency_key}
+#     huella  sha256 de método + ruta + cuerpo del primer request
+#     token   dueño mientras el primer request está en curso
+#     status / cuerpo  respuesta guardada al terminar
+#
+# El primer request reserva la key (vive `idempotencia_bloqueo` segundos
+# mientras corre, por si el worker muere) y al terminar guarda su
+# respuesta por `idempotencia_ttl`. Los duplicados concurrentes esperan
+# esa respuesta; los posteriores la reciben sin tocar PostgreSQL.
+
+# Reserva la key o retorna su estado, en un solo round trip:
+# {'reservada'} | {'en_curso', huella} | {'lista', huella, status, cuerpo}
+_LUA_RESERVAR = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    redis.call('HSET', KEYS[1], 'huella', ARGV[1], 'token', ARGV[2])
+    redis.call('EXPIRE', KEYS[1], ARGV[3])
+    return {'reservada'}
+end
+local v = redis.call('HMGET', KEYS[1], 'huella', 'status', 'cuerpo')
+if v[2] then
+    return {'lista', v[1], v[2], v[3]}
+end
+return {'en_curso', v[1]}
+"""
+
+# Guarda la respuesta solo si la reserva sigue siendo nuestra.
+_LUA_GUARDAR = """
+if redis.call('HGET', KEYS[1], 'token') ~= ARGV[1] then
+    return 0
+end
+redis.call('HSET', KEYS[1], 'status', ARGV[2], 'cuerpo', ARGV[3])
+redis.call('HDEL', KEYS[1], 'token')
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+return 1
+"""
+
+# Libera una reserva propia (el request falló: un reintento la repite).
+_LUA_LIBERAR = """
+if redis.call('HGET', KEYS[1], 'token') == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+_INTERVALO_ESPERA = 0.05
+
+# Longitud máxima aceptada para el header
+MAX_LARGO_CLAVE = 255
+
+
+class ClaveReutilizada(Exception):
+    """La Idempotency-Key ya se usó con otra ruta o cuerpo."""
+
+
+class PeticionEnCurso(Exception):
+    """El request original sigue en curso tras la espera máxima."""
+
+
+@dataclass
+class Reserva:
+    key: str
+    token: str
+    status: int | None = None
+    cuerpo: bytes | None = None
+
+    @property
+    def respuesta_guardada(self) -> bool:
+        return self.cuerpo is not None
+
+
+def huella_peticion(metodo: str, ruta: str, cuerpo: bytes) -> str:
+    digest = hashlib.sha256(f"{metodo} {ruta}\n".encode())
+    digest.update(cuerpo)
+    return digest.hexdigest()
+
+
+async def reservar(
+    usuario_id: str,
+    clave: str,
+    huella: str
+) -> Reserva | None:
+    """
+    Reserva la Idempotency-Key para este request o, si ya existe,
+    espera y retorna la respuesta del request original.
+
+    Retorna None si Redis no está disponible: el request se ejecuta
+    sin protección de idempotencia.
+
+    Lanza:
+    - ClaveReutilizada: la key se usó con otra ruta o cuerpo
+    - PeticionEnCurso: el original no terminó dentro de la espera
+    """
+    if not breaker.permitido():
+        return None
+
+    reserva = Reserva(key=f"idem:{usuario_id}:{clave}", token=uuid.uuid4().hex)
+    limite = time.monotonic() + settings.idempotencia_espera
+
+    try:
+        while True:
+            estado, *resto = await _script(_LUA_RESERVAR)(
+                keys=[reserva.key],
+                args=[huella, reserva.token, settings.idempotencia_bloqueo]
+            )
+
+            if estado == b"reservada":
+                break
+
+            if resto[0].decode() != huella:
+                raise ClaveReutilizada()
+
+            if estado == b"lista":
+                reserva.status = int(resto[1])
+                reserva.cuerpo = resto[2]
+                break
+
+            # ⏳ Duplicado concurrente: esperar el resultado del original
+            # (si el original falla y libera la key, se reserva de nuevo)
+            if time.monotonic() >= limite:
+                raise PeticionEnCurso()
+
+            await asyncio.sleep(_INTERVALO_ESPERA)
+
+    except ERRORES_REDIS as e:
+        breaker.fallo(e)
+        return None
+
+    breaker.exito()
+    return reserva
+
+
+async def guardar(reserva: Reserva, status: int, cuerpo: bytes) -> None:
+    try:
+        await _script(_LUA_GUARDAR)(
+            keys=[reserva.key],
+            args=[reserva.token, status, cuerpo, settings.idempotencia_ttl]
+        )
+    except ERRORES_REDIS as e:
+        breaker.fallo(e)
+
+
+async def liberar(reserva: Reserva) -> None:
+    try:
+        await _script(_LUA_LIBERAR)(
+            keys=[reserva.key],
+            args=[reserva.token]
+        )
+    except ERRORES_REDIS as e:
+        breaker.fallo(e)
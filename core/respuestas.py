@@ -0,0 +1,78 @@
+from functools import lru_cache
+from typing import Any
+
+import orjson
+from fastapi import Response
+from pydantic import BaseModel, TypeAdapter
+
+
+# =====================================================
+# Respuestas JSON pre-serializadas (cache en bytes)
+# =====================================================
+@lru_cache(maxsize=None)
+def _adapter(tipo: Any) -> TypeAdapter:
+    return TypeAdapter(tipo)
+
+
+def a_json(tipo: Any, data: Any) -> bytes:
+    """
+    Valida `data` contra el tipo del response_model y lo serializa a
+    JSON, igual que lo haría FastAPI al responder.
+
+    Se ejecuta una sola vez por miss de cache; en los hits se sirven
+    los bytes resultantes sin volver a validar ni serializar.
+    """
+    adapter = _adapter(tipo)
+    return adapter.dump_json(adapter.validate_python(data))
+
+
+class FilasJSON:
+    """
+    Serializador precompilado de filas (tuplas) de un SELECT proyectado.
+
+    Los nombres y el orden de los campos se toman una sola vez del
+    response_model; cada fila debe traer sus columnas en ese mismo
+    orden (ver repositories.listados). El JSON resultante es idéntico
+    al de `a_json(list[modelo], ...)`, pero sin instanciar entidades
+    ORM ni validar fila por fila: los datos ya cumplen los constraints
+    de la base.
+    """
+
+    def __init__(self, modelo: type[BaseModel]):
+        self.campos = tuple(modelo.model_fields)
+
+    def __call__(self, filas) -> bytes:
+        campos = self.campos
+
+        return orjson.dumps(
+            [dict(zip(campos, fila)) for fila in filas],
+            option=orjson.OPT_UTC_Z
+        )
+
+
+def json_crudo(
+    contenido: bytes,
+    etag: str | None = None,
+    codificacion: str | None = None
+) -> Response:
+    """
+    Response con JSON ya serializado (sin response_model), opcionalmente
+    ya comprimido con `codificacion`.
+    """
+    headers = {"Vary": "Accept-Encoding"}
+
+    if codificacion:
+        headers["Content-Encoding"] = codificacion
+
+        # Cada representación lleva su propio ETag fuerte
+        if etag:
+            etag = f'{etag[:-1]}-{codificacion}"'
+
+    if etag:
+        headers["ETag"] = etag
+
+    return Response(
+        content=contenido,
+        media_type="application/json",
+        headers=headers
+    )
@@ -23,6 +23,55 @@ class Settings(BaseSettings):
     redis_port: int = 6379
     redis_db: int = 0
     redis_ttl: int = 60 * 5  # 5 minutos
+    redis_ttl_gracia: int = 60  # se sirve vencido mientras se recalcula
+    redis_lock_ttl: int = 10  # lock de recálculo (anti-estampida)
+    redis_ttl_version: int = 60 * 10  # versión (ETag) y generaciones
+    redis_timeout: float = 0.2  # segundos por operación / conexión
+    redis_breaker_fallos: int = 5  # fallos seguidos que abren el breaker
+    redis_breaker_enfriamiento: float = 30.0  # segundos sin usar Redis
+
+    # --------------------------------------------------
+    # Cache local (por worker, delante de Redis)
+    # --------------------------------------------------
+    cache_local_max_bytes: int = 0  # 0 = desactivado
+    cache_local_ttl: float = 5.0
+
+    # --------------------------------------------------
+    # Compresión de respuestas cacheadas
+    # --------------------------------------------------
+    cache_compresion_min_bytes: int = 1024
+
+    # --------------------------------------------------
+    # Invalidación por LISTEN/NOTIFY (escrituras fuera de la API)
+    # --------------------------------------------------
+    cache_escuchar_db: bool = True
+    cache_notificaciones_ventana: float = 0.2  # segundos de coalescencia
+
+    # --------------------------------------------------
+    # Idempotency-Key (POST /flujo, POST /transferencias)
+    # --------------------------------------------------
+    idempotencia_ttl: int = 60 * 60 * 24  # respuesta guardada (24 h)
+    idempotencia_bloqueo: int = 30  # reserva mientras el original corre
+    idempotencia_espera: float = 10.0  # espera máxima de un duplicado
+
+    # --------------------------------------------------
+    # Eliminación por lotes (cuentas y usuarios con historial)
+    # --------------------------------------------------
+    eliminacion_activa: bool = True  # worker de fondo en este proceso
+    eliminacion_lote: int = 5000  # filas por transacción
+    eliminacion_pausa: float = 0.05  # segundos entre lotes
+    eliminacion_intervalo: float = 2.0  # sondeo sin trabajos pendientes
+    eliminacion_abandono: int = 300  # en curso sin progreso → se retoma
+
+    # --------------------------------------------------
+    # Exportación de datos (GET /exportacion)
+    # --------------------------------------------------
+    exportacion_lote: int = 2000  # filas por lectura del cursor
+
+    # --------------------------------------------------
+    # Auditoría (ver middleware.politicas_auditoria)
+    # --------------------------------------------------
+    auditoria_tasa_lecturas: float = 0.1  # fracción de GET exitosos auditados
 
     model_config = SettingsConfigDict(
         env_file=".env",
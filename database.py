@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
 from core.settings import settings
 
@@ -21,3 +21,21 @@ SessionLocal = sessionmaker(
     autocommit=False,
     autoflush=False
 )
+
+
+def marcar_origen(origen: str) -> None:
+    """
+    Identifica las conexiones de este proceso en PostgreSQL
+    (finanzas.origen). La API se marca como 'api' para que los triggers
+    de invalidación de cache por NOTIFY omitan sus escrituras.
+    """
+    @event.listens_for(engine, "connect")
+    def _origen(dbapi_connection, connection_record):
+        autocommit = dbapi_connection.autocommit
+        dbapi_connection.autocommit = True
+        with dbapi_connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT set_config('finanzas.origen', %s, false)",
+                (origen,)
+            )
+        dbapi_connection.autocommit = autocommit
@@ -175,6 +175,9 @@ CREATE INDEX IF NOT EXISTS idx_refresh_tokens_expira
 -- =========================================================
 
 -- 🔹 Saldo por cuenta
+-- Lee el saldo materializado (saldo_cuenta): O(cuentas), no O(movimientos)
+-- Las funciones de saldos omiten las cuentas con una eliminación pendiente
+-- o en curso (igual que GET /cuentas): su saldo ya no se mantiene.
 CREATE OR REPLACE FUNCTION fn_saldo_por_cuenta(uid VARCHAR(9))
 RETURNS TABLE(
     cuenta_id INTEGER,
@@ -186,18 +189,18 @@ BEGIN
     SELECT
         c.id AS cuenta_id,
         c.nombre AS cuenta,
-        COALESCE(SUM(
-            CASE
-                WHEN f.tipo_movimiento = 'Ingreso' THEN f.monto
-                WHEN f.tipo_movimiento = 'Egreso' THEN -f.monto
-            END
-        ), 0) AS saldo
+        COALESCE(s.saldo, 0)::NUMERIC(14,2) AS saldo
     FROM cuentas c
-    LEFT JOIN flujo f
-        ON f.cuenta_id = c.id
-        AND f.estado = 'Confirmado'
+    LEFT JOIN saldo_cuenta s
+        ON s.cuenta_id = c.id
     WHERE c.usuario_id = uid
-    GROUP BY c.id, c.nombre
+      AND NOT EXISTS (
+          SELECT 1
+          FROM eliminaciones e
+          WHERE e.entidad = 'cuenta'
+            AND e.entidad_id = c.id::text
+            AND e.estado IN ('pendiente', 'en_curso')
+      )
     ORDER BY c.nombre;
 END;
 $$ LANGUAGE plpgsql STABLE;
@@ -232,26 +235,25 @@ BEGIN
             fecha_fin;
     END IF;
 
+    -- 📸 Diferencia de dos cierres diarios (saldo_diario):
+    -- el costo no depende de cuántos movimientos caen en el rango
     RETURN QUERY
     SELECT
         c.id AS cuenta_id,
         c.nombre AS cuenta,
-        COALESCE(
-            SUM(
-                CASE
-                    WHEN f.tipo_movimiento = 'Ingreso' THEN f.monto
-                    WHEN f.tipo_movimiento = 'Egreso' THEN -f.monto
-                END
-            ),
-            0
+        (
+            fn_saldo_cierre(c.id, fecha_fin)
+            - fn_saldo_cierre(c.id, fecha_inicio - 1)
         )::NUMERIC(14,2) AS saldo
     FROM cuentas c
-    LEFT JOIN flujo f
-        ON f.cuenta_id = c.id
-        AND f.estado = 'Confirmado'
-        AND f.fecha BETWEEN fecha_inicio AND fecha_fin
     WHERE c.usuario_id = uid
-    GROUP BY c.id, c.nombre
+      AND NOT EXISTS (
+          SELECT 1
+          FROM eliminaciones e
+          WHERE e.entidad = 'cuenta'
+            AND e.entidad_id = c.id::text
+            AND e.estado IN ('pendiente', 'en_curso')
+      )
     ORDER BY c.nombre;
 END;
 $$ LANGUAGE plpgsql STABLE;
@@ -290,11 +292,12 @@ BEGIN
         RAISE EXCEPTION 'La cuenta no pertenece al usuario';
     END IF;
 
-    -- 📊 Obtener saldo actual
+    -- 📊 Obtener saldo actual (bloquea la fila hasta el commit)
     SELECT saldo
     INTO v_saldo_actual
-    FROM fn_saldo_por_cuenta(p_usuario_id)
-    WHERE cuenta_id = p_cuenta_id;
+    FROM saldo_cuenta
+    WHERE cuenta_id = p_cuenta_id
+    FOR UPDATE;
 
     v_saldo_actual := COALESCE(v_saldo_actual, 0);
 
@@ -358,4 +361,1549 @@ BEGIN
 END;
 $$ LANGUAGE plpgsql;
 
+-- =========================================================
+-- RESUMEN MENSUAL POR CATEGORÍA (ROLLUP INCREMENTAL)
+-- =========================================================
+
+-- Una fila por (usuario, mes, categoría, tipo, tipo_egreso, estado).
+-- Se mantiene por trigger sobre flujo, por lo que cubre cualquier
+-- escritura (API, funciones SQL o SQL manual).
+CREATE TABLE IF NOT EXISTS resumen_categoria_mensual (
+    id BIGSERIAL PRIMARY KEY,
+    usuario_id VARCHAR(9) NOT NULL REFERENCES usuarios(id) ON DELETE CASCADE,
+    mes DATE NOT NULL,
+    categoria_id INT REFERENCES categorias(id) ON DELETE CASCADE,
+    tipo_movimiento tipo_movimiento_enum NOT NULL,
+    tipo_egreso tipo_egreso_enum,
+    estado estado_movimiento_enum NOT NULL,
+    total NUMERIC(16,2) NOT NULL DEFAULT 0,
+    cantidad INTEGER NOT NULL DEFAULT 0,
+
+    CONSTRAINT uq_resumen_categoria_mensual
+        UNIQUE NULLS NOT DISTINCT (
+            usuario_id, mes, categoria_id, tipo_movimiento, tipo_egreso, estado
+        ),
+
+    CONSTRAINT chk_resumen_mes_primer_dia
+        CHECK (mes = date_trunc('month', mes)::date)
+);
+
+
+-- 🔹 Aplica (+1) o revierte (-1) un movimiento sobre el resumen
+CREATE OR REPLACE FUNCTION fn_resumen_categoria_aplicar(
+    p_usuario_id VARCHAR(9),
+    p_fecha DATE,
+    p_categoria_id INT,
+    p_tipo_movimiento tipo_movimiento_enum,
+    p_tipo_egreso tipo_egreso_enum,
+    p_estado estado_movimiento_enum,
+    p_monto NUMERIC(14,2),
+    p_signo INT
+)
+RETURNS VOID AS $$
+DECLARE
+    v_mes DATE := date_trunc('month', p_fecha)::date;
+    v_id BIGINT;
+    v_cantidad INTEGER;
+BEGIN
+    IF p_signo > 0 THEN
+        INSERT INTO resumen_categoria_mensual AS r (
+            usuario_id, mes, categoria_id, tipo_movimiento,
+            tipo_egreso, estado, total, cantidad
+        ) VALUES (
+            p_usuario_id, v_mes, p_categoria_id, p_tipo_movimiento,
+            p_tipo_egreso, p_estado, p_monto, 1
+        )
+        ON CONFLICT ON CONSTRAINT uq_resumen_categoria_mensual
+        DO UPDATE SET
+            total = r.total + EXCLUDED.total,
+            cantidad = r.cantidad + 1;
+
+        RETURN;
+    END IF;
+
+    -- ⚠️ Al revertir solo se actualiza: nunca se inserta, para no
+    -- recrear filas de un usuario que se está eliminando en cascada
+    UPDATE resumen_categoria_mensual
+    SET total = total - p_monto,
+        cantidad = cantidad - 1
+    WHERE usuario_id = p_usuario_id
+      AND mes = v_mes
+      AND categoria_id IS NOT DISTINCT FROM p_categoria_id
+      AND tipo_movimiento = p_tipo_movimiento
+      AND tipo_egreso IS NOT DISTINCT FROM p_tipo_egreso
+      AND estado = p_estado
+    RETURNING id, cantidad INTO v_id, v_cantidad;
+
+    IF v_cantidad IS NOT NULL AND v_cantidad <= 0 THEN
+        DELETE FROM resumen_categoria_mensual WHERE id = v_id;
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- 🔹 Trigger de mantenimiento sobre flujo
+-- Con finanzas.resumen_diferido = 'on' (local a la transacción) no hace
+-- nada: quien lo activa ajusta el resumen en bloque (ver
+-- fn_fusionar_categorias). Tampoco mantiene el resumen de un usuario
+-- que se está eliminando (ver fn_eliminar_lote).
+CREATE OR REPLACE FUNCTION fn_trg_flujo_resumen_categoria()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF current_setting('finanzas.resumen_diferido', TRUE) = 'on' THEN
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP = 'DELETE'
+       AND current_setting('finanzas.eliminando', TRUE) = 'usuario:' || OLD.usuario_id
+    THEN
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP = 'UPDATE'
+       AND (OLD.usuario_id, OLD.fecha, OLD.categoria_id, OLD.tipo_movimiento,
+            OLD.tipo_egreso, OLD.estado, OLD.monto)
+           IS NOT DISTINCT FROM
+           (NEW.usuario_id, NEW.fecha, NEW.categoria_id, NEW.tipo_movimiento,
+            NEW.tipo_egreso, NEW.estado, NEW.monto)
+    THEN
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM fn_resumen_categoria_aplicar(
+            OLD.usuario_id, OLD.fecha, OLD.categoria_id, OLD.tipo_movimiento,
+            OLD.tipo_egreso, OLD.estado, OLD.monto, -1
+        );
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM fn_resumen_categoria_aplicar(
+            NEW.usuario_id, NEW.fecha, NEW.categoria_id, NEW.tipo_movimiento,
+            NEW.tipo_egreso, NEW.estado, NEW.monto, 1
+        );
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE TRIGGER trg_flujo_resumen_categoria
+AFTER INSERT OR DELETE OR UPDATE OF
+    usuario_id, fecha, categoria_id, tipo_movimiento, tipo_egreso, estado, monto
+ON flujo
+FOR EACH ROW
+EXECUTE FUNCTION fn_trg_flujo_resumen_categoria();
+
+
+-- 🔹 Reconstrucción completa (backfill / reparación)
+-- p_usuario_id NULL → reconstruye todos los usuarios
+CREATE OR REPLACE FUNCTION fn_reconstruir_resumen_categoria(
+    p_usuario_id VARCHAR(9) DEFAULT NULL
+)
+RETURNS INTEGER AS $$
+DECLARE
+    v_filas INTEGER;
+BEGIN
+    -- 🔒 Bloquea escrituras concurrentes sobre el resumen (los triggers
+    -- esperan al commit y aplican su delta sobre lo reconstruido)
+    LOCK TABLE resumen_categoria_mensual IN EXCLUSIVE MODE;
+
+    DELETE FROM resumen_categoria_mensual
+    WHERE p_usuario_id IS NULL
+       OR usuario_id = p_usuario_id;
+
+    INSERT INTO resumen_categoria_mensual (
+        usuario_id, mes, categoria_id, tipo_movimiento,
+        tipo_egreso, estado, total, cantidad
+    )
+    SELECT
+        f.usuario_id,
+        date_trunc('month', f.fecha)::date,
+        f.categoria_id,
+        f.tipo_movimiento,
+        f.tipo_egreso,
+        f.estado,
+        SUM(f.monto),
+        COUNT(*)
+    FROM flujo f
+    WHERE p_usuario_id IS NULL
+       OR f.usuario_id = p_usuario_id
+    GROUP BY 1, 2, 3, 4, 5, 6;
+
+    GET DIAGNOSTICS v_filas = ROW_COUNT;
+
+    RETURN v_filas;
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- 🔹 Resumen por categoría en un rango de meses
+CREATE OR REPLACE FUNCTION fn_resumen_categorias(
+    uid VARCHAR(9),
+    mes_inicio DATE,
+    mes_fin DATE
+)
+RETURNS TABLE(
+    mes DATE,
+    categoria_id INTEGER,
+    categoria TEXT,
+    tipo_movimiento tipo_movimiento_enum,
+    tipo_egreso tipo_egreso_enum,
+    estado estado_movimiento_enum,
+    total NUMERIC(16,2),
+    cantidad INTEGER
+) AS $$
+BEGIN
+    IF uid IS NULL THEN
+        RAISE EXCEPTION 'El usuario no puede ser NULL';
+    END IF;
+
+    IF mes_inicio IS NULL OR mes_fin IS NULL THEN
+        RAISE EXCEPTION 'Las fechas no pueden ser NULL';
+    END IF;
+
+    IF mes_inicio > mes_fin THEN
+        RAISE EXCEPTION
+            'La fecha inicial (%) no puede ser mayor que la final (%)',
+            mes_inicio,
+            mes_fin;
+    END IF;
+
+    RETURN QUERY
+    SELECT
+        r.mes,
+        r.categoria_id,
+        c.nombre AS categoria,
+        r.tipo_movimiento,
+        r.tipo_egreso,
+        r.estado,
+        r.total,
+        r.cantidad
+    FROM resumen_categoria_mensual r
+    LEFT JOIN categorias c
+        ON c.id = r.categoria_id
+    WHERE r.usuario_id = uid
+      AND r.mes BETWEEN date_trunc('month', mes_inicio)::date
+                    AND date_trunc('month', mes_fin)::date
+    ORDER BY r.mes, r.tipo_movimiento, c.nombre, r.tipo_egreso, r.estado;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+-- =========================================================
+-- SYNC (CHANGE-FEED PARA CLIENTES OFFLINE-FIRST)
+-- =========================================================
+
+-- Secuencia por usuario. La fila se bloquea (UPDATE) hasta el commit,
+-- por lo que el orden de las secuencias coincide con el orden de commit.
+CREATE TABLE IF NOT EXISTS sync_secuencia (
+    usuario_id VARCHAR(9) PRIMARY KEY REFERENCES usuarios(id) ON DELETE CASCADE,
+    ultima BIGINT NOT NULL DEFAULT 0,
+
+    -- Menor secuencia servible tras compactar: clientes con since < minima
+    -- deben hacer una sincronización completa
+    minima BIGINT NOT NULL DEFAULT 0
+);
+
+-- Log append-only: una fila por entidad modificada en cada sentencia.
+-- Las eliminaciones quedan como tombstones (eliminado = TRUE).
+CREATE TABLE IF NOT EXISTS sync_cambios (
+    usuario_id VARCHAR(9) NOT NULL REFERENCES usuarios(id) ON DELETE CASCADE,
+    seq BIGINT NOT NULL,
+    entidad TEXT NOT NULL,
+    entidad_id INT NOT NULL,
+    eliminado BOOLEAN NOT NULL DEFAULT FALSE,
+    fecha TIMESTAMPTZ NOT NULL DEFAULT now(),
+
+    PRIMARY KEY (usuario_id, seq, entidad, entidad_id),
+
+    CONSTRAINT chk_sync_entidad
+        CHECK (entidad IN ('flujo', 'transferencia', 'cuenta', 'categoria'))
+);
+
+CREATE INDEX IF NOT EXISTS idx_sync_cambios_entidad
+    ON sync_cambios(usuario_id, entidad, entidad_id, seq);
+
+CREATE INDEX IF NOT EXISTS idx_sync_cambios_fecha
+    ON sync_cambios(fecha);
+
+
+-- 🔹 Registra un lote de cambios (una secuencia por usuario y sentencia)
+CREATE OR REPLACE FUNCTION fn_sync_registrar(
+    p_entidad TEXT,
+    p_usuarios VARCHAR(9)[],
+    p_ids INT[],
+    p_eliminado BOOLEAN
+)
+RETURNS VOID AS $$
+BEGIN
+    WITH cambios AS (
+        SELECT c.usuario_id, c.entidad_id
+        FROM unnest(p_usuarios, p_ids) AS c(usuario_id, entidad_id)
+        -- ⚠️ Ignora usuarios que se están eliminando en cascada
+        JOIN usuarios u ON u.id = c.usuario_id
+        -- ... o por lotes (fn_eliminar_lote)
+        WHERE current_setting('finanzas.eliminando', TRUE)
+              IS DISTINCT FROM 'usuario:' || c.usuario_id
+    ),
+    secuencias AS (
+        INSERT INTO sync_secuencia AS s (usuario_id, ultima)
+        SELECT DISTINCT usuario_id, 1
+        FROM cambios
+        ON CONFLICT (usuario_id)
+        DO UPDATE SET ultima = s.ultima + 1
+        RETURNING s.usuario_id, s.ultima
+    )
+    INSERT INTO sync_cambios (usuario_id, seq, entidad, entidad_id, eliminado)
+    SELECT c.usuario_id, s.ultima, p_entidad, c.entidad_id, p_eliminado
+    FROM cambios c
+    JOIN secuencias s ON s.usuario_id = c.usuario_id;
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- 🔹 Trigger por sentencia (tablas de transición): TG_ARGV[0] = entidad
+CREATE OR REPLACE FUNCTION fn_trg_sync_cambios()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_usuarios VARCHAR(9)[];
+    v_ids INT[];
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        SELECT array_agg(usuario_id), array_agg(id)
+        INTO v_usuarios, v_ids
+        FROM viejas;
+    ELSE
+        SELECT array_agg(usuario_id), array_agg(id)
+        INTO v_usuarios, v_ids
+        FROM nuevas;
+    END IF;
+
+    IF v_ids IS NOT NULL THEN
+        PERFORM fn_sync_registrar(
+            TG_ARGV[0], v_usuarios, v_ids, TG_OP = 'DELETE'
+        );
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE TRIGGER trg_flujo_sync_insert
+AFTER INSERT ON flujo REFERENCING NEW TABLE AS nuevas
+FOR EACH STATEMENT EXECUTE FUNCTION fn_trg_sync_cambios('flujo');
+
+CREATE OR REPLACE TRIGGER trg_flujo_sync_update
+AFTER UPDATE ON flujo REFERENCING NEW TABLE AS nuevas
+FOR EACH STATEMENT EXECUTE FUNCTION fn_trg_sync_cambios('flujo');
+
+CREATE OR REPLACE TRIGGER trg_flujo_sync_delete
+AFTER DELETE ON flujo REFERENCING OLD TABLE AS viejas
+FOR EACH STATEMENT EXECUTE FUNCTION fn_trg_sync_cambios('flujo');
+
+CREATE OR REPLACE TRIGGER trg_transferencias_sync_insert
+AFTER INSERT ON transferencias REFERENCING NEW TABLE AS nuevas
+FOR EACH STATEMENT EXECUTE FUNCTION fn_trg_sync_cambios('transferencia');
+
+CREATE OR REPLACE TRIGGER trg_transferencias_sync_update
+AFTER UPDATE ON transferencias REFERENCING NEW TABLE AS nuevas
+FOR EACH STATEMENT EXECUTE FUNCTION fn_trg_sync_cambios('transferencia');
+
+CREATE OR REPLACE TRIGGER trg_transferencias_sync_delete
+AFTER DELETE ON transferencias REFERENCING OLD TABLE AS viejas
+FOR EACH STATEMENT EXECUTE FUNCTION fn_trg_sync_cambios('transferencia');
+
+CREATE OR REPLACE TRIGGER trg_cuentas_sync_insert
+AFTER INSERT ON cuentas REFERENCING NEW TABLE AS nuevas
+FOR EACH STATEMENT EXECUTE FUNCTION fn_trg_sync_cambios('cuenta');
+
+CREATE OR REPLACE TRIGGER trg_cuentas_sync_update
+AFTER UPDATE ON cuentas REFERENCING NEW TABLE AS nuevas
+FOR EACH STATEMENT EXECUTE FUNCTION fn_trg_sync_cambios('cuenta');
+
+CREATE OR REPLACE TRIGGER trg_cuentas_sync_delete
+AFTER DELETE ON cuentas REFERENCING OLD TABLE AS viejas
+FOR EACH STATEMENT EXECUTE FUNCTION fn_trg_sync_cambios('cuenta');
+
+CREATE OR REPLACE TRIGGER trg_categorias_sync_insert
+AFTER INSERT ON categorias REFERENCING NEW TABLE AS nuevas
+FOR EACH STATEMENT EXECUTE FUNCTION fn_trg_sync_cambios('categoria');
+
+CREATE OR REPLACE TRIGGER trg_categorias_sync_update
+AFTER UPDATE ON categorias REFERENCING NEW TABLE AS nuevas
+FOR EACH STATEMENT EXECUTE FUNCTION fn_trg_sync_cambios('categoria');
+
+CREATE OR REPLACE TRIGGER trg_categorias_sync_delete
+AFTER DELETE ON categorias REFERENCING OLD TABLE AS viejas
+FOR EACH STATEMENT EXECUTE FUNCTION fn_trg_sync_cambios('categoria');
+
+
+-- 🔹 Compactación del log
+-- 1. Elimina entradas superadas por una más reciente de la misma entidad
+-- 2. Elimina todo lo anterior a p_retencion y sube sync_secuencia.minima
+CREATE OR REPLACE FUNCTION fn_compactar_sync(
+    p_retencion INTERVAL DEFAULT INTERVAL '30 days'
+)
+RETURNS INTEGER AS $$
+DECLARE
+    v_superadas INTEGER;
+    v_antiguas INTEGER;
+BEGIN
+    DELETE FROM sync_cambios c
+    USING sync_cambios n
+    WHERE n.usuario_id = c.usuario_id
+      AND n.entidad = c.entidad
+      AND n.entidad_id = c.entidad_id
+      AND n.seq > c.seq;
+
+    GET DIAGNOSTICS v_superadas = ROW_COUNT;
+
+    WITH eliminadas AS (
+        DELETE FROM sync_cambios
+        WHERE fecha < now() - p_retencion
+        RETURNING usuario_id, seq
+    ),
+    horizonte AS (
+        SELECT usuario_id, MAX(seq) AS seq, COUNT(*) AS filas
+        FROM eliminadas
+        GROUP BY usuario_id
+    ),
+    minimas AS (
+        UPDATE sync_secuencia s
+        SET minima = GREATEST(s.minima, h.seq)
+        FROM horizonte h
+        WHERE s.usuario_id = h.usuario_id
+    )
+    SELECT COALESCE(SUM(filas), 0)
+    INTO v_antiguas
+    FROM horizonte;
+
+    RETURN v_superadas + v_antiguas;
+END;
+$$ LANGUAGE plpgsql;
+
+-- =========================================================
+-- SALDO MATERIALIZADO POR CUENTA
+-- =========================================================
+
+-- Saldo confirmado de cada cuenta, actualizado en la misma transacción
+-- que cualquier insert/update/delete de flujo.
+CREATE TABLE IF NOT EXISTS saldo_cuenta (
+    cuenta_id INT PRIMARY KEY REFERENCES cuentas(id) ON DELETE CASCADE,
+    saldo NUMERIC(14,2) NOT NULL DEFAULT 0
+);
+
+
+-- 🔹 Suma un delta al saldo materializado de una cuenta
+-- p_crear = FALSE al revertir: no recrea filas de cuentas en eliminación
+CREATE OR REPLACE FUNCTION fn_saldo_cuenta_aplicar(
+    p_cuenta_id INT,
+    p_delta NUMERIC(14,2),
+    p_crear BOOLEAN
+)
+RETURNS VOID AS $$
+BEGIN
+    IF p_delta = 0 THEN
+        RETURN;
+    END IF;
+
+    UPDATE saldo_cuenta
+    SET saldo = saldo + p_delta
+    WHERE cuenta_id = p_cuenta_id;
+
+    IF NOT FOUND AND p_crear THEN
+        INSERT INTO saldo_cuenta AS s (cuenta_id, saldo)
+        VALUES (p_cuenta_id, p_delta)
+        ON CONFLICT (cuenta_id)
+        DO UPDATE SET saldo = s.saldo + EXCLUDED.saldo;
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- 🔹 Trigger sobre flujo: solo los movimientos confirmados afectan el saldo
+-- (mantiene saldo_cuenta y los snapshots de saldo_diario).
+-- No mantiene los saldos de una cuenta o usuario que se está eliminando
+-- por lotes: sus filas de saldo se van en cascada al final.
+CREATE OR REPLACE FUNCTION fn_trg_flujo_saldo_cuenta()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_delta_old NUMERIC(14,2) := 0;
+    v_delta_new NUMERIC(14,2) := 0;
+BEGIN
+    IF TG_OP = 'DELETE'
+       AND current_setting('finanzas.eliminando', TRUE) IN (
+           'cuenta:' || OLD.cuenta_id,
+           'usuario:' || OLD.usuario_id
+       )
+    THEN
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.estado = 'Confirmado' THEN
+        v_delta_old := CASE
+            WHEN OLD.tipo_movimiento = 'Ingreso' THEN OLD.monto
+            ELSE -OLD.monto
+        END;
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.estado = 'Confirmado' THEN
+        v_delta_new := CASE
+            WHEN NEW.tipo_movimiento = 'Ingreso' THEN NEW.monto
+            ELSE -NEW.monto
+        END;
+    END IF;
+
+    IF TG_OP = 'UPDATE' AND OLD.cuenta_id = NEW.cuenta_id THEN
+        PERFORM fn_saldo_cuenta_aplicar(NEW.cuenta_id, v_delta_new - v_delta_old, TRUE);
+
+        IF OLD.fecha = NEW.fecha THEN
+            PERFORM fn_saldo_diario_aplicar(NEW.cuenta_id, NEW.fecha, v_delta_new - v_delta_old, TRUE);
+        ELSE
+            PERFORM fn_saldo_diario_aplicar(OLD.cuenta_id, OLD.fecha, -v_delta_old, FALSE);
+            PERFORM fn_saldo_diario_aplicar(NEW.cuenta_id, NEW.fecha, v_delta_new, TRUE);
+        END IF;
+
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM fn_saldo_cuenta_aplicar(OLD.cuenta_id, -v_delta_old, FALSE);
+        PERFORM fn_saldo_diario_aplicar(OLD.cuenta_id, OLD.fecha, -v_delta_old, FALSE);
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM fn_saldo_cuenta_aplicar(NEW.cuenta_id, v_delta_new, TRUE);
+        PERFORM fn_saldo_diario_aplicar(NEW.cuenta_id, NEW.fecha, v_delta_new, TRUE);
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE TRIGGER trg_flujo_saldo_cuenta
+AFTER INSERT OR DELETE OR UPDATE OF cuenta_id, fecha, tipo_movimiento, estado, monto
+ON flujo
+FOR EACH ROW
+EXECUTE FUNCTION fn_trg_flujo_saldo_cuenta();
+
+
+-- 🔹 Toda cuenta nueva arranca con saldo 0
+CREATE OR REPLACE FUNCTION fn_trg_cuentas_saldo_inicial()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO saldo_cuenta (cuenta_id, saldo)
+    VALUES (NEW.id, 0)
+    ON CONFLICT (cuenta_id) DO NOTHING;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE TRIGGER trg_cuentas_saldo_inicial
+AFTER INSERT ON cuentas
+FOR EACH ROW
+EXECUTE FUNCTION fn_trg_cuentas_saldo_inicial();
+
+
+-- 🔹 Saldo recalculado desde cero (fuente de verdad: flujo)
+CREATE OR REPLACE FUNCTION fn_saldo_cuenta_calculado(
+    p_usuario_id VARCHAR(9) DEFAULT NULL
+)
+RETURNS TABLE(
+    cuenta_id INTEGER,
+    usuario_id VARCHAR(9),
+    saldo NUMERIC(14,2)
+) AS $$
+BEGIN
+    RETURN QUERY
+    SELECT
+        c.id,
+        c.usuario_id,
+        COALESCE(SUM(
+            CASE
+                WHEN f.tipo_movimiento = 'Ingreso' THEN f.monto
+                WHEN f.tipo_movimiento = 'Egreso' THEN -f.monto
+            END
+        ), 0)::NUMERIC(14,2)
+    FROM cuentas c
+    LEFT JOIN flujo f
+        ON f.cuenta_id = c.id
+        AND f.estado = 'Confirmado'
+    WHERE p_usuario_id IS NULL
+       OR c.usuario_id = p_usuario_id
+    GROUP BY c.id, c.usuario_id;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+
+-- 🔹 Verificador de consistencia: cuentas cuyo saldo materializado difiere
+CREATE OR REPLACE FUNCTION fn_verificar_saldo_cuenta(
+    p_usuario_id VARCHAR(9) DEFAULT NULL
+)
+RETURNS TABLE(
+    cuenta_id INTEGER,
+    usuario_id VARCHAR(9),
+    saldo_materializado NUMERIC(14,2),
+    saldo_calculado NUMERIC(14,2),
+    diferencia NUMERIC(14,2)
+) AS $$
+BEGIN
+    RETURN QUERY
+    SELECT
+        calc.cuenta_id,
+        calc.usuario_id,
+        s.saldo,
+        calc.saldo,
+        (COALESCE(s.saldo, 0) - calc.saldo)::NUMERIC(14,2)
+    FROM fn_saldo_cuenta_calculado(p_usuario_id) calc
+    LEFT JOIN saldo_cuenta s
+        ON s.cuenta_id = calc.cuenta_id
+    WHERE s.saldo IS DISTINCT FROM calc.saldo
+    ORDER BY calc.usuario_id, calc.cuenta_id;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+
+-- 🔹 Reconstrucción (backfill / reparación de drift)
+CREATE OR REPLACE FUNCTION fn_reconstruir_saldo_cuenta(
+    p_usuario_id VARCHAR(9) DEFAULT NULL
+)
+RETURNS INTEGER AS $$
+DECLARE
+    v_filas INTEGER;
+BEGIN
+    -- 🔒 Los triggers concurrentes esperan al commit y aplican su delta
+    LOCK TABLE saldo_cuenta IN EXCLUSIVE MODE;
+
+    INSERT INTO saldo_cuenta AS s (cuenta_id, saldo)
+    SELECT calc.cuenta_id, calc.saldo
+    FROM fn_saldo_cuenta_calculado(p_usuario_id) calc
+    ON CONFLICT (cuenta_id)
+    DO UPDATE SET saldo = EXCLUDED.saldo
+    WHERE s.saldo IS DISTINCT FROM EXCLUDED.saldo;
+
+    GET DIAGNOSTICS v_filas = ROW_COUNT;
+
+    RETURN v_filas;
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- 🔹 Backfill (una vez): las cuentas que ya existían al crear la tabla
+-- arrancan con su saldo calculado desde flujo. Solo inserta cuentas sin
+-- fila, así que volver a correr el script no pisa saldos vigentes.
+INSERT INTO saldo_cuenta (cuenta_id, saldo)
+SELECT calc.cuenta_id, calc.saldo
+FROM fn_saldo_cuenta_calculado() calc
+ON CONFLICT (cuenta_id) DO NOTHING;
+
+-- =========================================================
+-- SNAPSHOTS DIARIOS DE SALDO
+-- =========================================================
+
+-- Una fila por cuenta y día con movimientos confirmados:
+-- delta del día y saldo de cierre acumulado hasta ese día.
+CREATE TABLE IF NOT EXISTS saldo_diario (
+    cuenta_id INT NOT NULL REFERENCES cuentas(id) ON DELETE CASCADE,
+    fecha DATE NOT NULL,
+    delta NUMERIC(14,2) NOT NULL DEFAULT 0,
+    saldo_cierre NUMERIC(14,2) NOT NULL DEFAULT 0,
+
+    PRIMARY KEY (cuenta_id, fecha)
+);
+
+
+-- 🔹 Saldo de cierre de una cuenta a una fecha (último snapshot <= fecha)
+CREATE OR REPLACE FUNCTION fn_saldo_cierre(
+    p_cuenta_id INT,
+    p_fecha DATE
+)
+RETURNS NUMERIC(14,2) AS $$
+    SELECT COALESCE(
+        (
+            SELECT d.saldo_cierre
+            FROM saldo_diario d
+            WHERE d.cuenta_id = p_cuenta_id
+              AND d.fecha <= p_fecha
+            ORDER BY d.fecha DESC
+            LIMIT 1
+        ),
+        0
+    );
+$$ LANGUAGE sql STABLE;
+
+
+-- 🔹 Aplica un delta en una fecha: crea el snapshot del día si no existe
+-- y desplaza el cierre de ese día y de todos los posteriores.
+-- Movimientos del día actual → solo se toca una fila.
+CREATE OR REPLACE FUNCTION fn_saldo_diario_aplicar(
+    p_cuenta_id INT,
+    p_fecha DATE,
+    p_delta NUMERIC(14,2),
+    p_crear BOOLEAN
+)
+RETURNS VOID AS $$
+BEGIN
+    IF p_delta = 0 THEN
+        RETURN;
+    END IF;
+
+    -- 🔒 Serializa por cuenta (misma fila que el saldo materializado)
+    PERFORM 1
+    FROM saldo_cuenta
+    WHERE cuenta_id = p_cuenta_id
+    FOR UPDATE;
+
+    IF p_crear THEN
+        INSERT INTO saldo_diario (cuenta_id, fecha, delta, saldo_cierre)
+        VALUES (
+            p_cuenta_id,
+            p_fecha,
+            0,
+            fn_saldo_cierre(p_cuenta_id, p_fecha - 1)
+        )
+        ON CONFLICT (cuenta_id, fecha) DO NOTHING;
+    END IF;
+
+    UPDATE saldo_diario
+    SET delta = delta + CASE WHEN fecha = p_fecha THEN p_delta ELSE 0 END,
+        saldo_cierre = saldo_cierre + p_delta
+    WHERE cuenta_id = p_cuenta_id
+      AND fecha >= p_fecha;
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- 🔹 Saldo de todas las cuentas del usuario a una fecha
+CREATE OR REPLACE FUNCTION fn_saldo_a_fecha(
+    uid VARCHAR(9),
+    p_fecha DATE
+)
+RETURNS TABLE(
+    cuenta_id INTEGER,
+    cuenta TEXT,
+    saldo NUMERIC(14,2)
+) AS $$
+BEGIN
+    IF uid IS NULL THEN
+        RAISE EXCEPTION 'El usuario no puede ser NULL';
+    END IF;
+
+    IF p_fecha IS NULL THEN
+        RAISE EXCEPTION 'La fecha no puede ser NULL';
+    END IF;
+
+    RETURN QUERY
+    SELECT
+        c.id AS cuenta_id,
+        c.nombre AS cuenta,
+        fn_saldo_cierre(c.id, p_fecha) AS saldo
+    FROM cuentas c
+    WHERE c.usuario_id = uid
+      AND NOT EXISTS (
+          SELECT 1
+          FROM eliminaciones e
+          WHERE e.entidad = 'cuenta'
+            AND e.entidad_id = c.id::text
+            AND e.estado IN ('pendiente', 'en_curso')
+      )
+    ORDER BY c.nombre;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+
+-- 🔹 Serie temporal de saldos por cuenta (buckets dia/semana/mes)
+-- Una sola pasada: saldo base + suma acumulada (ventana) de los deltas
+-- diarios agrupados por periodo. El saldo de cada periodo es el de cierre.
+CREATE OR REPLACE FUNCTION fn_saldo_historial(
+    uid VARCHAR(9),
+    fecha_inicio DATE,
+    fecha_fin DATE,
+    p_intervalo TEXT
+)
+RETURNS TABLE(
+    cuenta_id INTEGER,
+    cuenta TEXT,
+    periodo DATE,
+    saldo NUMERIC(14,2)
+) AS $$
+DECLARE
+    v_unidad TEXT;
+BEGIN
+    IF uid IS NULL THEN
+        RAISE EXCEPTION 'El usuario no puede ser NULL';
+    END IF;
+
+    IF fecha_inicio IS NULL OR fecha_fin IS NULL THEN
+        RAISE EXCEPTION 'Las fechas no pueden ser NULL';
+    END IF;
+
+    IF fecha_inicio > fecha_fin THEN
+        RAISE EXCEPTION
+            'La fecha inicial (%) no puede ser mayor que la final (%)',
+            fecha_inicio,
+            fecha_fin;
+    END IF;
+
+    v_unidad := CASE p_intervalo
+        WHEN 'dia' THEN 'day'
+        WHEN 'semana' THEN 'week'
+        WHEN 'mes' THEN 'month'
+    END;
+
+    IF v_unidad IS NULL THEN
+        RAISE EXCEPTION 'Intervalo inválido: %', p_intervalo;
+    END IF;
+
+    RETURN QUERY
+    WITH periodos AS (
+        SELECT gs::date AS periodo
+        FROM generate_series(
+            date_trunc(v_unidad, fecha_inicio::timestamp),
+            date_trunc(v_unidad, fecha_fin::timestamp),
+            ('1 ' || v_unidad)::interval
+        ) AS gs
+    ),
+    base AS (
+        SELECT
+            c.id AS cuenta_id,
+            c.nombre AS cuenta,
+            fn_saldo_cierre(c.id, fecha_inicio - 1) AS saldo_base
+        FROM cuentas c
+        WHERE c.usuario_id = uid
+          AND NOT EXISTS (
+              SELECT 1
+              FROM eliminaciones e
+              WHERE e.entidad = 'cuenta'
+                AND e.entidad_id = c.id::text
+                AND e.estado IN ('pendiente', 'en_curso')
+          )
+    ),
+    deltas AS (
+        SELECT
+            d.cuenta_id,
+            date_trunc(v_unidad, d.fecha::timestamp)::date AS periodo,
+            SUM(d.delta) AS delta
+        FROM saldo_diario d
+        JOIN base b ON b.cuenta_id = d.cuenta_id
+        WHERE d.fecha BETWEEN fecha_inicio AND fecha_fin
+        GROUP BY 1, 2
+    )
+    SELECT
+        b.cuenta_id,
+        b.cuenta,
+        p.periodo,
+        (
+            b.saldo_base
+            + SUM(COALESCE(x.delta, 0)) OVER (
+                PARTITION BY b.cuenta_id
+                ORDER BY p.periodo
+            )
+        )::NUMERIC(14,2) AS saldo
+    FROM base b
+    CROSS JOIN periodos p
+    LEFT JOIN deltas x
+        ON x.cuenta_id = b.cuenta_id
+        AND x.periodo = p.periodo
+    ORDER BY b.cuenta, b.cuenta_id, p.periodo;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+
+-- 🔹 Snapshots recalculados desde cero (fuente de verdad: flujo)
+CREATE OR REPLACE FUNCTION fn_saldo_diario_calculado(
+    p_usuario_id VARCHAR(9) DEFAULT NULL
+)
+RETURNS TABLE(
+    cuenta_id INTEGER,
+    fecha DATE,
+    delta NUMERIC(14,2),
+    saldo_cierre NUMERIC(14,2)
+) AS $$
+BEGIN
+    RETURN QUERY
+    SELECT
+        d.cuenta_id,
+        d.fecha,
+        d.delta::NUMERIC(14,2),
+        SUM(d.delta) OVER (
+            PARTITION BY d.cuenta_id
+            ORDER BY d.fecha
+        )::NUMERIC(14,2)
+    FROM (
+        SELECT
+            f.cuenta_id,
+            f.fecha,
+            SUM(
+                CASE
+                    WHEN f.tipo_movimiento = 'Ingreso' THEN f.monto
+                    ELSE -f.monto
+                END
+            ) AS delta
+        FROM flujo f
+        JOIN cuentas c ON c.id = f.cuenta_id
+        WHERE f.estado = 'Confirmado'
+          AND (p_usuario_id IS NULL OR c.usuario_id = p_usuario_id)
+        GROUP BY f.cuenta_id, f.fecha
+    ) d;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+
+-- 🔹 Verificador: snapshots que difieren del cálculo desde cero
+CREATE OR REPLACE FUNCTION fn_verificar_saldo_diario(
+    p_usuario_id VARCHAR(9) DEFAULT NULL
+)
+RETURNS TABLE(
+    cuenta_id INTEGER,
+    fecha DATE,
+    saldo_cierre NUMERIC(14,2),
+    saldo_calculado NUMERIC(14,2)
+) AS $$
+BEGIN
+    RETURN QUERY
+    WITH materializado AS (
+        SELECT d.cuenta_id, d.fecha, d.delta, d.saldo_cierre
+        FROM saldo_diario d
+        JOIN cuentas c ON c.id = d.cuenta_id
+        WHERE p_usuario_id IS NULL OR c.usuario_id = p_usuario_id
+    )
+    SELECT
+        COALESCE(m.cuenta_id, calc.cuenta_id),
+        COALESCE(m.fecha, calc.fecha),
+        m.saldo_cierre,
+        calc.saldo_cierre
+    FROM materializado m
+    FULL JOIN fn_saldo_diario_calculado(p_usuario_id) calc
+        ON calc.cuenta_id = m.cuenta_id
+        AND calc.fecha = m.fecha
+    -- Un día sin delta neto es válido si su cierre sigue siendo correcto
+    WHERE (m.cuenta_id IS NULL)
+       OR (calc.cuenta_id IS NULL AND m.delta <> 0)
+       OR (calc.cuenta_id IS NOT NULL AND m.saldo_cierre <> calc.saldo_cierre)
+    ORDER BY 1, 2;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+
+-- 🔹 Reconstrucción (backfill / reparación)
+CREATE OR REPLACE FUNCTION fn_reconstruir_saldo_diario(
+    p_usuario_id VARCHAR(9) DEFAULT NULL
+)
+RETURNS INTEGER AS $$
+DECLARE
+    v_filas INTEGER;
+BEGIN
+    LOCK TABLE saldo_diario IN EXCLUSIVE MODE;
+
+    DELETE FROM saldo_diario d
+    USING cuentas c
+    WHERE c.id = d.cuenta_id
+      AND (p_usuario_id IS NULL OR c.usuario_id = p_usuario_id);
+
+    INSERT INTO saldo_diario (cuenta_id, fecha, delta, saldo_cierre)
+    SELECT cuenta_id, fecha, delta, saldo_cierre
+    FROM fn_saldo_diario_calculado(p_usuario_id);
+
+    GET DIAGNOSTICS v_filas = ROW_COUNT;
+
+    RETURN v_filas;
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- 🔹 Backfill (una vez): snapshots de las cuentas que ya tenían
+-- movimientos confirmados al crear la tabla. Solo cuentas sin ningún
+-- snapshot, así que volver a correr el script no toca las mantenidas
+-- por trigger.
+INSERT INTO saldo_diario (cuenta_id, fecha, delta, saldo_cierre)
+SELECT calc.cuenta_id, calc.fecha, calc.delta, calc.saldo_cierre
+FROM fn_saldo_diario_calculado() calc
+WHERE NOT EXISTS (
+    SELECT 1
+    FROM saldo_diario d
+    WHERE d.cuenta_id = calc.cuenta_id
+);
+
+-- =========================================================
+-- CREACIÓN DE TRANSFERENCIAS (UN SOLO ROUND TRIP)
+-- =========================================================
+
+-- Valida propiedad y saldo, resuelve las categorías e inserta la
+-- transferencia y sus dos flujos de forma atómica.
+-- Los saldos de ambas cuentas se bloquean en orden de id, por lo que
+-- transferencias concurrentes (incluso cruzadas) se serializan sin
+-- sobregiros ni deadlocks.
+CREATE OR REPLACE FUNCTION fn_crear_transferencia(
+    p_usuario_id VARCHAR(9),
+    p_cuenta_origen_id INT,
+    p_cuenta_destino_id INT,
+    p_monto NUMERIC(14,2),
+    p_descripcion TEXT DEFAULT NULL
+)
+RETURNS transferencias AS $$
+DECLARE
+    v_cuentas INT;
+    v_saldo_origen NUMERIC(14,2);
+    v_categoria_egreso INT;
+    v_categoria_ingreso INT;
+    v_transferencia transferencias;
+BEGIN
+    -- 🔒 Validaciones
+    IF p_usuario_id IS NULL THEN
+        RAISE EXCEPTION 'usuario_id no puede ser NULL';
+    END IF;
+
+    IF p_monto IS NULL OR p_monto <= 0 THEN
+        RAISE EXCEPTION 'El monto debe ser mayor a 0';
+    END IF;
+
+    IF p_cuenta_origen_id = p_cuenta_destino_id THEN
+        RAISE EXCEPTION 'La cuenta origen y destino no pueden ser la misma';
+    END IF;
+
+    -- 🔐 Propiedad + lock de saldos (orden de id)
+    SELECT COUNT(*), SUM(b.saldo) FILTER (WHERE b.cuenta_id = p_cuenta_origen_id)
+    INTO v_cuentas, v_saldo_origen
+    FROM (
+        SELECT s.cuenta_id, s.saldo
+        FROM saldo_cuenta s
+        JOIN cuentas c ON c.id = s.cuenta_id
+        WHERE c.usuario_id = p_usuario_id
+          AND s.cuenta_id IN (p_cuenta_origen_id, p_cuenta_destino_id)
+        ORDER BY s.cuenta_id
+        FOR UPDATE OF s
+    ) b;
+
+    IF v_cuentas <> 2 THEN
+        RAISE EXCEPTION 'La cuenta no existe o no pertenece al usuario';
+    END IF;
+
+    IF v_saldo_origen < p_monto THEN
+        RAISE EXCEPTION 'Saldo insuficiente en la cuenta origen';
+    END IF;
+
+    -- 🗂 Categorías de transferencia
+    SELECT
+        MAX(id) FILTER (WHERE tipo_movimiento = 'Egreso'),
+        MAX(id) FILTER (WHERE tipo_movimiento = 'Ingreso')
+    INTO v_categoria_egreso, v_categoria_ingreso
+    FROM categorias
+    WHERE usuario_id = p_usuario_id
+      AND nombre = 'Transferencias entre cuentas';
+
+    IF v_categoria_egreso IS NULL OR v_categoria_ingreso IS NULL THEN
+        RAISE EXCEPTION 'Categorías de transferencia no configuradas'
+            USING ERRCODE = 'no_data_found';
+    END IF;
+
+    -- 📝 Transferencia
+    INSERT INTO transferencias (
+        usuario_id,
+        cuenta_origen_id,
+        cuenta_destino_id,
+        monto,
+        descripcion,
+        estado
+    ) VALUES (
+        p_usuario_id,
+        p_cuenta_origen_id,
+        p_cuenta_destino_id,
+        p_monto,
+        p_descripcion,
+        'Confirmado'
+    )
+    RETURNING * INTO v_transferencia;
+
+    -- 📝 Flujos (egreso en origen, ingreso en destino)
+    INSERT INTO flujo (
+        usuario_id,
+        fecha,
+        descripcion,
+        categoria_id,
+        cuenta_id,
+        tipo_movimiento,
+        tipo_egreso,
+        estado,
+        monto,
+        transferencia_id
+    ) VALUES
+    (
+        p_usuario_id,
+        CURRENT_DATE,
+        p_descripcion,
+        v_categoria_egreso,
+        p_cuenta_origen_id,
+        'Egreso',
+        'Variable',
+        'Confirmado',
+        p_monto,
+        v_transferencia.id
+    ),
+    (
+        p_usuario_id,
+        CURRENT_DATE,
+        p_descripcion,
+        v_categoria_ingreso,
+        p_cuenta_destino_id,
+        'Ingreso',
+        NULL,
+        'Confirmado',
+        p_monto,
+        v_transferencia.id
+    );
+
+    RETURN v_transferencia;
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- =========================================================
+-- INVALIDACIÓN DE CACHE (LISTEN/NOTIFY)
+-- =========================================================
+
+-- 🔹 Notifica en el canal finanzas_cache a los usuarios afectados por
+-- cada sentencia: payload "{usuario_id}|{entidad}". La app escucha el
+-- canal e invalida el cache, así que las escrituras que no pasan por la
+-- API (SQL manual, funciones llamadas directo, procesos batch) no dejan
+-- datos obsoletos. Las conexiones de la API se identifican con
+-- finanzas.origen = 'api' y se omiten: sus routers ya invalidan (y los
+-- saldos se actualizan por delta, sin invalidar).
+-- TG_ARGV[0] = entidad
+CREATE OR REPLACE FUNCTION fn_trg_notificar_cache()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_usuario VARCHAR(9);
+BEGIN
+    IF current_setting('finanzas.origen', TRUE) = 'api' THEN
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP = 'DELETE' THEN
+        FOR v_usuario IN SELECT DISTINCT usuario_id FROM viejas LOOP
+            PERFORM pg_notify('finanzas_cache', v_usuario || '|' || TG_ARGV[0]);
+        END LOOP;
+    ELSE
+        FOR v_usuario IN SELECT DISTINCT usuario_id FROM nuevas LOOP
+            PERFORM pg_notify('finanzas_cache', v_usuario || '|' || TG_ARGV[0]);
+        END LOOP;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE TRIGGER trg_flujo_cache_insert
+AFTER INSERT ON flujo REFERENCING NEW TABLE AS nuevas
+FOR EACH STATEMENT EXECUTE FUNCTION fn_trg_notificar_cache('flujo');
+
+CREATE OR REPLACE TRIGGER trg_flujo_cache_update
+AFTER UPDATE ON flujo REFERENCING NEW TABLE AS nuevas
+FOR EACH STATEMENT EXECUTE FUNCTION fn_trg_notificar_cache('flujo');
+
+CREATE OR REPLACE TRIGGER trg_flujo_cache_delete
+AFTER DELETE ON flujo REFERENCING OLD TABLE AS viejas
+FOR EACH STATEMENT EXECUTE FUNCTION fn_trg_notificar_cache('flujo');
+
+CREATE OR REPLACE TRIGGER trg_transferencias_cache_insert
+AFTER INSERT ON transferencias REFERENCING NEW TABLE AS nuevas
+FOR EACH STATEMENT EXECUTE FUNCTION fn_trg_notificar_cache('transferencia');
+
+CREATE OR REPLACE TRIGGER trg_transferencias_cache_update
+AFTER UPDATE ON transferencias REFERENCING NEW TABLE AS nuevas
+FOR EACH STATEMENT EXECUTE FUNCTION fn_trg_notificar_cache('transferencia');
+
+CREATE OR REPLACE TRIGGER trg_transferencias_cache_delete
+AFTER DELETE ON transferencias REFERENCING OLD TABLE AS viejas
+FOR EACH STATEMENT EXECUTE FUNCTION fn_trg_notificar_cache('transferencia');
+
+CREATE OR REPLACE TRIGGER trg_cuentas_cache_insert
+AFTER INSERT ON cuentas REFERENCING NEW TABLE AS nuevas
+FOR EACH STATEMENT EXECUTE FUNCTION fn_trg_notificar_cache('cuenta');
+
+CREATE OR REPLACE TRIGGER trg_cuentas_cache_update
+AFTER UPDATE ON cuentas REFERENCING NEW TABLE AS nuevas
+FOR EACH STATEMENT EXECUTE FUNCTION fn_trg_notificar_cache('cuenta');
+
+CREATE OR REPLACE TRIGGER trg_cuentas_cache_delete
+AFTER DELETE ON cuentas REFERENCING OLD TABLE AS viejas
+FOR EACH STATEMENT EXECUTE FUNCTION fn_trg_notificar_cache('cuenta');
+
+CREATE OR REPLACE TRIGGER trg_categorias_cache_insert
+AFTER INSERT ON categorias REFERENCING NEW TABLE AS nuevas
+FOR EACH STATEMENT EXECUTE FUNCTION fn_trg_notificar_cache('categoria');
+
+CREATE OR REPLACE TRIGGER trg_categorias_cache_update
+AFTER UPDATE ON categorias REFERENCING NEW TABLE AS nuevas
+FOR EACH STATEMENT EXECUTE FUNCTION fn_trg_notificar_cache('categoria');
+
+CREATE OR REPLACE TRIGGER trg_categorias_cache_delete
+AFTER DELETE ON categorias REFERENCING OLD TABLE AS viejas
+FOR EACH STATEMENT EXECUTE FUNCTION fn_trg_notificar_cache('categoria');
+
+
+-- =========================================================
+-- FUSIÓN DE CATEGORÍAS (SET-BASED)
+-- =========================================================
+
+-- Reasigna todos los movimientos de las categorías origen a la destino
+-- con un solo UPDATE, traslada sus filas del resumen mensual en bloque
+-- (agrupadas, sin pasar por el trigger fila a fila) y elimina las
+-- categorías origen. Todo ocurre en la transacción del llamador.
+-- Las categorías se bloquean (orden de id) antes de mover nada, así que
+-- un movimiento concurrente no puede quedar apuntando a una origen.
+-- Retorna la cantidad de movimientos reasignados.
+CREATE OR REPLACE FUNCTION fn_fusionar_categorias(
+    p_usuario_id VARCHAR(9),
+    p_origenes INT[],
+    p_destino INT
+)
+RETURNS INT AS $$
+DECLARE
+    v_origenes INT[];
+    v_encontradas INT;
+    v_tipos INT;
+    v_protegidas INT;
+    v_movidos INT;
+BEGIN
+    -- 🔒 Validaciones
+    v_origenes := ARRAY(SELECT DISTINCT unnest(p_origenes));
+
+    IF cardinality(v_origenes) = 0 THEN
+        RAISE EXCEPTION 'Debe indicar al menos una categoría origen';
+    END IF;
+
+    IF p_destino = ANY(v_origenes) THEN
+        RAISE EXCEPTION 'La categoría destino no puede ser también origen';
+    END IF;
+
+    -- 🔐 Propiedad + lock de las categorías (orden de id)
+    PERFORM 1
+    FROM categorias
+    WHERE usuario_id = p_usuario_id
+      AND id = ANY(v_origenes || p_destino)
+    ORDER BY id
+    FOR UPDATE;
+
+    SELECT
+        COUNT(*),
+        COUNT(DISTINCT tipo_movimiento),
+        COUNT(*) FILTER (
+            WHERE id <> p_destino
+              AND nombre = 'Transferencias entre cuentas'
+        )
+    INTO v_encontradas, v_tipos, v_protegidas
+    FROM categorias
+    WHERE usuario_id = p_usuario_id
+      AND id = ANY(v_origenes || p_destino);
+
+    IF v_encontradas <> cardinality(v_origenes) + 1 THEN
+        RAISE EXCEPTION 'La categoría no existe o no pertenece al usuario';
+    END IF;
+
+    IF v_tipos > 1 THEN
+        RAISE EXCEPTION 'Las categorías deben ser del mismo tipo de movimiento';
+    END IF;
+
+    IF v_protegidas > 0 THEN
+        RAISE EXCEPTION 'Las categorías de transferencias no se pueden fusionar';
+    END IF;
+
+    -- 📝 Movimientos: un solo UPDATE (el resumen se ajusta abajo)
+    PERFORM set_config('finanzas.resumen_diferido', 'on', TRUE);
+
+    UPDATE flujo
+    SET categoria_id = p_destino
+    WHERE usuario_id = p_usuario_id
+      AND categoria_id = ANY(v_origenes);
+
+    GET DIAGNOSTICS v_movidos = ROW_COUNT;
+
+    PERFORM set_config('finanzas.resumen_diferido', 'off', TRUE);
+
+    -- 📊 Resumen mensual: las filas de las origen se suman a la destino
+    INSERT INTO resumen_categoria_mensual AS r (
+        usuario_id, mes, categoria_id, tipo_movimiento,
+        tipo_egreso, estado, total, cantidad
+    )
+    SELECT
+        usuario_id, mes, p_destino, tipo_movimiento,
+        tipo_egreso, estado, SUM(total), SUM(cantidad)
+    FROM resumen_categoria_mensual
+    WHERE usuario_id = p_usuario_id
+      AND categoria_id = ANY(v_origenes)
+    GROUP BY usuario_id, mes, tipo_movimiento, tipo_egreso, estado
+    ON CONFLICT ON CONSTRAINT uq_resumen_categoria_mensual
+    DO UPDATE SET
+        total = r.total + EXCLUDED.total,
+        cantidad = r.cantidad + EXCLUDED.cantidad;
+
+    -- 🗑 Categorías origen (sus filas de resumen se van en cascada)
+    DELETE FROM categorias
+    WHERE usuario_id = p_usuario_id
+      AND id = ANY(v_origenes);
+
+    RETURN v_movidos;
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- =========================================================
+-- ELIMINACIÓN POR LOTES (CUENTAS Y USUARIOS)
+-- =========================================================
+
+-- Una fila por solicitud de eliminación. Mientras está pendiente o en
+-- curso, la entidad se considera marcada para eliminar: la API la oculta
+-- y rechaza escrituras que la referencien. Sin FK a usuarios: el estado
+-- sigue consultable después de eliminar al usuario.
+CREATE TABLE IF NOT EXISTS eliminaciones (
+    id BIGSERIAL PRIMARY KEY,
+    usuario_id VARCHAR(9) NOT NULL,
+    entidad TEXT NOT NULL,
+    entidad_id TEXT NOT NULL,
+    estado TEXT NOT NULL DEFAULT 'pendiente',
+    fase TEXT,
+    total BIGINT,
+    eliminados BIGINT NOT NULL DEFAULT 0,
+    error TEXT,
+    creada TIMESTAMPTZ NOT NULL DEFAULT now(),
+    actualizada TIMESTAMPTZ NOT NULL DEFAULT now(),
+    finalizada TIMESTAMPTZ,
+
+    CONSTRAINT chk_eliminaciones_entidad
+        CHECK (entidad IN ('cuenta', 'usuario')),
+
+    CONSTRAINT chk_eliminaciones_estado
+        CHECK (estado IN ('pendiente', 'en_curso', 'completada', 'fallida'))
+);
+
+-- Una sola eliminación activa por entidad
+CREATE UNIQUE INDEX IF NOT EXISTS uq_eliminaciones_activas
+    ON eliminaciones(entidad, entidad_id)
+    WHERE estado IN ('pendiente', 'en_curso');
+
+CREATE INDEX IF NOT EXISTS idx_eliminaciones_usuario
+    ON eliminaciones(usuario_id);
+
+
+-- 🔹 Ejecuta un lote de una eliminación y registra el progreso.
+-- Cada llamada borra a lo sumo p_lote filas de la fase en curso, en la
+-- transacción del llamador (que confirma entre lotes: locks cortos y WAL
+-- acotado por commit). Retorna las filas eliminadas; 0 = terminada.
+--
+-- Cuenta:  transferencias (y el flujo de su lado; la contraparte en la
+--          otra cuenta queda como movimiento propio) → flujo → cuenta
+-- Usuario: sesiones → transferencias → flujo → log de sync →
+--          auditoría (se desvincula) → usuario (cascada del resto)
+--
+-- Con finanzas.eliminando = '{entidad}:{id}' los triggers no mantienen
+-- saldos, resumen ni log de sync de lo que se va a eliminar en cascada.
+CREATE OR REPLACE FUNCTION fn_eliminar_lote(
+    p_id BIGINT,
+    p_lote INT
+)
+RETURNS INT AS $$
+DECLARE
+    v_job eliminaciones;
+    v_uid VARCHAR(9);
+    v_cuenta INT;
+    v_total BIGINT;
+    v_fase TEXT;
+    v_ids INT[];
+    v_n INT := 0;
+BEGIN
+    SELECT * INTO v_job
+    FROM eliminaciones
+    WHERE id = p_id
+    FOR UPDATE;
+
+    IF NOT FOUND OR v_job.estado IN ('completada', 'fallida') THEN
+        RETURN 0;
+    END IF;
+
+    v_uid := v_job.usuario_id;
+    v_total := v_job.total;
+
+    PERFORM set_config(
+        'finanzas.eliminando',
+        v_job.entidad || ':' || v_job.entidad_id,
+        TRUE
+    );
+
+    IF v_job.entidad = 'cuenta' THEN
+        v_cuenta := v_job.entidad_id::INT;
+
+        -- 📏 Estimación (primer lote)
+        IF v_total IS NULL THEN
+            SELECT
+                (SELECT COUNT(*) FROM transferencias
+                 WHERE usuario_id = v_uid
+                   AND (cuenta_origen_id = v_cuenta OR cuenta_destino_id = v_cuenta))
+                + (SELECT COUNT(*) FROM flujo
+                   WHERE cuenta_id = v_cuenta AND transferencia_id IS NULL)
+            INTO v_total;
+        END IF;
+
+        v_fase := 'transferencias';
+        SELECT array_agg(id) INTO v_ids
+        FROM (
+            SELECT id FROM transferencias
+            WHERE usuario_id = v_uid
+              AND (cuenta_origen_id = v_cuenta OR cuenta_destino_id = v_cuenta)
+            LIMIT p_lote
+        ) t;
+
+        IF v_ids IS NOT NULL THEN
+            -- 🔗 La contraparte en la otra cuenta se conserva como
+            -- movimiento propio (su saldo, snapshots y resumen no
+            -- cambian); solo se va en cascada el lado de esta cuenta
+            UPDATE flujo
+            SET transferencia_id = NULL
+            WHERE transferencia_id = ANY(v_ids)
+              AND cuenta_id <> v_cuenta;
+
+            DELETE FROM transferencias
+            WHERE id = ANY(v_ids);
+            GET DIAGNOSTICS v_n = ROW_COUNT;
+        END IF;
+
+        -- 📊 El usuario sigue existiendo: su resumen mensual se ajusta
+        -- una vez por grupo del lote, no fila a fila
+        IF v_n = 0 THEN
+            v_fase := 'flujo';
+            PERFORM set_config('finanzas.resumen_diferido', 'on', TRUE);
+
+            WITH borrados AS (
+                DELETE FROM flujo
+                WHERE id IN (
+                    SELECT id FROM flujo
+                    WHERE cuenta_id = v_cuenta
+                    LIMIT p_lote
+                )
+                RETURNING usuario_id, fecha, categoria_id, tipo_movimiento,
+                          tipo_egreso, estado, monto
+            ),
+            grupos AS (
+                SELECT
+                    usuario_id,
+                    date_trunc('month', fecha)::date AS mes,
+                    categoria_id, tipo_movimiento, tipo_egreso, estado,
+                    SUM(monto) AS total,
+                    COUNT(*) AS cantidad
+                FROM borrados
+                GROUP BY 1, 2, 3, 4, 5, 6
+            ),
+            ajuste AS (
+                UPDATE resumen_categoria_mensual r
+                SET total = r.total - g.total,
+                    cantidad = r.cantidad - g.cantidad
+                FROM grupos g
+                WHERE r.usuario_id = g.usuario_id
+                  AND r.mes = g.mes
+                  AND r.categoria_id IS NOT DISTINCT FROM g.categoria_id
+                  AND r.tipo_movimiento = g.tipo_movimiento
+                  AND r.tipo_egreso IS NOT DISTINCT FROM g.tipo_egreso
+                  AND r.estado = g.estado
+            )
+            SELECT COUNT(*) INTO v_n FROM borrados;
+
+            PERFORM set_config('finanzas.resumen_diferido', 'off', TRUE);
+
+            DELETE FROM resumen_categoria_mensual
+            WHERE usuario_id = v_uid
+              AND cantidad <= 0;
+        END IF;
+
+        IF v_n = 0 THEN
+            v_fase := 'cuenta';
+            DELETE FROM cuentas
+            WHERE id = v_cuenta
+              AND usuario_id = v_uid;
+        END IF;
+
+    ELSE
+        IF v_total IS NULL THEN
+            SELECT
+                (SELECT COUNT(*) FROM refresh_tokens WHERE usuario_id = v_uid)
+                + (SELECT COUNT(*) FROM transferencias WHERE usuario_id = v_uid)
+                + (SELECT COUNT(*) FROM flujo
+                   WHERE usuario_id = v_uid AND transferencia_id IS NULL)
+                + (SELECT COUNT(*) FROM sync_cambios WHERE usuario_id = v_uid)
+                + (SELECT COUNT(*) FROM auditoria WHERE usuario_id = v_uid)
+            INTO v_total;
+        END IF;
+
+        v_fase := 'sesiones';
+        DELETE FROM refresh_tokens
+        WHERE usuario_id = v_uid;
+        GET DIAGNOSTICS v_n = ROW_COUNT;
+
+        IF v_n = 0 THEN
+            v_fase := 'transferencias';
+            DELETE FROM transferencias
+            WHERE id IN (
+                SELECT id FROM transferencias
+                WHERE usuario_id = v_uid
+                LIMIT p_lote
+            );
+            GET DIAGNOSTICS v_n = ROW_COUNT;
+        END IF;
+
+        IF v_n = 0 THEN
+            v_fase := 'flujo';
+            DELETE FROM flujo
+            WHERE id IN (
+                SELECT id FROM flujo
+                WHERE usuario_id = v_uid
+                LIMIT p_lote
+            );
+            GET DIAGNOSTICS v_n = ROW_COUNT;
+        END IF;
+
+        IF v_n = 0 THEN
+            v_fase := 'sync';
+            DELETE FROM sync_cambios
+            WHERE (usuario_id, seq, entidad, entidad_id) IN (
+                SELECT usuario_id, seq, entidad, entidad_id
+                FROM sync_cambios
+                WHERE usuario_id = v_uid
+                LIMIT p_lote
+            );
+            GET DIAGNOSTICS v_n = ROW_COUNT;
+        END IF;
+
+        IF v_n = 0 THEN
+            v_fase := 'auditoria';
+            UPDATE auditoria
+            SET usuario_id = NULL
+            WHERE id IN (
+                SELECT id FROM auditoria
+                WHERE usuario_id = v_uid
+                LIMIT p_lote
+            );
+            GET DIAGNOSTICS v_n = ROW_COUNT;
+        END IF;
+
+        IF v_n = 0 THEN
+            v_fase := 'usuario';
+            DELETE FROM usuarios
+            WHERE id = v_uid;
+        END IF;
+    END IF;
+
+    UPDATE eliminaciones
+    SET estado = CASE WHEN v_n = 0 THEN 'completada' ELSE 'en_curso' END,
+        fase = v_fase,
+        total = v_total,
+        eliminados = eliminados + v_n,
+        actualizada = now(),
+        finalizada = CASE WHEN v_n = 0 THEN now() END
+    WHERE id = p_id;
+
+    RETURN v_n;
+END;
+$$ LANGUAGE plpgsql;
+
+
 COMMIT;
\ No newline at end of file
@@ -5,6 +5,7 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from database import SessionLocal
 from core.settings import settings 
+from repositories.eliminaciones import usuario_en_eliminacion
 
 security = HTTPBearer()
 
@@ -72,3 +73,22 @@ def get_current_admin(
             detail="No tienes permisos de administrador"
         )
     return current_user
+
+
+def get_active_user(
+    current_user: CurrentUser = Depends(get_current_user),
+    db: Session = Depends(get_db)
+) -> CurrentUser:
+    """
+    Dependencia para endpoints de escritura: rechaza al usuario que
+    tiene una eliminación en curso (DELETE /usuarios/me).
+
+    El access token sigue siendo válido hasta que expira; sin esta
+    verificación podría crear datos mientras el worker los elimina.
+    """
+    if usuario_en_eliminacion(db, current_user.id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="El usuario se está eliminando"
+        )
+    return current_user
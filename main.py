@@ -1,10 +1,59 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager, suppress
+
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from database import marcar_origen
+from dependencies import get_current_admin
 from middleware.logging import auditoria_middleware
-from routers import auth, usuarios, cuentas, categorias, flujo, transferencias, saldos, auditoria
+from middleware.politicas_auditoria import resolver_politicas
+from core.cache import (
+    cache_local,
+    escuchar_invalidaciones,
+    reintentar_invalidaciones,
+    estado_cache
+)
+from core.cambios_db import escuchar_cambios_db
+from core.eliminaciones import procesar_eliminaciones
+from core.settings import settings
+from routers import auth, usuarios, cuentas, categorias, flujo, transferencias, saldos, auditoria, reportes, sync, dashboard, eliminaciones, exportacion
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Tareas de fondo del worker.
+
+    - Invalidaciones pub/sub del cache local (si está activo)
+    - Reintento de invalidaciones que fallaron con Redis degradado
+    - Invalidación por cambios hechos fuera de la API (LISTEN/NOTIFY)
+    - Eliminación por lotes de cuentas y usuarios
+    """
+    tareas = [asyncio.create_task(reintentar_invalidaciones())]
+
+    if settings.cache_escuchar_db:
+        tareas.append(asyncio.create_task(escuchar_cambios_db()))
+
+    if cache_local.activo:
+        tareas.append(asyncio.create_task(escuchar_invalidaciones()))
+
+    if settings.eliminacion_activa:
+        tareas.append(asyncio.create_task(procesar_eliminaciones()))
 
-app = FastAPI(title="Sistema Financiero")
+    yield
+
+    for tarea in tareas:
+        tarea.cancel()
+        with suppress(asyncio.CancelledError):
+            await tarea
+
+
+# Las escrituras de la API invalidan el cache en sus routers: los
+# triggers de NOTIFY las omiten
+marcar_origen("api")
+
+app = FastAPI(title="Sistema Financiero", lifespan=lifespan)
 
 
 app.add_middleware(
@@ -34,7 +83,22 @@ app.include_router(flujo.router)
 app.include_router(transferencias.router)
 app.include_router(saldos.router)
 app.include_router(auditoria.router)
+app.include_router(reportes.router)
+app.include_router(sync.router)
+app.include_router(dashboard.router)
+app.include_router(eliminaciones.router)
+app.include_router(exportacion.router)
 
 @app.get("/health")
 def health():
     return {"status": "ok"}
+
+
+# Solo administradores: expone errores de Redis y estadísticas internas
+@app.get("/health/cache", dependencies=[Depends(get_current_admin)])
+def health_cache():
+    return estado_cache()
+
+
+# 📋 Política de auditoría de cada ruta (una vez, con todas registradas)
+resolver_politicas(app.routes)
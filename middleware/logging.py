@@ -7,6 +7,7 @@ from database import SessionLocal
 from models.auditoria import Auditoria
 from security.log_signer import sign_log
 from core.settings import settings
+from middleware.politicas_auditoria import politica_para
 
 SECRET_KEY = settings.secret_key
 ALGORITHM = settings.algorithm
@@ -19,12 +20,6 @@ PUBLIC_PATH_PREFIXES = (
     "/static",
 )
 
-NO_AUDIT_PATHS = (
-    "/auth/login",
-    "/auth/refresh",
-    "/usuarios",
-)
-
 RATE_LIMIT_RULES = {
     "/auth/login": (5, 300),
     "/usuarios": (5, 60),
@@ -96,47 +91,65 @@ async def auditoria_middleware(request: Request, call_next):
         return response
 
     finally:
-        # ❗ Auditoría JAMÁS debe romper la app
-        if path in NO_AUDIT_PATHS:
-            pass
+        # 📋 Política de la ruta (ver middleware.politicas_auditoria)
+        if politica_para(request.scope, method).auditar(method, status_code):
+            registrar_auditoria(
+                usuario_id=usuario_id,
+                metodo=method,
+                ruta=path,
+                status_code=status_code,
+                ip=ip,
+                duracion_ms=int((time.time() - start) * 1000),
+            )
 
-        try:
-            duration_ms = int((time.time() - start) * 1000)
-
-            db = SessionLocal()
-            last = db.query(Auditoria.firma).order_by(Auditoria.id.desc()).first()
-            firma_anterior = last[0] if last else None
-
-            log_data = {
-                "usuario_id": usuario_id,
-                "metodo": method,
-                "ruta": path,
-                "status_code": status_code,
-                "ip": ip,
-                "duracion_ms": duration_ms,
-            }
-
-            firma = sign_log(log_data, firma_anterior)
-
-            db.add(
-                Auditoria(
-                    usuario_id=usuario_id,
-                    metodo=method,
-                    ruta=path,
-                    status_code=status_code,
-                    ip=ip,
-                    duracion_ms=duration_ms,
-                    firma=firma,
-                    firma_anterior=firma_anterior,
-                )
+
+def registrar_auditoria(
+    usuario_id: str | None,
+    metodo: str,
+    ruta: str,
+    status_code: int,
+    ip: str,
+    duracion_ms: int,
+) -> None:
+    """
+    Inserta el registro firmado, encadenado a la firma del anterior.
+    """
+    # ❗ Auditoría JAMÁS debe romper la app
+    try:
+        db = SessionLocal()
+        last = db.query(Auditoria.firma).order_by(Auditoria.id.desc()).first()
+        firma_anterior = last[0] if last else None
+
+        log_data = {
+            "usuario_id": usuario_id,
+            "metodo": metodo,
+            "ruta": ruta,
+            "status_code": status_code,
+            "ip": ip,
+            "duracion_ms": duracion_ms,
+        }
+
+        firma = sign_log(log_data, firma_anterior)
+
+        db.add(
+            Auditoria(
+                usuario_id=usuario_id,
+                metodo=metodo,
+                ruta=ruta,
+                status_code=status_code,
+                ip=ip,
+                duracion_ms=duracion_ms,
+                firma=firma,
+                firma_anterior=firma_anterior,
             )
-            db.commit()
+        )
+        db.commit()
 
-        except Exception as e:
-            print("⚠️ Auditoría falló:", e)
+    except Exception as e:
+        print("⚠️ Auditoría falló:", e)
 
-        finally:
-            try:
-                db.close()  # type: ignore
-            except Exception:
-                pass
+    finally:
+        try:
+            db.close()  # type: ignore
+        except Exception:
+            pass
@@ -0,0 +1,144 @@
+import random
+from dataclasses import dataclass
+from typing import Iterable, Literal
+
+from fastapi.routing import APIRoute
+
+from core.settings import settings
+
+
+# ======================================================
+# Políticas de auditoría por ruta
+# ======================================================
+# Cada ruta de la API (método + plantilla, p. ej. "GET /flujo/{flujo_id}")
+# tiene una política que decide si una petición se registra:
+#
+#   siempre     todas las peticiones
+#   muestreo    una fracción `tasa` de las exitosas y todos los errores
+#   escrituras  métodos que modifican datos y todos los errores
+#   errores     solo status >= 400
+#   omitir      nunca
+#
+# Las políticas se resuelven una vez por ruta al arrancar
+# (resolver_politicas): por petición solo se busca en un dict con la
+# ruta que FastAPI ya resolvió, sin comparar paths.
+
+Modo = Literal["siempre", "muestreo", "escrituras", "errores", "omitir"]
+
+METODOS_LECTURA = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+@dataclass(frozen=True)
+class PoliticaAuditoria:
+    modo: Modo
+    tasa: float = 1.0
+
+    def __post_init__(self):
+        if self.modo not in Modo.__args__:
+            raise ValueError(f"Modo de auditoría inválido: {self.modo}")
+
+        if not 0.0 <= self.tasa <= 1.0:
+            raise ValueError(f"Tasa de muestreo inválida: {self.tasa}")
+
+    def auditar(self, metodo: str, status_code: int) -> bool:
+        if self.modo == "omitir":
+            return False
+
+        if self.modo == "siempre" or status_code >= 400:
+            return True
+
+        if self.modo == "escrituras":
+            return metodo not in METODOS_LECTURA
+
+        if self.modo == "muestreo":
+            return random.random() < self.tasa
+
+        return False
+
+
+SIEMPRE = PoliticaAuditoria("siempre")
+ERRORES = PoliticaAuditoria("errores")
+OMITIR = PoliticaAuditoria("omitir")
+
+
+# Excepciones a la política por defecto, por "MÉTODO /plantilla"
+REGLAS_AUDITORIA: dict[str, PoliticaAuditoria] = {
+    # 🔐 Credenciales y tokens
+    "POST /auth/login": OMITIR,
+    "POST /auth/refresh": OMITIR,
+
+    # 👤 Registro público
+    "POST /usuarios/": OMITIR,
+
+    # 🩺 Monitoreo
+    "GET /health": OMITIR,
+    "GET /health/cache": OMITIR,
+
+    # ⏳ Sondeo del progreso de una eliminación
+    "GET /eliminaciones/{eliminacion_id}": ERRORES,
+}
+
+# Peticiones que no corresponden a ninguna ruta (404 / 405)
+SIN_RUTA = ERRORES
+
+_politicas: dict[tuple[str, str], PoliticaAuditoria] = {}
+
+
+def _politica_por_defecto(metodo: str) -> PoliticaAuditoria:
+    """
+    Lecturas: muestreo a AUDITORIA_TASA_LECTURAS. Escrituras: siempre.
+    """
+    if metodo in METODOS_LECTURA:
+        return PoliticaAuditoria("muestreo", settings.auditoria_tasa_lecturas)
+
+    return SIEMPRE
+
+
+def _resolver(metodo: str, plantilla: str) -> PoliticaAuditoria:
+    politica = REGLAS_AUDITORIA.get(f"{metodo} {plantilla}")
+
+    if politica is None:
+        politica = _politica_por_defecto(metodo)
+
+    _politicas[(metodo, plantilla)] = politica
+    return politica
+
+
+def resolver_politicas(rutas: Iterable) -> None:
+    """
+    Resuelve la política de cada (método, plantilla) de la aplicación.
+    Se llama una vez, después de registrar los routers.
+
+    Avisa de las reglas que no corresponden a ninguna ruta (plantilla
+    mal escrita o ruta eliminada).
+    """
+    _politicas.clear()
+
+    for ruta in rutas:
+        if isinstance(ruta, APIRoute):
+            for metodo in ruta.methods:
+                _resolver(metodo, ruta.path)
+
+    usadas = {f"{metodo} {plantilla}" for metodo, plantilla in _politicas}
+
+    for regla in REGLAS_AUDITORIA.keys() - usadas:
+        print("⚠️ Regla de auditoría sin ruta:", regla)
+
+
+def politica_para(scope: dict, metodo: str) -> PoliticaAuditoria:
+    """
+    Política de la petición, a partir de la ruta que FastAPI dejó en el
+    scope al enrutarla (llamar después de ejecutar la petición).
+    """
+    ruta = scope.get("route")
+
+    if ruta is None:
+        return SIN_RUTA
+
+    politica = _politicas.get((metodo, ruta.path))
+
+    # Ruta registrada después de resolver_politicas
+    if politica is None:
+        politica = _resolver(metodo, ruta.path)
+
+    return politica
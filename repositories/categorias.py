@@ -0,0 +1,49 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+
+
+def fusionar_categorias(
+    db: Session,
+    usuario_id: str,
+    origenes: list[int],
+    destino: int
+) -> int:
+    """
+    Ejecuta la función SQL fn_fusionar_categorias.
+
+    Reasignación de movimientos (un solo UPDATE), ajuste del resumen
+    mensual y eliminación de las categorías origen ocurren en
+    PostgreSQL en una sola llamada y una sola transacción.
+
+    Retorna la cantidad de movimientos reasignados.
+    """
+    sql = text("""
+        SELECT finanzas.fn_fusionar_categorias(
+            :usuario_id,
+            CAST(:origenes AS INT[]),
+            :destino
+        )
+    """)
+
+    try:
+        movidos = db.execute(
+            sql,
+            {
+                "usuario_id": usuario_id,
+                "origenes": origenes,
+                "destino": destino
+            }
+        ).scalar_one()
+        db.commit()
+
+    except DBAPIError as e:
+        db.rollback()
+
+        # 🔐 RAISE EXCEPTION de la función → error de validación
+        if getattr(e.orig, "sqlstate", None) == "P0001":
+            raise ValueError(e.orig.diag.message_primary) from e
+
+        raise RuntimeError("Error al fusionar las categorías") from e
+
+    return movidos
@@ -0,0 +1,42 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+
+
+def movimientos_recientes(db: Session, usuario_id: str, limite: int):
+    """
+    Obtiene los últimos `limite` movimientos del usuario, en el mismo
+    orden que el listado de flujo (fecha descendente y luego ID).
+    """
+    sql = text("""
+        SELECT
+            id, fecha, descripcion, categoria_id, cuenta_id,
+            tipo_movimiento, tipo_egreso, estado, monto, transferencia_id
+        FROM finanzas.flujo
+        WHERE usuario_id = :uid
+        ORDER BY fecha DESC, id DESC
+        LIMIT :limite
+    """)
+
+    result = db.execute(sql, {"uid": usuario_id, "limite": limite})
+
+    return result.mappings().all()
+
+
+def transferencias_recientes(db: Session, usuario_id: str, limite: int):
+    """
+    Obtiene las últimas `limite` transferencias del usuario, en el mismo
+    orden que el listado de transferencias.
+    """
+    sql = text("""
+        SELECT
+            id, cuenta_origen_id, cuenta_destino_id, monto,
+            descripcion, estado, created_at
+        FROM finanzas.transferencias
+        WHERE usuario_id = :uid
+        ORDER BY created_at DESC, id DESC
+        LIMIT :limite
+    """)
+
+    result = db.execute(sql, {"uid": usuario_id, "limite": limite})
+
+    return result.mappings().all()
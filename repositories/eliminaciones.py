@@ -0,0 +1,188 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+
+
+_COLUMNAS = """
+    id, usuario_id, entidad, entidad_id, estado, fase,
+    total, eliminados, error, creada, actualizada, finalizada
+"""
+
+
+def crear_eliminacion(
+    db: Session,
+    usuario_id: str,
+    entidad: str,
+    entidad_id: str
+) -> dict:
+    """
+    Registra una eliminación pendiente de la entidad ('cuenta' o
+    'usuario'). Si ya hay una activa para la misma entidad la retorna
+    en lugar de crear otra (una sola por entidad).
+
+    Al eliminar un usuario se revocan además sus refresh tokens en la
+    misma transacción: la sesión no se puede renovar mientras espera.
+    """
+    sql = text(f"""
+        INSERT INTO finanzas.eliminaciones (usuario_id, entidad, entidad_id)
+        VALUES (:uid, :entidad, :entidad_id)
+        ON CONFLICT (entidad, entidad_id)
+            WHERE estado IN ('pendiente', 'en_curso')
+        DO NOTHING
+        RETURNING {_COLUMNAS}
+    """)
+
+    params = {"uid": usuario_id, "entidad": entidad, "entidad_id": entidad_id}
+
+    fila = db.execute(sql, params).mappings().first()
+
+    if fila is None:
+        fila = db.execute(
+            text(f"""
+                SELECT {_COLUMNAS}
+                FROM finanzas.eliminaciones
+                WHERE entidad = :entidad
+                  AND entidad_id = :entidad_id
+                  AND estado IN ('pendiente', 'en_curso')
+            """),
+            params
+        ).mappings().one()
+
+    if entidad == "usuario":
+        db.execute(
+            text("DELETE FROM finanzas.refresh_tokens WHERE usuario_id = :uid"),
+            {"uid": usuario_id}
+        )
+
+    db.commit()
+
+    return dict(fila)
+
+
+def obtener_eliminacion(
+    db: Session,
+    usuario_id: str,
+    eliminacion_id: int
+) -> dict | None:
+    """
+    Estado de una eliminación del usuario (None si no existe o es
+    de otro usuario).
+    """
+    sql = text(f"""
+        SELECT {_COLUMNAS}
+        FROM finanzas.eliminaciones
+        WHERE id = :id
+          AND usuario_id = :uid
+    """)
+
+    fila = db.execute(
+        sql, {"id": eliminacion_id, "uid": usuario_id}
+    ).mappings().first()
+
+    return dict(fila) if fila else None
+
+
+def cuenta_tiene_movimientos(db: Session, cuenta_id: int) -> bool:
+    """
+    True si algún movimiento (incluidos los de transferencias)
+    referencia la cuenta.
+    """
+    sql = text("""
+        SELECT EXISTS (
+            SELECT 1 FROM finanzas.flujo WHERE cuenta_id = :id
+        )
+    """)
+
+    return db.execute(sql, {"id": cuenta_id}).scalar_one()
+
+
+def usuario_en_eliminacion(db: Session, usuario_id: str) -> bool:
+    """
+    True si el usuario tiene una eliminación de su cuenta de usuario
+    pendiente o en curso.
+    """
+    sql = text("""
+        SELECT EXISTS (
+            SELECT 1
+            FROM finanzas.eliminaciones
+            WHERE entidad = 'usuario'
+              AND entidad_id = :uid
+              AND estado IN ('pendiente', 'en_curso')
+        )
+    """)
+
+    return db.execute(sql, {"uid": usuario_id}).scalar_one()
+
+
+def tomar_eliminacion(db: Session, abandono: int) -> dict | None:
+    """
+    Toma la eliminación pendiente más antigua (o una en curso sin
+    progreso hace más de `abandono` segundos: su worker murió) y la
+    marca en curso.
+
+    Usa FOR UPDATE SKIP LOCKED: varios workers pueden tomar trabajos
+    en paralelo sin bloquearse ni repetir el mismo.
+    """
+    sql = text(f"""
+        UPDATE finanzas.eliminaciones
+        SET estado = 'en_curso',
+            actualizada = now()
+        WHERE id = (
+            SELECT id
+            FROM finanzas.eliminaciones
+            WHERE estado = 'pendiente'
+               OR (estado = 'en_curso'
+                   AND actualizada < now() - make_interval(secs => :abandono))
+            ORDER BY id
+            LIMIT 1
+            FOR UPDATE SKIP LOCKED
+        )
+        RETURNING {_COLUMNAS}
+    """)
+
+    fila = db.execute(sql, {"abandono": abandono}).mappings().first()
+    db.commit()
+
+    return dict(fila) if fila else None
+
+
+def ejecutar_lote(db: Session, eliminacion_id: int, lote: int) -> int:
+    """
+    Ejecuta un lote de la eliminación (finanzas.fn_eliminar_lote) en
+    su propia transacción.
+
+    Retorna las filas eliminadas; 0 significa que terminó.
+    """
+    sql = text("""
+        SELECT finanzas.fn_eliminar_lote(:id, :lote)
+    """)
+
+    try:
+        eliminados = db.execute(
+            sql, {"id": eliminacion_id, "lote": lote}
+        ).scalar_one()
+        db.commit()
+
+    except Exception:
+        db.rollback()
+        raise
+
+    return eliminados
+
+
+def marcar_fallida(db: Session, eliminacion_id: int, error: str) -> None:
+    """
+    Marca la eliminación como fallida. Lo ya eliminado no se revierte
+    (cada lote se confirmó por separado).
+    """
+    db.execute(
+        text("""
+            UPDATE finanzas.eliminaciones
+            SET estado = 'fallida',
+                error = :error,
+                actualizada = now(),
+                finalizada = now()
+            WHERE id = :id
+        """),
+        {"id": eliminacion_id, "error": error}
+    )
+    db.commit()
@@ -0,0 +1,100 @@
+from typing import Iterator
+
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+
+
+# Archivos CSV de la exportación: nombre → consulta (columnas en orden)
+_CONSULTAS_EXPORTACION = {
+    "cuentas": """
+        SELECT id, nombre
+        FROM finanzas.cuentas
+        WHERE usuario_id = :uid
+        ORDER BY id
+    """,
+    "categorias": """
+        SELECT id, nombre, tipo_movimiento
+        FROM finanzas.categorias
+        WHERE usuario_id = :uid
+        ORDER BY id
+    """,
+    "flujo": """
+        SELECT
+            id, fecha, descripcion, categoria_id, cuenta_id,
+            tipo_movimiento, tipo_egreso, estado, monto, transferencia_id
+        FROM finanzas.flujo
+        WHERE usuario_id = :uid
+        ORDER BY id
+    """,
+    "transferencias": """
+        SELECT
+            id, cuenta_origen_id, cuenta_destino_id, monto,
+            descripcion, estado, created_at
+        FROM finanzas.transferencias
+        WHERE usuario_id = :uid
+        ORDER BY id
+    """,
+    "auditoria": """
+        SELECT
+            id, fecha, metodo, ruta, status_code, ip, error,
+            duracion_ms, firma, firma_anterior
+        FROM finanzas.auditoria
+        WHERE usuario_id = :uid
+        ORDER BY id
+    """,
+}
+
+ARCHIVOS_EXPORTACION = tuple(_CONSULTAS_EXPORTACION)
+
+
+def iniciar_snapshot(db: Session) -> None:
+    """
+    Abre la transacción de la exportación en REPEATABLE READ de solo
+    lectura: todos los archivos reflejan el mismo instante aunque el
+    usuario siga escribiendo mientras se descarga.
+    """
+    db.connection(
+        execution_options={
+            "isolation_level": "REPEATABLE READ",
+            "postgresql_readonly": True
+        }
+    )
+
+
+def perfil_usuario(db: Session, usuario_id: str) -> dict | None:
+    """
+    Datos de perfil del usuario (sin contraseña).
+    """
+    sql = text("""
+        SELECT id, nombre, apellido, correo, telefono, verificado, fecha_registro
+        FROM finanzas.usuarios
+        WHERE id = :uid
+    """)
+
+    fila = db.execute(sql, {"uid": usuario_id}).mappings().first()
+
+    return dict(fila) if fila else None
+
+
+def filas_exportacion(
+    db: Session,
+    archivo: str,
+    usuario_id: str,
+    lote: int
+) -> tuple[list[str], Iterator]:
+    """
+    Retorna (columnas, lotes de filas) de un archivo de la exportación.
+
+    Usa un cursor del lado del servidor (stream_results): PostgreSQL
+    entrega `lote` filas por vez y la memoria no depende del tamaño
+    del historial.
+    """
+    resultado = db.execute(
+        text(_CONSULTAS_EXPORTACION[archivo]).execution_options(
+            stream_results=True,
+            yield_per=lote
+        ),
+        {"uid": usuario_id}
+    )
+
+    return list(resultado.keys()), resultado.partitions(lote)
@@ -0,0 +1,107 @@
+from sqlalchemy import (
+    Float, Numeric, Text, bindparam, cast, column, exists, select, table
+)
+from sqlalchemy.orm import Session
+
+from models.flujo import Flujo
+from models.transferencia import Transferencia
+from models.cuenta import Cuenta
+from models.categoria import Categoria
+from schemas.flujo import FlujoOut
+from schemas.transferencia import TransferenciaOut
+from schemas.cuenta import CuentaOut
+from schemas.categoria import CategoriaOut
+
+
+# =====================================================
+# Listados proyectados (Core, sin entidades ORM)
+# =====================================================
+# Cada SELECT trae solo las columnas del response_model, en el orden
+# de sus campos, para que core.respuestas.FilasJSON arme el JSON
+# directo desde las tuplas. Los montos numeric(14,2) se leen como
+# float8 (exacto para 14 dígitos) y se evita construir un Decimal
+# por fila.
+def _proyeccion(entidad, modelo) -> list:
+    columnas = []
+
+    for campo in modelo.model_fields:
+        columna = entidad.__table__.c[campo]
+
+        if isinstance(columna.type, Numeric):
+            columna = cast(columna, Float).label(campo)
+
+        columnas.append(columna)
+
+    return columnas
+
+
+_SQL_FLUJO = (
+    select(*_proyeccion(Flujo, FlujoOut))
+    .where(Flujo.usuario_id == bindparam("uid"))
+    .order_by(Flujo.fecha.desc(), Flujo.id.desc())
+)
+
+_SQL_TRANSFERENCIAS = (
+    select(*_proyeccion(Transferencia, TransferenciaOut))
+    .where(Transferencia.usuario_id == bindparam("uid"))
+    .order_by(Transferencia.created_at.desc(), Transferencia.id.desc())
+)
+
+# Cuentas con una eliminación pendiente o en curso (ver
+# repositories.eliminaciones): se ocultan del listado
+_eliminaciones = table(
+    "eliminaciones",
+    column("entidad"),
+    column("entidad_id", Text),
+    column("estado")
+)
+
+_EN_ELIMINACION = exists().where(
+    _eliminaciones.c.entidad == "cuenta",
+    _eliminaciones.c.entidad_id == cast(Cuenta.id, Text),
+    _eliminaciones.c.estado.in_(("pendiente", "en_curso"))
+)
+
+_SQL_CUENTAS = (
+    select(*_proyeccion(Cuenta, CuentaOut))
+    .where(Cuenta.usuario_id == bindparam("uid"), ~_EN_ELIMINACION)
+    .order_by(Cuenta.nombre)
+)
+
+_SQL_CATEGORIAS = (
+    select(*_proyeccion(Categoria, CategoriaOut))
+    .where(Categoria.usuario_id == bindparam("uid"))
+    .order_by(Categoria.nombre)
+)
+
+
+def filas_flujo(db: Session, usuario_id: str):
+    """
+    Movimientos del usuario como tuplas en el orden de FlujoOut
+    (fecha descendente y luego ID).
+    """
+    return db.execute(_SQL_FLUJO, {"uid": usuario_id}).all()
+
+
+def filas_transferencias(db: Session, usuario_id: str):
+    """
+    Transferencias del usuario como tuplas en el orden de
+    TransferenciaOut (más recientes primero).
+    """
+    return db.execute(_SQL_TRANSFERENCIAS, {"uid": usuario_id}).all()
+
+
+def filas_cuentas(db: Session, usuario_id: str):
+    """
+    Cuentas del usuario como tuplas en el orden de CuentaOut
+    (alfabético por nombre).
+    """
+    return db.execute(_SQL_CUENTAS, {"uid": usuario_id}).all()
+
+
+def filas_categorias(db: Session, usuario_id: str):
+    """
+    Categorías del usuario como tuplas en el orden de CategoriaOut
+    (alfabético por nombre).
+    """
+    return db.execute(_SQL_CATEGORIAS, {"uid": usuario_id}).all()
@@ -0,0 +1,44 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+
+
+def referencias_usuario(db: Session, usuario_id: str) -> dict:
+    """
+    Obtiene, en una sola consulta, los ids de las cuentas del usuario y
+    el tipo de movimiento de cada una de sus categorías.
+
+    Las cuentas marcadas para eliminar no se incluyen: ninguna
+    escritura nueva puede referenciarlas.
+
+    Retorna {"cuentas": [id, ...], "categorias": [[id, tipo], ...]}
+    (serializable tal cual para el cache).
+    """
+    sql = text("""
+        SELECT 'cuenta' AS entidad, c.id, NULL AS tipo
+        FROM finanzas.cuentas c
+        WHERE c.usuario_id = :uid
+          AND NOT EXISTS (
+              SELECT 1
+              FROM finanzas.eliminaciones e
+              WHERE e.entidad = 'cuenta'
+                AND e.entidad_id = c.id::text
+                AND e.estado IN ('pendiente', 'en_curso')
+          )
+
+        UNION ALL
+
+        SELECT 'categoria', id, tipo_movimiento::text
+        FROM finanzas.categorias
+        WHERE usuario_id = :uid
+    """)
+
+    cuentas = []
+    categorias = []
+
+    for entidad, id_, tipo in db.execute(sql, {"uid": usuario_id}):
+        if entidad == "cuenta":
+            cuentas.append(id_)
+        else:
+            categorias.append([id_, tipo])
+
+    return {"cuentas": cuentas, "categorias": categorias}
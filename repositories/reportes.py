@@ -0,0 +1,81 @@
+from datetime import date
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+
+
+def resumen_categorias(
+    db: Session,
+    usuario_id: str,
+    mes_inicio: date,
+    mes_fin: date
+):
+    """
+    Obtiene los totales mensuales por categoría del usuario.
+
+    Lee directamente la tabla de resumen mantenida por trigger
+    (resumen_categoria_mensual), por lo que el costo depende del
+    número de meses × categorías y no del número de movimientos.
+
+    Internamente ejecuta la función:
+        finanzas.fn_resumen_categorias(uid, mes_inicio, mes_fin)
+    """
+    if mes_inicio > mes_fin:
+        raise ValueError(
+            "La fecha inicial no puede ser mayor que la fecha final"
+        )
+
+    sql = text("""
+        SELECT
+            mes,
+            categoria_id,
+            categoria,
+            tipo_movimiento,
+            tipo_egreso,
+            estado,
+            total,
+            cantidad
+        FROM finanzas.fn_resumen_categorias(
+            :uid,
+            :mes_inicio,
+            :mes_fin
+        )
+    """)
+
+    try:
+        result = db.execute(
+            sql,
+            {
+                "uid": usuario_id,
+                "mes_inicio": mes_inicio,
+                "mes_fin": mes_fin
+            }
+        )
+
+        return result.mappings().all()
+
+    except DBAPIError as e:
+        raise ValueError(
+            "Error al consultar el resumen por categoría. "
+            "Verifique los parámetros enviados."
+        ) from e
+
+
+def reconstruir_resumen_categorias(
+    db: Session,
+    usuario_id: str | None = None
+) -> int:
+    """
+    Reconstruye desde cero el resumen mensual por categoría.
+
+    Si no se indica usuario, se reconstruye el de todos los usuarios.
+    Retorna el número de filas generadas.
+    """
+    sql = text("""
+        SELECT finanzas.fn_reconstruir_resumen_categoria(:uid)
+    """)
+
+    filas = db.execute(sql, {"uid": usuario_id}).scalar_one()
+    db.commit()
+
+    return filas
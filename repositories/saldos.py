@@ -50,6 +50,46 @@ def saldo_por_cuenta(db: Session, usuario_id: str):
     return filas
 
 
+def saldo_por_cuenta_con_secuencia(db: Session, usuario_id: str):
+    """
+    Obtiene el saldo actual de cada cuenta junto con la secuencia de
+    cambios del usuario (finanzas.sync_secuencia), leídos en la misma
+    sentencia y por lo tanto en el mismo snapshot.
+
+    La secuencia identifica exactamente qué escrituras incluyen los
+    saldos; el cache de saldos la usa como versión.
+
+    Retorna (filas, secuencia).
+    """
+
+    sql = text("""
+        SELECT
+            q.seq,
+            s.cuenta_id,
+            s.cuenta,
+            s.saldo
+        FROM (
+            SELECT COALESCE(MAX(ultima), 0) AS seq
+            FROM finanzas.sync_secuencia
+            WHERE usuario_id = :uid
+        ) q
+        LEFT JOIN finanzas.fn_saldo_por_cuenta(:uid) s ON TRUE
+        ORDER BY s.cuenta
+    """).columns(
+        seq=Integer,
+        cuenta_id=Integer,
+        cuenta=String,
+        saldo=Numeric
+    )
+
+    filas = db.execute(sql, {"uid": usuario_id}).mappings().all()
+
+    secuencia = filas[0]["seq"]
+    saldos = [fila for fila in filas if fila["cuenta_id"] is not None]
+
+    return saldos, secuencia
+
+
 def saldo_rango(
     db: Session,
     usuario_id: str,
@@ -121,7 +161,55 @@ def saldo_rango(
         }
         for row in rows
     ]
-    
+
+
+def saldo_a_fecha(
+    db: Session,
+    usuario_id: str,
+    fecha: date
+):
+    """
+    Obtiene el saldo de cierre de cada cuenta a una fecha dada.
+
+    Cada saldo es una sola búsqueda en los snapshots diarios
+    (finanzas.fn_saldo_a_fecha), sin recorrer movimientos.
+    """
+    if not usuario_id or not usuario_id.strip():
+        raise ValueError("El usuario_id es obligatorio")
+
+    if fecha is None:
+        raise ValueError("La fecha no puede ser nula")
+
+    sql = text("""
+        SELECT
+            cuenta_id,
+            cuenta,
+            saldo
+        FROM finanzas.fn_saldo_a_fecha(:uid, :fecha)
+    """)
+
+    try:
+        rows = db.execute(
+            sql,
+            {"uid": usuario_id, "fecha": fecha}
+        ).fetchall()
+
+    except DBAPIError as e:
+        raise ValueError(
+            "Error al calcular el saldo a la fecha. "
+            "Verifique los parámetros enviados."
+        ) from e
+
+    return [
+        {
+            "cuenta_id": row.cuenta_id,
+            "cuenta": row.cuenta,
+            "saldo": float(row.saldo)
+        }
+        for row in rows
+    ]
+
+
 def reajustar_saldo_cuenta(
     db: Session,
     usuario_id: str,
@@ -167,4 +255,161 @@ def reajustar_saldo_cuenta(
     except DBAPIError as e:
         raise ValueError(
             "No fue posible reajustar el saldo de la cuenta"
-        ) from e
\ No newline at end of file
+        ) from e
+
+def saldo_de_cuenta(
+    db: Session,
+    usuario_id: str,
+    cuenta_id: int
+) -> Decimal | None:
+    """
+    Obtiene el saldo materializado de una sola cuenta del usuario.
+
+    Retorna None si la cuenta no existe o no pertenece al usuario.
+    """
+    sql = text("""
+        SELECT COALESCE(s.saldo, 0) AS saldo
+        FROM finanzas.cuentas c
+        LEFT JOIN finanzas.saldo_cuenta s
+            ON s.cuenta_id = c.id
+        WHERE c.id = :cuenta_id
+          AND c.usuario_id = :uid
+    """)
+
+    return db.execute(
+        sql,
+        {"uid": usuario_id, "cuenta_id": cuenta_id}
+    ).scalar_one_or_none()
+
+
+def verificar_saldos(
+    db: Session,
+    usuario_id: str | None = None
+):
+    """
+    Recalcula los saldos desde flujo y los compara con saldo_cuenta.
+
+    Retorna solo las cuentas con diferencias (drift).
+    """
+    sql = text("""
+        SELECT
+            cuenta_id,
+            usuario_id,
+            saldo_materializado,
+            saldo_calculado,
+            diferencia
+        FROM finanzas.fn_verificar_saldo_cuenta(:uid)
+    """)
+
+    return db.execute(sql, {"uid": usuario_id}).mappings().all()
+
+
+def reconstruir_saldos(
+    db: Session,
+    usuario_id: str | None = None
+) -> int:
+    """
+    Reconstruye saldo_cuenta desde flujo.
+
+    Retorna el número de cuentas corregidas.
+    """
+    sql = text("""
+        SELECT finanzas.fn_reconstruir_saldo_cuenta(:uid)
+    """)
+
+    filas = db.execute(sql, {"uid": usuario_id}).scalar_one()
+    db.commit()
+
+    return filas
+
+
+def verificar_saldos_diarios(
+    db: Session,
+    usuario_id: str | None = None
+):
+    """
+    Recalcula los snapshots diarios desde flujo y los compara
+    con saldo_diario. Retorna solo los días con diferencias.
+    """
+    sql = text("""
+        SELECT
+            cuenta_id,
+            fecha,
+            saldo_cierre,
+            saldo_calculado
+        FROM finanzas.fn_verificar_saldo_diario(:uid)
+    """)
+
+    return db.execute(sql, {"uid": usuario_id}).mappings().all()
+
+
+def reconstruir_saldos_diarios(
+    db: Session,
+    usuario_id: str | None = None
+) -> int:
+    """
+    Reconstruye saldo_diario desde flujo.
+
+    Retorna el número de snapshots generados.
+    """
+    sql = text("""
+        SELECT finanzas.fn_reconstruir_saldo_diario(:uid)
+    """)
+
+    filas = db.execute(sql, {"uid": usuario_id}).scalar_one()
+    db.commit()
+
+    return filas
+
+
+def saldo_historial(
+    db: Session,
+    usuario_id: str,
+    fecha_inicio: date,
+    fecha_fin: date,
+    intervalo: str
+):
+    """
+    Obtiene la serie temporal de saldos por cuenta, agrupada por
+    periodo (dia | semana | mes).
+
+    Una sola consulta: finanzas.fn_saldo_historial calcula el saldo
+    de cierre de cada periodo con una suma acumulada (ventana) sobre
+    los deltas diarios.
+    """
+    if not usuario_id or not usuario_id.strip():
+        raise ValueError("El usuario_id es obligatorio")
+
+    sql = text("""
+        SELECT
+            cuenta_id,
+            cuenta,
+            periodo,
+            saldo
+        FROM finanzas.fn_saldo_historial(
+            :uid,
+            :fecha_inicio,
+            :fecha_fin,
+            :intervalo
+        )
+    """)
+
+    try:
+        rows = db.execute(
+            sql,
+            {
+                "uid": usuario_id,
+                "fecha_inicio": fecha_inicio,
+                "fecha_fin": fecha_fin,
+                "intervalo": intervalo
+            }
+        ).fetchall()
+
+    except DBAPIError as e:
+        raise ValueError(
+            "Error al calcular el historial de saldos. "
+            "Verifique los parámetros enviados."
+        ) from e
+
+    return rows
+
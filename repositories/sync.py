@@ -0,0 +1,121 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+
+
+# Columnas expuestas por entidad (mismo contrato que los endpoints de listado)
+_CONSULTAS_ENTIDAD = {
+    "flujo": """
+        SELECT
+            id, fecha, descripcion, categoria_id, cuenta_id,
+            tipo_movimiento, tipo_egreso, estado, monto, transferencia_id
+        FROM finanzas.flujo
+        WHERE usuario_id = :uid
+    """,
+    "transferencia": """
+        SELECT
+            id, cuenta_origen_id, cuenta_destino_id, monto,
+            descripcion, estado, created_at
+        FROM finanzas.transferencias
+        WHERE usuario_id = :uid
+    """,
+    "cuenta": """
+        SELECT id, nombre
+        FROM finanzas.cuentas
+        WHERE usuario_id = :uid
+    """,
+    "categoria": """
+        SELECT id, nombre, tipo_movimiento
+        FROM finanzas.categorias
+        WHERE usuario_id = :uid
+    """,
+}
+
+ENTIDADES_SYNC = tuple(_CONSULTAS_ENTIDAD)
+
+
+def estado_secuencia(db: Session, usuario_id: str) -> tuple[int, int]:
+    """
+    Retorna (ultima, minima) de la secuencia de cambios del usuario.
+
+    Un usuario sin cambios registrados tiene secuencia (0, 0).
+    """
+    sql = text("""
+        SELECT ultima, minima
+        FROM finanzas.sync_secuencia
+        WHERE usuario_id = :uid
+    """)
+
+    row = db.execute(sql, {"uid": usuario_id}).first()
+
+    if row is None:
+        return 0, 0
+
+    return row.ultima, row.minima
+
+
+def cambios_desde(
+    db: Session,
+    usuario_id: str,
+    desde: int,
+    hasta: int
+):
+    """
+    Obtiene el último cambio de cada entidad en el intervalo (desde, hasta].
+
+    Varias modificaciones de una misma entidad se colapsan en una sola
+    entrada: la más reciente (upsert o tombstone).
+    """
+    sql = text("""
+        SELECT DISTINCT ON (entidad, entidad_id)
+            entidad,
+            entidad_id,
+            eliminado
+        FROM finanzas.sync_cambios
+        WHERE usuario_id = :uid
+          AND seq > :desde
+          AND seq <= :hasta
+        ORDER BY entidad, entidad_id, seq DESC
+    """)
+
+    return db.execute(
+        sql,
+        {"uid": usuario_id, "desde": desde, "hasta": hasta}
+    ).all()
+
+
+def entidades_usuario(
+    db: Session,
+    usuario_id: str,
+    entidad: str,
+    ids: list[int] | None = None
+):
+    """
+    Obtiene el estado actual de las entidades del usuario.
+
+    Si ids es None se retornan todas (sincronización completa).
+    """
+    sql = _CONSULTAS_ENTIDAD[entidad]
+    params: dict = {"uid": usuario_id}
+
+    if ids is not None:
+        sql += " AND id = ANY(:ids)"
+        params["ids"] = ids
+
+    return db.execute(text(sql + " ORDER BY id"), params).mappings().all()
+
+
+def compactar_cambios(db: Session, retencion_dias: int) -> int:
+    """
+    Compacta el log de cambios.
+
+    Elimina entradas superadas y las anteriores a la retención.
+    Retorna el número de filas afectadas.
+    """
+    sql = text("""
+        SELECT finanzas.fn_compactar_sync(make_interval(days => :dias))
+    """)
+
+    filas = db.execute(sql, {"dias": retencion_dias}).scalar_one()
+    db.commit()
+
+    return filas
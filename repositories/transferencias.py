@@ -0,0 +1,57 @@
+from decimal import Decimal
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+
+
+def crear_transferencia(
+    db: Session,
+    usuario_id: str,
+    cuenta_origen_id: int,
+    cuenta_destino_id: int,
+    monto: Decimal,
+    descripcion: str | None = None
+) -> dict:
+    """
+    Ejecuta la función SQL fn_crear_transferencia.
+
+    Validación (propiedad, saldo, categorías), lock de saldos e
+    inserción de la transferencia y sus dos flujos ocurren en
+    PostgreSQL en una sola llamada.
+
+    Retorna la transferencia creada.
+    """
+    sql = text("""
+        SELECT *
+        FROM finanzas.fn_crear_transferencia(
+            :usuario_id,
+            :cuenta_origen_id,
+            :cuenta_destino_id,
+            :monto,
+            :descripcion
+        )
+    """)
+
+    try:
+        row = db.execute(
+            sql,
+            {
+                "usuario_id": usuario_id,
+                "cuenta_origen_id": cuenta_origen_id,
+                "cuenta_destino_id": cuenta_destino_id,
+                "monto": monto,
+                "descripcion": descripcion
+            }
+        ).mappings().one()
+        db.commit()
+
+    except DBAPIError as e:
+        db.rollback()
+
+        # 🔐 RAISE EXCEPTION de la función → error de validación
+        if getattr(e.orig, "sqlstate", None) == "P0001":
+            raise ValueError(e.orig.diag.message_primary) from e
+
+        raise RuntimeError("Error al crear la transferencia") from e
+
+    return dict(row)
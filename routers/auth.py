@@ -6,6 +6,7 @@ from models.usuario import Usuario
 from models.refresh_token import RefreshToken
 from schemas.auth import LoginRequest, TokenResponse, RefreshRequest, LogoutRequest
 from security_tokens import verify_password, create_access_token, create_refresh_token
+from repositories.eliminaciones import usuario_en_eliminacion
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
@@ -35,6 +36,8 @@ def login(data: LoginRequest):
     -------
     401 Unauthorized
         Si las credenciales son inválidas.
+    403 Forbidden
+        Si el usuario se está eliminando.
     """
     db = SessionLocal()
     user = db.query(Usuario).filter(Usuario.correo == data.correo).first()
@@ -42,6 +45,10 @@ def login(data: LoginRequest):
     if not user or not verify_password(data.password, user.password): # type: ignore
         raise HTTPException(status_code=401, detail="Credenciales inválidas")
 
+    # 🗑 Eliminación en curso (DELETE /usuarios/me)
+    if usuario_en_eliminacion(db, user.id): # type: ignore
+        raise HTTPException(status_code=403, detail="El usuario se está eliminando")
+
     access = create_access_token(user.id, user.rol) # type: ignore
     refresh, exp = create_refresh_token(user.id) # type: ignore
 
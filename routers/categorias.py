@@ -2,21 +2,35 @@ from fastapi import APIRouter, Depends, Security, HTTPException
 from sqlalchemy.orm import Session
 
 from models.categoria import Categoria, TipoMovimientoEnum
-from schemas.categoria import CategoriaCreate, CategoriaUpdate, CategoriaOut
-from dependencies import get_current_user, CurrentUser, get_db
+from schemas.categoria import (
+    CategoriaCreate,
+    CategoriaUpdate,
+    CategoriaOut,
+    CategoriaFusion,
+    CategoriaFusionOut
+)
+from services.categorias import fusionar_categorias as fusionar_categorias_db
+from dependencies import get_current_user, get_active_user, CurrentUser, get_db
+from repositories.listados import filas_categorias
+
+from core.endpoints import cacheado, invalida
+from core.respuestas import FilasJSON
 
 router = APIRouter(
     prefix="/categorias",
     tags=["Categorias"]
 )
 
+categorias_json = FilasJSON(CategoriaOut)
+
 # =========================================================
 # CREAR CATEGORÍA
 # =========================================================
 @router.post("/", response_model=CategoriaOut)
+@invalida("categorias", "resumen", "propiedad")
 def crear_categoria(
         data: CategoriaCreate,
-        user: CurrentUser = Security(get_current_user),
+        user: CurrentUser = Security(get_active_user),
         db: Session = Depends(get_db)
     ):
     """
@@ -45,6 +59,7 @@ def crear_categoria(
     db.add(categoria)
     db.commit()
     db.refresh(categoria)
+
     return categoria
 
 
@@ -52,6 +67,7 @@ def crear_categoria(
 # LISTAR CATEGORÍAS DEL USUARIO
 # =========================================================
 @router.get("/", response_model=list[CategoriaOut])
+@cacheado("categorias", "list", list[CategoriaOut])
 def listar_categorias(
         user: CurrentUser = Security(get_current_user),
         db: Session = Depends(get_db)
@@ -60,23 +76,21 @@ def listar_categorias(
     Lista todas las categorías pertenecientes al usuario autenticado.
 
     Las categorías se retornan ordenadas alfabéticamente por nombre.
+    Resultado cacheado (tag "categorias"), con soporte de ETag; en un
+    miss se leen solo las columnas de CategoriaOut.
     """
-    return (
-        db.query(Categoria)
-        .filter(Categoria.usuario_id == user.id)
-        .order_by(Categoria.nombre)
-        .all()
-    )
+    return categorias_json(filas_categorias(db, user.id))
 
 
 # =========================================================
 # ACTUALIZAR CATEGORÍA
 # =========================================================
 @router.put("/{categoria_id}", response_model=CategoriaOut)
+@invalida("categorias", "resumen", "propiedad")
 def actualizar_categoria(
         categoria_id: int,
         data: CategoriaUpdate,
-        user: CurrentUser = Security(get_current_user),
+        user: CurrentUser = Security(get_active_user),
         db: Session = Depends(get_db)
     ):
     """
@@ -105,6 +119,7 @@ def actualizar_categoria(
 
     db.commit()
     db.refresh(categoria)
+
     return categoria
 
 
@@ -112,9 +127,10 @@ def actualizar_categoria(
 # ELIMINAR CATEGORÍA
 # =========================================================
 @router.delete("/{categoria_id}")
+@invalida("categorias", "resumen", "propiedad")
 def eliminar_categoria(
         categoria_id: int,
-        user: CurrentUser = Security(get_current_user),
+        user: CurrentUser = Security(get_active_user),
         db: Session = Depends(get_db)
     ):
     """
@@ -135,3 +151,46 @@ def eliminar_categoria(
     db.commit()
 
     return {"detail": "Categoría eliminada correctamente"}
+
+
+# =========================================================
+# FUSIONAR CATEGORÍAS
+# =========================================================
+@router.post("/fusionar", response_model=CategoriaFusionOut)
+@invalida("categorias", "resumen", "propiedad", "flujo")
+def fusionar_categorias(
+        data: CategoriaFusion,
+        user: CurrentUser = Security(get_active_user),
+        db: Session = Depends(get_db)
+    ):
+    """
+    Fusiona categorías duplicadas: todos los movimientos de las
+    categorías `origenes` pasan a `destino` y las origen se eliminan.
+
+    Se resuelve con un solo UPDATE en PostgreSQL (sin importar cuántos
+    movimientos tengan), ajustando el resumen mensual en bloque, en
+    una transacción. Las categorías deben ser del usuario y del mismo
+    tipo de movimiento.
+
+    Errores:
+    -------
+    400 Bad Request
+        Si alguna categoría no existe, no pertenece al usuario o es de
+        otro tipo de movimiento.
+    """
+    try:
+        movidos = fusionar_categorias_db(
+            db, user.id, data.origenes, data.destino
+        )
+
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    except RuntimeError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return {
+        "destino": data.destino,
+        "categorias_eliminadas": list(dict.fromkeys(data.origenes)),
+        "movimientos_reasignados": movidos
+    }
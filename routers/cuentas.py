@@ -1,22 +1,31 @@
-from fastapi import APIRouter, Depends, Security, HTTPException
+from fastapi import APIRouter, Depends, Security, HTTPException, Response, status
 from sqlalchemy.orm import Session
 
 from schemas.cuenta import CuentaCreate, CuentaUpdate, CuentaOut
+from schemas.eliminacion import EliminacionOut
 from models.cuenta import Cuenta
-from dependencies import get_db, get_current_user, CurrentUser
+from dependencies import get_db, get_current_user, get_active_user, CurrentUser
+from repositories.listados import filas_cuentas
+from services.eliminaciones_service import eliminar_cuenta as eliminar_cuenta_service
+
+from core.endpoints import cacheado, invalida
+from core.respuestas import FilasJSON
 
 router = APIRouter(
     prefix="/cuentas",
     tags=["Cuentas"]
 )
 
+cuentas_json = FilasJSON(CuentaOut)
+
 # =========================================================
 # CREAR CUENTA
 # =========================================================
 @router.post("/", response_model=CuentaOut)
+@invalida("cuentas", "saldos", "historial", "propiedad")
 def crear_cuenta(
         data: CuentaCreate,
-        user: CurrentUser = Security(get_current_user),
+        user: CurrentUser = Security(get_active_user),
         db: Session = Depends(get_db)
     ):
     """
@@ -44,6 +53,7 @@ def crear_cuenta(
     db.add(cuenta)
     db.commit()
     db.refresh(cuenta)
+
     return cuenta
 
 
@@ -51,6 +61,7 @@ def crear_cuenta(
 # LISTAR CUENTAS DEL USUARIO
 # =========================================================
 @router.get("/", response_model=list[CuentaOut])
+@cacheado("cuentas", "list", list[CuentaOut])
 def listar_cuentas(
         user: CurrentUser = Security(get_current_user),
         db: Session = Depends(get_db)
@@ -58,24 +69,22 @@ def listar_cuentas(
     """
     Lista todas las cuentas del usuario autenticado.
 
-    Se ordenan alfabéticamente por nombre.
+    Se ordenan alfabéticamente por nombre. Resultado cacheado
+    (tag "cuentas"), con soporte de ETag; en un miss se leen solo
+    las columnas de CuentaOut.
     """
-    return (
-        db.query(Cuenta)
-        .filter(Cuenta.usuario_id == user.id)
-        .order_by(Cuenta.nombre)
-        .all()
-    )
+    return cuentas_json(filas_cuentas(db, user.id))
 
 
 # =========================================================
 # ACTUALIZAR CUENTA
 # =========================================================
 @router.put("/{cuenta_id}", response_model=CuentaOut)
+@invalida("cuentas", "saldos", "historial", "propiedad")
 def actualizar_cuenta(
         cuenta_id: int,
         data: CuentaUpdate,
-        user: CurrentUser = Security(get_current_user),
+        user: CurrentUser = Security(get_active_user),
         db: Session = Depends(get_db)
     ):
     """
@@ -98,22 +107,43 @@ def actualizar_cuenta(
 
     db.commit()
     db.refresh(cuenta)
+
     return cuenta
 
 
 # =========================================================
 # ELIMINAR CUENTA
 # =========================================================
-@router.delete("/{cuenta_id}")
+@router.delete(
+    "/{cuenta_id}",
+    responses={
+        status.HTTP_202_ACCEPTED: {
+            "model": EliminacionOut,
+            "description": "Eliminación en segundo plano registrada"
+        }
+    }
+)
+@invalida("cuentas", "saldos", "historial", "propiedad")
 def eliminar_cuenta(
         cuenta_id: int,
-        user: CurrentUser = Security(get_current_user),
+        response: Response,
+        user: CurrentUser = Security(get_active_user),
         db: Session = Depends(get_db)
     ):
     """
     Elimina una cuenta del usuario autenticado.
 
-    No se puede eliminar una cuenta si tiene movimientos asociados.
+    - Sin movimientos: se elimina en el acto (200).
+    - Con movimientos: la cuenta se marca para eliminar (deja de
+      listarse y de aceptar movimientos) y sus movimientos,
+      transferencias y saldos se eliminan por lotes en segundo plano.
+      Responde 202 con la eliminación; su progreso se consulta en
+      GET /eliminaciones/{id}.
+
+    Errores:
+    -------
+    404 Not Found
+        Si la cuenta no existe o no pertenece al usuario.
     """
     cuenta = db.query(Cuenta).filter(
         Cuenta.id == cuenta_id,
@@ -123,7 +153,10 @@ def eliminar_cuenta(
     if not cuenta:
         raise HTTPException(status_code=404, detail="Cuenta no encontrada")
 
-    db.delete(cuenta)
-    db.commit()
+    eliminacion = eliminar_cuenta_service(db, user.id, cuenta)
+
+    if eliminacion is None:
+        return {"detail": "Cuenta eliminada correctamente"}
 
-    return {"detail": "Cuenta eliminada correctamente"}
+    response.status_code = status.HTTP_202_ACCEPTED
+    return EliminacionOut(**eliminacion)
@@ -0,0 +1,90 @@
+from fastapi import APIRouter, Security, Request, Query
+from datetime import date
+
+from dependencies import get_current_user, CurrentUser
+from schemas.dashboard import DashboardOut
+from services.saldos_service import obtener_saldos_con_secuencia
+from services.dashboard_service import (
+    en_sesion_propia,
+    obtener_movimientos_recientes,
+    obtener_transferencias_recientes,
+    obtener_totales_categoria_mes
+)
+from core.cache import cache_multiple
+from core.etag import etag_usuario, etag_coincide, no_modificado
+from core.respuestas import a_json, json_crudo
+
+router = APIRouter(
+    prefix="/dashboard",
+    tags=["Dashboard"]
+)
+
+
+# =========================================================
+# DASHBOARD (PANTALLA DE INICIO)
+# =========================================================
+@router.get("/", response_model=DashboardOut)
+async def obtener_dashboard(
+    request: Request,
+    movimientos: int = Query(20, ge=1, le=100),
+    transferencias: int = Query(10, ge=1, le=100),
+    user: CurrentUser = Security(get_current_user)
+):
+    """
+    Reúne en una sola respuesta lo que la pantalla de inicio pedía
+    en cinco llamadas:
+
+    - Cuentas con su saldo actual
+    - Últimos movimientos
+    - Totales por categoría del mes en curso
+    - Últimas transferencias
+
+    Todas las partes se leen de Redis en un solo round trip; las que
+    faltan se calculan en paralelo (cada una con su propia sesión).
+    Soporta GET condicional (ETag / If-None-Match → 304).
+    """
+    etag = await etag_usuario(user.id)
+    if etag_coincide(request, etag):
+        return no_modificado(etag)
+
+    hoy = date.today()
+
+    partes = await cache_multiple(
+        user.id,
+        {
+            "movimientos": (
+                "flujo",
+                f"recientes:{movimientos}",
+                lambda: en_sesion_propia(
+                    obtener_movimientos_recientes, user.id, movimientos
+                )
+            ),
+            "categorias_mes": (
+                "resumen",
+                f"mes:{hoy.isoformat()}",
+                lambda: en_sesion_propia(
+                    obtener_totales_categoria_mes, user.id, hoy
+                )
+            ),
+            "transferencias": (
+                "transferencias",
+                f"recientes:{transferencias}",
+                lambda: en_sesion_propia(
+                    obtener_transferencias_recientes, user.id, transferencias
+                )
+            )
+        },
+        saldos=lambda: en_sesion_propia(obtener_saldos_con_secuencia, user.id)
+    )
+
+    contenido = a_json(DashboardOut, {
+        "cuentas": [
+            {**fila, "saldo": float(fila["saldo"])}
+            for fila in partes["saldos"]
+        ],
+        "movimientos": partes["movimientos"],
+        "categorias_mes": partes["categorias_mes"],
+        "transferencias": partes["transferencias"]
+    })
+
+    return json_crudo(contenido, etag)
@@ -0,0 +1,47 @@
+from fastapi import APIRouter, Depends, Security, HTTPException, status
+from sqlalchemy.orm import Session
+
+from schemas.eliminacion import EliminacionOut
+from dependencies import get_db, get_current_user, CurrentUser
+from services.eliminaciones_service import estado_eliminacion
+
+router = APIRouter(
+    prefix="/eliminaciones",
+    tags=["Eliminaciones"]
+)
+
+
+# =========================================================
+# ESTADO DE UNA ELIMINACIÓN EN SEGUNDO PLANO
+# =========================================================
+@router.get("/{eliminacion_id}", response_model=EliminacionOut)
+def obtener_eliminacion(
+        eliminacion_id: int,
+        user: CurrentUser = Security(get_current_user),
+        db: Session = Depends(get_db)
+    ):
+    """
+    Estado y progreso de una eliminación iniciada con
+    DELETE /cuentas/{id} o DELETE /usuarios/me.
+
+    - estado: pendiente → en_curso → completada (o fallida)
+    - fase: etapa actual (transferencias, flujo, ...)
+    - progreso: porcentaje estimado (null hasta el primer lote)
+
+    Sigue disponible después de eliminar al usuario, con el mismo
+    access token mientras no expire.
+
+    Errores:
+    -------
+    404 Not Found
+        Si la eliminación no existe o no pertenece al usuario.
+    """
+    eliminacion = estado_eliminacion(db, user.id, eliminacion_id)
+
+    if eliminacion is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Eliminación no encontrada"
+        )
+
+    return eliminacion
@@ -0,0 +1,42 @@
+from datetime import date
+
+from fastapi import APIRouter, Security
+from fastapi.responses import StreamingResponse
+
+from dependencies import get_current_user, CurrentUser
+from services.exportacion_service import exportar_zip
+
+router = APIRouter(
+    prefix="/exportacion",
+    tags=["Exportación"]
+)
+
+
+# =========================================================
+# EXPORTAR TODOS LOS DATOS DEL USUARIO (ZIP)
+# =========================================================
+@router.get(
+    "/",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"application/zip": {}}}}
+)
+def exportar_datos(
+    user: CurrentUser = Security(get_current_user)
+):
+    """
+    Descarga un zip con todos los datos del usuario autenticado:
+    perfil (usuario.json) y cuentas, categorías, movimientos,
+    transferencias y auditoría (un CSV por entidad).
+
+    El zip se arma mientras se descarga, leyendo por lotes desde
+    cursores del servidor: no se generan archivos temporales y la
+    memoria usada no depende del tamaño del historial. El contenido
+    corresponde a un único instante (snapshot consistente).
+    """
+    nombre = f"finanzas-{user.id}-{date.today():%Y%m%d}.zip"
+
+    return StreamingResponse(
+        exportar_zip(user.id),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{nombre}"'}
+    )
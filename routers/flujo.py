@@ -3,9 +3,16 @@ from sqlalchemy.orm import Session
 
 from models.flujo import Flujo
 from schemas.flujo import FlujoCreate, FlujoUpdate, FlujoOut
-from dependencies import get_current_user, CurrentUser, get_db
+from dependencies import get_current_user, get_active_user, CurrentUser, get_db
+from repositories.sync import estado_secuencia
+from services.saldos_service import efecto_en_saldo, deltas_saldo
+from services.propiedad_service import validar_movimientos
 
-from core.cache import cache_get, cache_set, cache_delete_pattern
+from repositories.listados import filas_flujo
+
+from core.cache import aplicar_deltas_saldo
+from core.endpoints import cacheado, idempotente, invalida
+from core.respuestas import FilasJSON
 
 router = APIRouter(
     prefix="/flujo",
@@ -15,30 +22,17 @@ router = APIRouter(
 # =========================================================
 # SERIALIZADOR DE FLUJO (CLAVE PARA REDIS)
 # =========================================================
-def serialize_flujo(flujos: list[Flujo]) -> list[dict]:
-    return [
-        {
-            "id": f.id,
-            "fecha": f.fecha.isoformat(),
-            "descripcion": f.descripcion,
-            "categoria_id": f.categoria_id,
-            "cuenta_id": f.cuenta_id,
-            "tipo_movimiento": f.tipo_movimiento,
-            "tipo_egreso": f.tipo_egreso,
-            "estado": f.estado,
-            "monto": float(f.monto),  # type: ignore
-            "transferencia_id": f.transferencia_id
-        }
-        for f in flujos
-    ]
+flujo_json = FilasJSON(FlujoOut)
 
 # =========================================================
 # CREAR MOVIMIENTO
 # =========================================================
 @router.post("/", response_model=FlujoOut)
+@idempotente(FlujoOut)
+@invalida("flujo", "historial", "resumen")
 async def crear_movimiento(
     data: FlujoCreate,
-    user: CurrentUser = Security(get_current_user),
+    user: CurrentUser = Security(get_active_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -52,7 +46,21 @@ async def crear_movimiento(
     -------
     - Si es Egreso, tipo_egreso es obligatorio
     - Si es Ingreso, tipo_egreso debe ser NULL
+    - La cuenta y la categoría deben ser del usuario, y el tipo de la
+      categoría debe coincidir con el del movimiento (validado en
+      memoria con el índice de propiedad cacheado)
+
+    Acepta el header Idempotency-Key: un reintento con la misma key
+    recibe la respuesta original sin crear otro movimiento.
     """
+    try:
+        await validar_movimientos(
+            db,
+            user.id,
+            [(data.cuenta_id, data.categoria_id, data.tipo_movimiento)]
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
     movimiento = Flujo(
         usuario_id=user.id,
@@ -67,12 +75,17 @@ async def crear_movimiento(
     )
 
     db.add(movimiento)
+    db.flush()
+    secuencia, _ = estado_secuencia(db, user.id)
     db.commit()
     db.refresh(movimiento)
 
-    # 🧨 INVALIDACIÓN
-    await cache_delete_pattern(f"flujo:list:{user.id}")
-    await cache_delete_pattern(f"saldos:*:{user.id}*")
+    # 💰 Saldos: delta write-through (el resto lo invalida @invalida)
+    await aplicar_deltas_saldo(
+        user.id,
+        secuencia,
+        efecto_en_saldo(movimiento)
+    )
 
     return movimiento
 
@@ -81,7 +94,8 @@ async def crear_movimiento(
 # LISTAR MOVIMIENTOS DEL USUARIO (CACHE)
 # =========================================================
 @router.get("/", response_model=list[FlujoOut])
-async def listar_movimientos(
+@cacheado("flujo", "list", list[FlujoOut])
+def listar_movimientos(
     user: CurrentUser = Security(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -89,41 +103,31 @@ async def listar_movimientos(
     Lista todos los movimientos financieros del usuario.
 
     - Se ordenan por fecha descendente y luego por ID.
-    - Resultado cacheado en Redis.
+    - En un miss se leen solo las columnas de FlujoOut (sin entidades
+      ORM) y el JSON se arma directo desde las tuplas.
+    - Resultado cacheado en Redis como JSON final (bytes): un hit
+      se entrega tal cual, sin deserializar ni re-validar.
+    - Soporta GET condicional (ETag / If-None-Match → 304).
     """
-    cache_key = f"flujo:list:{user.id}"
-
-    cached = await cache_get(cache_key)
-    if cached is not None:
-        return cached
-
-    flujos = (
-        db.query(Flujo)
-        .filter(Flujo.usuario_id == user.id)
-        .order_by(Flujo.fecha.desc(), Flujo.id.desc())
-        .all()
-    )
-
-    serialized = serialize_flujo(flujos)
-    await cache_set(cache_key, serialized)
-
-    return serialized
+    return flujo_json(filas_flujo(db, user.id))
 
 
 # =========================================================
 # ACTUALIZAR MOVIMIENTO (PATCH SEMÁNTICO)
 # =========================================================
 @router.put("/{movimiento_id}", response_model=FlujoOut)
+@invalida("flujo", "historial", "resumen")
 async def actualizar_movimiento(
     movimiento_id: int,
     data: FlujoUpdate,
-    user: CurrentUser = Security(get_current_user),
+    user: CurrentUser = Security(get_active_user),
     db: Session = Depends(get_db)
 ):
     """
     Actualiza parcialmente un movimiento financiero existente.
 
-    Solo se modifican los campos enviados en la petición.
+    Solo se modifican los campos enviados en la petición. Una nueva
+    cuenta o categoría se valida igual que al crear.
     """
     movimiento = (
         db.query(Flujo)
@@ -137,15 +141,38 @@ async def actualizar_movimiento(
     if not movimiento:
         raise HTTPException(status_code=404, detail="Movimiento no encontrado")
 
-    for campo, valor in data.model_dump(exclude_unset=True).items():
+    cambios = data.model_dump(exclude_unset=True)
+
+    if "cuenta_id" in cambios or "categoria_id" in cambios:
+        try:
+            await validar_movimientos(
+                db,
+                user.id,
+                [(
+                    cambios.get("cuenta_id", movimiento.cuenta_id),
+                    cambios.get("categoria_id", movimiento.categoria_id),
+                    movimiento.tipo_movimiento
+                )]
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    antes = efecto_en_saldo(movimiento)
+
+    for campo, valor in cambios.items():
         setattr(movimiento, campo, valor)
 
+    db.flush()
+    secuencia, _ = estado_secuencia(db, user.id)
     db.commit()
     db.refresh(movimiento)
 
-    # 🧨 INVALIDACIÓN
-    await cache_delete_pattern(f"flujo:list:{user.id}")
-    await cache_delete_pattern(f"saldos:*:{user.id}*")
+    # 💰 Saldos: delta write-through (el resto lo invalida @invalida)
+    await aplicar_deltas_saldo(
+        user.id,
+        secuencia,
+        deltas_saldo(antes, efecto_en_saldo(movimiento))
+    )
 
     return movimiento
 
@@ -154,9 +181,10 @@ async def actualizar_movimiento(
 # ELIMINAR MOVIMIENTO
 # =========================================================
 @router.delete("/{movimiento_id}", status_code=status.HTTP_204_NO_CONTENT)
+@invalida("flujo", "historial", "resumen")
 async def eliminar_movimiento(
     movimiento_id: int,
-    user: CurrentUser = Security(get_current_user),
+    user: CurrentUser = Security(get_active_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -177,9 +205,16 @@ async def eliminar_movimiento(
     if not movimiento:
         raise HTTPException(status_code=404, detail="Movimiento no encontrado")
 
+    antes = efecto_en_saldo(movimiento)
+
     db.delete(movimiento)
+    db.flush()
+    secuencia, _ = estado_secuencia(db, user.id)
     db.commit()
 
-    # 🧨 INVALIDACIÓN
-    await cache_delete_pattern(f"flujo:list:{user.id}")
-    await cache_delete_pattern(f"saldos:*:{user.id}*")
\ No newline at end of file
+    # 💰 Saldos: delta write-through (el resto lo invalida @invalida)
+    await aplicar_deltas_saldo(
+        user.id,
+        secuencia,
+        deltas_saldo(antes, {})
+    )
\ No newline at end of file
@@ -0,0 +1,87 @@
+from fastapi import APIRouter, Depends, Security, HTTPException, status
+from sqlalchemy.orm import Session
+from datetime import date
+from typing import List, Literal
+
+from dependencies import get_db, get_current_user, CurrentUser
+from services.reportes_service import (
+    obtener_resumen_categorias,
+    obtener_resumen_tipo_egreso
+)
+from schemas.reportes import ResumenCategoriaOut, ResumenTipoEgresoOut
+from core.endpoints import cacheado
+
+router = APIRouter(
+    prefix="/reportes",
+    tags=["Reportes"]
+)
+
+
+# =========================================================
+# RESUMEN MENSUAL POR CATEGORÍA
+# =========================================================
+@router.get("/categorias", response_model=List[ResumenCategoriaOut])
+@cacheado(
+    "resumen",
+    "categorias:{fecha_inicio}:{fecha_fin}",
+    List[ResumenCategoriaOut]
+)
+def resumen_por_categoria(
+    fecha_inicio: date,
+    fecha_fin: date,
+    user: CurrentUser = Security(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Obtiene los totales por mes y categoría del usuario.
+
+    Las fechas se normalizan al primer día de su mes. La respuesta
+    se lee de la tabla de resumen mantenida por trigger, sin
+    recorrer los movimientos.
+    """
+    try:
+        return obtener_resumen_categorias(
+            db,
+            user.id,
+            fecha_inicio,
+            fecha_fin
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+# =========================================================
+# EGRESOS FIJOS VS VARIABLES POR MES
+# =========================================================
+@router.get("/tipo-egreso", response_model=List[ResumenTipoEgresoOut])
+@cacheado(
+    "resumen",
+    "tipo-egreso:{fecha_inicio}:{fecha_fin}:{estado}",
+    List[ResumenTipoEgresoOut]
+)
+def resumen_por_tipo_egreso(
+    fecha_inicio: date,
+    fecha_fin: date,
+    estado: Literal["Pendiente", "Confirmado"] = "Confirmado",
+    user: CurrentUser = Security(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Obtiene los egresos de cada mes separados en Fijo y Variable.
+    """
+    try:
+        return obtener_resumen_tipo_egreso(
+            db,
+            user.id,
+            fecha_inicio,
+            fecha_fin,
+            estado
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
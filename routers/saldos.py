@@ -1,16 +1,27 @@
-from fastapi import APIRouter, Depends, Security, HTTPException, status
+from fastapi import APIRouter, Depends, Security, HTTPException, status, Request
 from sqlalchemy.orm import Session
 from datetime import date
 from typing import List
 
-from dependencies import get_db, get_current_user, CurrentUser
+from dependencies import get_db, get_current_user, get_active_user, CurrentUser
 from services.saldos_service import (
-    obtener_saldos_usuario,
+    obtener_saldos_con_secuencia,
     obtener_saldos_rango,
+    obtener_saldos_a_fecha,
+    obtener_historial_saldos,
     reajustar_saldo
 )
-from schemas.saldos import SaldoCuentaOut, ReajusteSaldoIn
-from core.cache import cache_get, cache_set, cache_delete_pattern
+from schemas.saldos import (
+    SaldoCuentaOut,
+    HistorialSaldoCuentaOut,
+    IntervaloHistorial,
+    ReajusteSaldoIn
+)
+from core.cache import saldos_actuales
+from core.compresion import comprimir, negociar_codificacion
+from core.endpoints import cacheado, invalida
+from core.etag import etag_usuario, etag_coincide, no_modificado
+from core.respuestas import FilasJSON, json_crudo
 
 router = APIRouter(
     prefix="/saldos",
@@ -32,11 +43,27 @@ def serialize_saldos(rows):
     ]
 
 
+saldos_json = FilasJSON(SaldoCuentaOut)
+
+
+def filas_saldos(rows):
+    """
+    Tuplas en el orden de SaldoCuentaOut. El saldo va como el mismo
+    texto que produce el Decimal del response_model a partir del float
+    (idéntico a serialize_saldos + a_json, sin validar fila por fila).
+    """
+    return [
+        (row["cuenta_id"], row["cuenta"], str(float(row["saldo"])))
+        for row in rows
+    ]
+
+
 # =========================================================
 # SALDOS POR CUENTA
 # =========================================================
 @router.get("/cuentas", response_model=List[SaldoCuentaOut])
 async def saldos_por_cuenta(
+    request: Request,
     user: CurrentUser = Security(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -44,27 +71,36 @@ async def saldos_por_cuenta(
     Obtiene el saldo actual de todas las cuentas del usuario.
 
     El cálculo se realiza mediante funciones SQL optimizadas
-    en la base de datos.
+    en la base de datos. Se cachea en un hash de Redis que las
+    escrituras de flujo mantienen al día aplicando su delta
+    (write-through), sin recalcular tras cada movimiento.
+    Respeta Accept-Encoding (gzip | zstd) por encima del umbral de
+    compresión. Soporta GET condicional (ETag / If-None-Match → 304).
     """
-    cache_key = f"saldos:cuentas:{user.id}"
+    etag = await etag_usuario(user.id)
+    if etag_coincide(request, etag):
+        return no_modificado(etag)
 
-    cached = await cache_get(cache_key)
-    if cached is not None:
-        return cached
-
-    data = obtener_saldos_usuario(db, user.id)
-    serialized = serialize_saldos(data)
+    filas = await saldos_actuales(
+        user.id,
+        lambda: obtener_saldos_con_secuencia(db, user.id)
+    )
 
-    await cache_set(cache_key, serialized)
+    # El hash se mantiene por deltas, así que no hay JSON final
+    # guardado: se serializa y comprime en cada respuesta
+    contenido, codificacion = comprimir(
+        saldos_json(filas_saldos(filas)),
+        negociar_codificacion(request)
+    )
 
-    return serialized
+    return json_crudo(contenido, etag, codificacion)
 
 
 # =========================================================
 # SALDOS POR RANGO DE FECHAS
 # =========================================================
 @router.get("/rango", response_model=List[SaldoCuentaOut])
-async def saldos_por_rango(
+def saldos_por_rango(
     fecha_inicio: date,
     fecha_fin: date,
     user: CurrentUser = Security(get_current_user),
@@ -72,6 +108,10 @@ async def saldos_por_rango(
 ):
     """
     Obtiene los saldos del usuario dentro de un rango de fechas.
+
+    Se calcula como la diferencia de dos snapshots diarios por cuenta.
+    No se cachea: cada par (inicio, fin) sería una key distinta y la
+    consulta ya es barata.
     """
     if fecha_inicio > fecha_fin:
         raise HTTPException(
@@ -79,15 +119,6 @@ async def saldos_por_rango(
             detail="La fecha inicial no puede ser mayor a la final"
         )
 
-    cache_key = (
-        f"saldos:rango:{user.id}:"
-        f"{fecha_inicio.isoformat()}:{fecha_fin.isoformat()}"
-    )
-
-    cached = await cache_get(cache_key)
-    if cached is not None:
-        return cached
-
     try:
         data = obtener_saldos_rango(
             db,
@@ -101,20 +132,82 @@ async def saldos_por_rango(
             detail=str(e)
         )
 
-    serialized = serialize_saldos(data)
+    return serialize_saldos(data)
 
-    await cache_set(cache_key, serialized)
 
-    return serialized
+# =========================================================
+# SALDOS A UNA FECHA
+# =========================================================
+@router.get("/fecha", response_model=List[SaldoCuentaOut])
+@cacheado("historial", "fecha:{fecha}", List[SaldoCuentaOut])
+def saldos_a_fecha(
+    fecha: date,
+    user: CurrentUser = Security(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Obtiene el saldo de cada cuenta del usuario al cierre de una fecha.
+
+    Cada saldo es una sola búsqueda en los snapshots diarios.
+    Se cachea por fecha (tag "historial").
+    """
+    try:
+        data = obtener_saldos_a_fecha(db, user.id, fecha)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    return serialize_saldos(data)
+
+
+# =========================================================
+# HISTORIAL DE SALDOS (SERIE TEMPORAL)
+# =========================================================
+@router.get("/historial", response_model=List[HistorialSaldoCuentaOut])
+@cacheado(
+    "historial",
+    "{intervalo}:{fecha_inicio}:{fecha_fin}",
+    List[HistorialSaldoCuentaOut]
+)
+def historial_saldos(
+    fecha_inicio: date,
+    fecha_fin: date,
+    intervalo: IntervaloHistorial = "dia",
+    user: CurrentUser = Security(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Obtiene la serie temporal de saldos de cada cuenta, agrupada
+    por día, semana o mes, en una sola consulta.
+
+    Cada punto es el saldo de cierre del periodo (acotado a fecha_fin).
+    Se cachea por granularidad y rango.
+    """
+    try:
+        return obtener_historial_saldos(
+            db,
+            user.id,
+            fecha_inicio,
+            fecha_fin,
+            intervalo
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
 
 
 # =========================================================
 # REAJUSTE DE SALDO
 # =========================================================
 @router.post("/reajuste", status_code=status.HTTP_204_NO_CONTENT)
+@invalida("saldos", "historial", "flujo", "resumen")
 async def reajustar_saldo_cuenta(
     payload: ReajusteSaldoIn,
-    user: CurrentUser = Security(get_current_user),
+    user: CurrentUser = Security(get_active_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -133,10 +226,6 @@ async def reajustar_saldo_cuenta(
             descripcion=payload.descripcion
         )
 
-        # 🧨 INVALIDACIÓN DE CACHE (crítico)
-        await cache_delete_pattern(f"saldos:cuentas:{user.id}")
-        await cache_delete_pattern(f"saldos:rango:{user.id}:*")
-
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
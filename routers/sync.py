@@ -0,0 +1,33 @@
+from fastapi import APIRouter, Depends, Security, Query
+from sqlalchemy.orm import Session
+
+from dependencies import get_db, get_current_user, CurrentUser
+from services.sync_service import sincronizar
+from schemas.sync import SyncOut
+
+router = APIRouter(
+    prefix="/sync",
+    tags=["Sync"]
+)
+
+
+# =========================================================
+# SINCRONIZACIÓN INCREMENTAL (CHANGE-FEED)
+# =========================================================
+@router.get("/", response_model=SyncOut)
+def obtener_cambios(
+    since: int = Query(default=0, ge=0),
+    user: CurrentUser = Security(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Retorna los cambios de flujo, transferencias, cuentas y categorías
+    posteriores a la secuencia `since`.
+
+    - Cada entidad aparece una sola vez con su estado actual (upsert)
+      o en la lista de eliminados (tombstone).
+    - `seq` es el valor a enviar como `since` en la próxima llamada.
+    - `completo = true` indica un snapshot completo (since = 0 o log
+      ya compactado): el cliente debe reemplazar sus datos locales.
+    """
+    return sincronizar(db, user.id, since)
@@ -1,10 +1,8 @@
 from fastapi import APIRouter, Depends, Security, HTTPException, status
 from sqlalchemy.orm import Session
-from datetime import date
 
 from models.transferencia import Transferencia
 from models.flujo import Flujo
-from models.categoria import Categoria
 
 from schemas.transferencia import (
     TransferenciaCreate,
@@ -12,10 +10,15 @@ from schemas.transferencia import (
     TransferenciaOut
 )
 
-from dependencies import get_current_user, CurrentUser, get_db
-from services.saldos_service import obtener_saldo_cuenta
+from dependencies import get_current_user, get_active_user, CurrentUser, get_db
+from services.transferencias_service import (
+    crear_transferencia as crear_transferencia_cuentas
+)
+from services.propiedad_service import validar_cuentas
+from repositories.listados import filas_transferencias
 
-from core.cache import cache_get, cache_set, cache_delete_pattern
+from core.endpoints import cacheado, idempotente, invalida
+from core.respuestas import FilasJSON
 
 
 router = APIRouter(
@@ -26,19 +29,7 @@ router = APIRouter(
 # =========================================================
 # SERIALIZADOR TRANSFERENCIAS
 # =========================================================
-def serialize_transferencias(items: list[Transferencia]) -> list[dict]:
-    return [
-        {
-            "id": t.id,
-            "cuenta_origen_id": t.cuenta_origen_id,
-            "cuenta_destino_id": t.cuenta_destino_id,
-            "monto": float(t.monto),  # type: ignore
-            "descripcion": t.descripcion,
-            "estado": t.estado,
-            "created_at": t.created_at.isoformat()
-        }
-        for t in items
-    ]
+transferencias_json = FilasJSON(TransferenciaOut)
 
 
 def serialize_transferencia(t: Transferencia) -> dict:
@@ -57,9 +48,11 @@ def serialize_transferencia(t: Transferencia) -> dict:
 # CREAR TRANSFERENCIA
 # =========================================================
 @router.post("/", response_model=TransferenciaOut)
+@idempotente(TransferenciaOut)
+@invalida("transferencias", "flujo", "saldos", "historial", "resumen")
 async def crear_transferencia(
     data: TransferenciaCreate,
-    user: CurrentUser = Security(get_current_user),
+    user: CurrentUser = Security(get_active_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -69,110 +62,33 @@ async def crear_transferencia(
     - Un Flujo Egreso
     - Un Flujo Ingreso
     Ambos vinculados a la transferencia.
-    """
-
-    if data.cuenta_origen_id == data.cuenta_destino_id:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="La cuenta origen y destino no pueden ser la misma"
-        )
-
-    # 🔎 Categorías
-    categoria_egreso = (
-        db.query(Categoria)
-        .filter(
-            Categoria.usuario_id == user.id,
-            Categoria.nombre == "Transferencias entre cuentas",
-            Categoria.tipo_movimiento == "Egreso"
-        )
-        .first()
-    )
 
-    categoria_ingreso = (
-        db.query(Categoria)
-        .filter(
-            Categoria.usuario_id == user.id,
-            Categoria.nombre == "Transferencias entre cuentas",
-            Categoria.tipo_movimiento == "Ingreso"
-        )
-        .first()
-    )
+    El saldo de origen se valida con las cuentas bloqueadas
+    (sin carreras entre transferencias concurrentes).
 
-    if not categoria_egreso or not categoria_ingreso:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Categorías de transferencia no configuradas"
+    Acepta el header Idempotency-Key: un reintento con la misma key
+    recibe la respuesta original sin crear otra transferencia.
+    """
+    try:
+        # Rechazo temprano (en memoria) de cuentas ajenas, antes de
+        # bloquear saldos en PostgreSQL
+        await validar_cuentas(
+            db, user.id, [data.cuenta_origen_id, data.cuenta_destino_id]
         )
+        transferencia = crear_transferencia_cuentas(db, user.id, data)
 
-    # 🔒 Validación de saldo
-    saldo_origen = obtener_saldo_cuenta(
-        db,
-        user.id,
-        data.cuenta_origen_id
-    )
-
-    if saldo_origen < data.monto:
+    except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Saldo insuficiente en la cuenta origen"
-        )
-
-    fecha_movimiento = date.today()
-
-    transferencia = Transferencia(
-        usuario_id=user.id,
-        cuenta_origen_id=data.cuenta_origen_id,
-        cuenta_destino_id=data.cuenta_destino_id,
-        monto=data.monto,
-        descripcion=data.descripcion,
-        estado="Confirmado"
-    )
-
-    try:
-        db.add(transferencia)
-        db.flush()
-
-        flujo_egreso = Flujo(
-            usuario_id=user.id,
-            fecha=fecha_movimiento,
-            descripcion=data.descripcion,
-            categoria_id=categoria_egreso.id,
-            cuenta_id=data.cuenta_origen_id,
-            tipo_movimiento="Egreso",
-            tipo_egreso="Variable",
-            estado="Confirmado",
-            monto=data.monto,
-            transferencia_id=transferencia.id
+            detail=str(e)
         )
 
-        flujo_ingreso = Flujo(
-            usuario_id=user.id,
-            fecha=fecha_movimiento,
-            descripcion=data.descripcion,
-            categoria_id=categoria_ingreso.id,
-            cuenta_id=data.cuenta_destino_id,
-            tipo_movimiento="Ingreso",
-            estado="Confirmado",
-            monto=data.monto,
-            transferencia_id=transferencia.id
-        )
-
-        db.add_all([flujo_egreso, flujo_ingreso])
-        db.commit()
-        db.refresh(transferencia)
-
-    except Exception:
-        db.rollback()
+    except RuntimeError as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Error al crear la transferencia"
+            detail=str(e)
         )
 
-    # 🧨 INVALIDACIÓN GLOBAL
-    await cache_delete_pattern(f"transferencias:*:{user.id}*")
-    await cache_delete_pattern(f"flujo:list:{user.id}")
-    await cache_delete_pattern(f"saldos:*:{user.id}*")
-
     return transferencia
 
 
@@ -180,38 +96,27 @@ async def crear_transferencia(
 # LISTAR TRANSFERENCIAS (CACHE)
 # =========================================================
 @router.get("/", response_model=list[TransferenciaOut])
-async def listar_transferencias(
+@cacheado("transferencias", "list", list[TransferenciaOut])
+def listar_transferencias(
     user: CurrentUser = Security(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
     Lista todas las transferencias del usuario autenticado.
-    Resultado cacheado en Redis.
+    En un miss se leen solo las columnas de TransferenciaOut y el
+    JSON se arma directo desde las tuplas.
+    Resultado cacheado en Redis como JSON final (bytes).
+    Soporta GET condicional (ETag / If-None-Match → 304).
     """
-    cache_key = f"transferencias:list:{user.id}"
-
-    cached = await cache_get(cache_key)
-    if cached is not None:
-        return cached
-
-    items = (
-        db.query(Transferencia)
-        .filter(Transferencia.usuario_id == user.id)
-        .order_by(Transferencia.created_at.desc(), Transferencia.id.desc())
-        .all()
-    )
-
-    serialized = serialize_transferencias(items)
-    await cache_set(cache_key, serialized)
-
-    return serialized
+    return transferencias_json(filas_transferencias(db, user.id))
 
 
 # =========================================================
 # OBTENER TRANSFERENCIA (CACHE)
 # =========================================================
 @router.get("/{transferencia_id}", response_model=TransferenciaOut)
-async def obtener_transferencia(
+@cacheado("transferencias", "detail:{transferencia_id}", TransferenciaOut)
+def obtener_transferencia(
     transferencia_id: int,
     user: CurrentUser = Security(get_current_user),
     db: Session = Depends(get_db)
@@ -219,12 +124,6 @@ async def obtener_transferencia(
     """
     Obtiene una transferencia específica del usuario.
     """
-    cache_key = f"transferencias:detail:{user.id}:{transferencia_id}"
-
-    cached = await cache_get(cache_key)
-    if cached is not None:
-        return cached
-
     transferencia = (
         db.query(Transferencia)
         .filter(
@@ -240,20 +139,18 @@ async def obtener_transferencia(
             detail="Transferencia no encontrada"
             ) 
 
-    serialized = serialize_transferencia(transferencia)
-    await cache_set(cache_key, serialized)
-
-    return serialized
+    return serialize_transferencia(transferencia)
 
 
 # =========================================================
 # ACTUALIZAR TRANSFERENCIA + FLUJOS
 # =========================================================
 @router.put("/{transferencia_id}", response_model=TransferenciaOut)
+@invalida("transferencias", "flujo", "saldos", "historial", "resumen")
 async def actualizar_transferencia(
     transferencia_id: int,
     data: TransferenciaUpdate,
-    user: CurrentUser = Security(get_current_user),
+    user: CurrentUser = Security(get_active_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -284,6 +181,14 @@ async def actualizar_transferencia(
             detail="La cuenta origen y destino no pueden ser la misma"
         )
 
+    try:
+        await validar_cuentas(db, user.id, [cuenta_origen, cuenta_destino])
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
     for campo, valor in data.model_dump(exclude_unset=True).items():
         setattr(transferencia, campo, valor)
 
@@ -308,11 +213,6 @@ async def actualizar_transferencia(
     db.commit()
     db.refresh(transferencia)
 
-    # 🧨 INVALIDAR CACHE
-    await cache_delete_pattern(f"transferencias:*:{user.id}*")
-    await cache_delete_pattern(f"flujo:list:{user.id}")
-    await cache_delete_pattern(f"saldos:*:{user.id}*")
-
     return transferencia
 
 
@@ -320,9 +220,10 @@ async def actualizar_transferencia(
 # ELIMINAR TRANSFERENCIA + FLUJOS
 # =========================================================
 @router.delete("/{transferencia_id}", status_code=status.HTTP_204_NO_CONTENT)
+@invalida("transferencias", "flujo", "saldos", "historial", "resumen")
 async def eliminar_transferencia(
     transferencia_id: int,
-    user: CurrentUser = Security(get_current_user),
+    user: CurrentUser = Security(get_active_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -350,8 +251,3 @@ async def eliminar_transferencia(
 
     db.delete(transferencia)
     db.commit()
-
-    # 🧨 INVALIDAR CACHE
-    await cache_delete_pattern(f"transferencias:*:{user.id}*")
-    await cache_delete_pattern(f"flujo:list:{user.id}")
-    await cache_delete_pattern(f"saldos:*:{user.id}*")
\ No newline at end of file
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, Security
+from fastapi import APIRouter, Depends, HTTPException, Security, status
 from sqlalchemy.orm import Session
 
 from schemas.usuario import (
@@ -9,11 +9,14 @@ from schemas.usuario import (
     UsuarioUpdateTelefono,
     UsuarioUpdatePassword
 )
+from schemas.eliminacion import EliminacionOut
 from models.usuario import Usuario
 from security_tokens import get_password_hash, verify_password
-from dependencies import get_db, get_current_user, CurrentUser
+from dependencies import get_db, get_current_user, get_active_user, CurrentUser
 from utils.id_generator import generate_unique_user_id
 from services.categorias import crear_categorias_default
+from services.eliminaciones_service import eliminar_usuario as eliminar_usuario_service
+from core.endpoints import invalida
 
 router = APIRouter(
     prefix="/usuarios",
@@ -75,7 +78,7 @@ def registrar_usuario(
 @router.put("/nombre", response_model=UsuarioOut)
 def actualizar_nombre(
         data: UsuarioUpdateNombre,
-        user: CurrentUser = Security(get_current_user),
+        user: CurrentUser = Security(get_active_user),
         db: Session = Depends(get_db)
     ):
     """
@@ -96,7 +99,7 @@ def actualizar_nombre(
 @router.put("/correo", response_model=UsuarioOut)
 def actualizar_correo(
         data: UsuarioUpdateCorreo,
-        user: CurrentUser = Security(get_current_user),
+        user: CurrentUser = Security(get_active_user),
         db: Session = Depends(get_db)
     ):
     """
@@ -126,7 +129,7 @@ def actualizar_correo(
 @router.put("/telefono", response_model=UsuarioOut)
 def actualizar_telefono(
         data: UsuarioUpdateTelefono,
-        user: CurrentUser = Security(get_current_user),
+        user: CurrentUser = Security(get_active_user),
         db: Session = Depends(get_db)
     ):
     """
@@ -146,7 +149,7 @@ def actualizar_telefono(
 @router.put("/password")
 def actualizar_password(
         data: UsuarioUpdatePassword,
-        user: CurrentUser = Security(get_current_user),
+        user: CurrentUser = Security(get_active_user),
         db: Session = Depends(get_db)
     ):
     """
@@ -179,4 +182,28 @@ def get_me(
             detail="Usuario no encontrado"
         )
 
-    return usuario
\ No newline at end of file
+    return usuario
+
+
+# =========================================================
+# ELIMINAR USUARIO (EN SEGUNDO PLANO)
+# =========================================================
+@router.delete(
+    "/me",
+    response_model=EliminacionOut,
+    status_code=status.HTTP_202_ACCEPTED
+)
+@invalida("cuentas", "categorias", "propiedad")
+def eliminar_me(
+    user: CurrentUser = Security(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Elimina al usuario autenticado y todos sus datos.
+
+    Responde de inmediato (202): sus sesiones se revocan, no puede
+    volver a iniciar sesión y sus movimientos, transferencias,
+    categorías y cuentas se eliminan por lotes en segundo plano.
+    El progreso se consulta en GET /eliminaciones/{id}.
+    """
+    return eliminar_usuario_service(db, user.id)
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Literal
 
 
@@ -21,3 +21,14 @@ class CategoriaOut(CategoriaBase):
 
     class Config:
         from_attributes = True
+
+
+class CategoriaFusion(BaseModel):
+    origenes: list[int] = Field(min_length=1)
+    destino: int
+
+
+class CategoriaFusionOut(BaseModel):
+    destino: int
+    categorias_eliminadas: list[int]
+    movimientos_reasignados: int
@@ -0,0 +1,14 @@
+from pydantic import BaseModel
+from typing import List
+
+from schemas.saldos import SaldoCuentaOut
+from schemas.flujo import FlujoOut
+from schemas.reportes import ResumenCategoriaOut
+from schemas.transferencia import TransferenciaOut
+
+
+class DashboardOut(BaseModel):
+    cuentas: List[SaldoCuentaOut]
+    movimientos: List[FlujoOut]
+    categorias_mes: List[ResumenCategoriaOut]
+    transferencias: List[TransferenciaOut]
@@ -0,0 +1,18 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Literal
+
+
+class EliminacionOut(BaseModel):
+    id: int
+    entidad: Literal["cuenta", "usuario"]
+    entidad_id: str
+    estado: Literal["pendiente", "en_curso", "completada", "fallida"]
+    fase: str | None = None
+    total: int | None = None
+    eliminados: int
+    progreso: float | None = None
+    error: str | None = None
+    creada: datetime
+    actualizada: datetime
+    finalizada: datetime | None = None
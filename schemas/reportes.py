@@ -0,0 +1,22 @@
+from pydantic import BaseModel
+from datetime import date
+from decimal import Decimal
+from typing import Literal
+
+
+class ResumenCategoriaOut(BaseModel):
+    mes: date
+    categoria_id: int | None = None
+    categoria: str | None = None
+    tipo_movimiento: Literal["Ingreso", "Egreso"]
+    tipo_egreso: Literal["Fijo", "Variable"] | None = None
+    estado: Literal["Pendiente", "Confirmado"]
+    total: Decimal
+    cantidad: int
+
+
+class ResumenTipoEgresoOut(BaseModel):
+    mes: date
+    tipo_egreso: Literal["Fijo", "Variable"]
+    total: Decimal
+    cantidad: int
@@ -1,11 +1,24 @@
 from pydantic import BaseModel, Field
 from decimal import Decimal
+from datetime import date
+from typing import List, Literal
 
 class SaldoCuentaOut(BaseModel):
     cuenta_id: int
     cuenta: str
     saldo: Decimal
 
+IntervaloHistorial = Literal["dia", "semana", "mes"]
+
+class PuntoSaldoOut(BaseModel):
+    periodo: date
+    saldo: Decimal
+
+class HistorialSaldoCuentaOut(BaseModel):
+    cuenta_id: int
+    cuenta: str
+    serie: List[PuntoSaldoOut]
+
 class ReajusteSaldoIn(BaseModel):
     cuenta_id: int 
     saldo_real: Decimal
@@ -0,0 +1,66 @@
+from pydantic import BaseModel
+from datetime import date, datetime
+from typing import Literal
+
+
+class SyncFlujo(BaseModel):
+    id: int
+    fecha: date
+    descripcion: str | None = None
+    categoria_id: int | None = None
+    cuenta_id: int
+    tipo_movimiento: Literal["Ingreso", "Egreso"]
+    tipo_egreso: Literal["Fijo", "Variable"] | None = None
+    estado: Literal["Pendiente", "Confirmado"]
+    monto: float
+    transferencia_id: int | None = None
+
+
+class SyncTransferencia(BaseModel):
+    id: int
+    cuenta_origen_id: int
+    cuenta_destino_id: int
+    monto: float
+    descripcion: str | None = None
+    estado: str
+    created_at: datetime
+
+
+class SyncCuenta(BaseModel):
+    id: int
+    nombre: str
+
+
+class SyncCategoria(BaseModel):
+    id: int
+    nombre: str
+    tipo_movimiento: Literal["Ingreso", "Egreso"]
+
+
+class SyncCambiosFlujo(BaseModel):
+    upsert: list[SyncFlujo]
+    eliminados: list[int]
+
+
+class SyncCambiosTransferencia(BaseModel):
+    upsert: list[SyncTransferencia]
+    eliminados: list[int]
+
+
+class SyncCambiosCuenta(BaseModel):
+    upsert: list[SyncCuenta]
+    eliminados: list[int]
+
+
+class SyncCambiosCategoria(BaseModel):
+    upsert: list[SyncCategoria]
+    eliminados: list[int]
+
+
+class SyncOut(BaseModel):
+    seq: int
+    completo: bool
+    flujo: SyncCambiosFlujo
+    transferencia: SyncCambiosTransferencia
+    cuenta: SyncCambiosCuenta
+    categoria: SyncCambiosCategoria
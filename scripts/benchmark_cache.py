@@ -0,0 +1,106 @@
+"""
+Benchmark del costo de CPU de un hit de cache en los listados.
+
+Compara, para un mismo valor cacheado, el trabajo que hace el worker
+después del GET a Redis (el round trip es idéntico en ambos casos):
+
+- antes:   json.loads → validación del response_model → JSONResponse
+- después: bytes del JSON final → Response
+
+No requiere base de datos ni Redis: los movimientos se generan en
+memoria con la misma forma que el listado de flujo.
+
+Uso:
+    python -m scripts.benchmark_cache
+    python -m scripts.benchmark_cache --filas 10000 --repeticiones 50
+"""
+import argparse
+import json
+import statistics
+import time
+from datetime import date, timedelta
+
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from schemas.flujo import FlujoOut
+from core.respuestas import a_json
+
+
+def generar_movimientos(filas: int) -> list[dict]:
+    inicio = date(2024, 1, 1)
+
+    return [
+        {
+            "id": i,
+            "fecha": (inicio + timedelta(days=i % 730)).isoformat(),
+            "descripcion": f"Movimiento {i}",
+            "categoria_id": i % 12 + 1,
+            "cuenta_id": i % 3 + 1,
+            "tipo_movimiento": "Egreso" if i % 2 else "Ingreso",
+            "tipo_egreso": "Variable" if i % 2 else None,
+            "estado": "Confirmado",
+            "monto": round(10 + i * 1.37, 2),
+            "transferencia_id": None
+        }
+        for i in range(filas)
+    ]
+
+
+def medir(funcion, repeticiones: int) -> list[float]:
+    tiempos = []
+
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+
+    return tiempos
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Latencia de un hit de cache: JSON decodificado vs bytes"
+    )
+    parser.add_argument("--filas", type=int, default=5000)
+    parser.add_argument("--repeticiones", type=int, default=30)
+    args = parser.parse_args()
+
+    data = generar_movimientos(args.filas)
+    adapter = TypeAdapter(list[FlujoOut])
+
+    # Valor tal como queda en Redis con cada estrategia
+    cacheado_antes = json.dumps(data)
+    cacheado_despues = a_json(list[FlujoOut], data).decode()
+
+    def antes():
+        valor = json.loads(cacheado_antes)
+        contenido = adapter.dump_python(
+            adapter.validate_python(valor),
+            mode="json"
+        )
+        return JSONResponse(contenido).body
+
+    def despues():
+        return Response(
+            content=cacheado_despues.encode(),
+            media_type="application/json"
+        ).body
+
+    assert json.loads(antes()) == json.loads(despues())
+
+    t_antes = medir(antes, args.repeticiones)
+    t_despues = medir(despues, args.repeticiones)
+
+    p50_antes = statistics.median(t_antes)
+    p50_despues = statistics.median(t_despues)
+
+    print(f"📊 {args.filas} movimientos, {args.repeticiones} repeticiones")
+    print(f"   antes   (decode + validación): p50={p50_antes:.2f}ms")
+    print(f"   después (bytes):               p50={p50_despues:.3f}ms")
+    print(f"   → {p50_antes / p50_despues:.0f}x más rápido por hit")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""
+Benchmark del camino de lectura de los listados (miss de cache).
+
+Crea un usuario temporal con N movimientos (100 000 por defecto) y
+mide, contra PostgreSQL, lo que cuesta armar el JSON de GET /flujo/
+en un miss:
+
+- antes:   query ORM (entidades en el identity map) → dicts por fila
+           → validación del response_model → JSON
+- después: SELECT Core solo con las columnas de FlujoOut → JSON
+           directo desde las tuplas (FilasJSON)
+
+Verifica que ambos caminos produzcan exactamente los mismos bytes y
+reporta filas por segundo de cada uno.
+
+Uso:
+    python -m scripts.benchmark_listados
+    python -m scripts.benchmark_listados --movimientos 20000 --repeticiones 10
+    python -m scripts.benchmark_listados --conservar   # no borra el usuario
+"""
+import argparse
+import statistics
+import time
+
+from sqlalchemy import text
+
+from database import SessionLocal
+from models.usuario import Usuario
+from models.cuenta import Cuenta
+from models.categoria import Categoria
+from models.flujo import Flujo
+from models.transferencia import Transferencia  # noqa: F401 (FK de flujo)
+from schemas.flujo import FlujoOut
+from services.categorias import crear_categorias_default
+from repositories.listados import filas_flujo
+from core.respuestas import FilasJSON, a_json
+from utils.id_generator import generate_unique_user_id
+from security_tokens import get_password_hash
+
+
+def preparar_usuario(movimientos: int) -> str:
+    """
+    Crea el usuario temporal con tres cuentas y `movimientos` flujos
+    (mitad ingresos, mitad egresos) en un solo INSERT ... SELECT.
+
+    Los movimientos quedan en estado Pendiente: no mueven saldo_cuenta
+    ni los snapshots diarios, así la carga no depende de los triggers
+    de saldo (el listado no distingue estados).
+    """
+    db = SessionLocal()
+    try:
+        usuario_id = generate_unique_user_id(db)
+
+        db.add(Usuario(
+            id=usuario_id,
+            nombre="Benchmark",
+            apellido="Listados",
+            correo=f"benchmark-{usuario_id}@example.com",
+            password=get_password_hash(usuario_id),
+            rol="user"
+        ))
+        db.flush()
+
+        crear_categorias_default(usuario_id, db)
+
+        cuentas = [
+            Cuenta(usuario_id=usuario_id, nombre=f"Cuenta {i}")
+            for i in range(3)
+        ]
+        db.add_all(cuentas)
+        db.flush()
+
+        def categoria(tipo: str) -> int:
+            return (
+                db.query(Categoria.id)
+                .filter(
+                    Categoria.usuario_id == usuario_id,
+                    Categoria.tipo_movimiento == tipo
+                )
+                .first()
+            )[0]
+
+        db.execute(
+            text("""
+                INSERT INTO finanzas.flujo (
+                    usuario_id, fecha, descripcion, categoria_id,
+                    cuenta_id, tipo_movimiento, tipo_egreso, estado, monto
+                )
+                SELECT
+                    :uid,
+                    DATE '2024-01-01' + (i % 730),
+                    'Movimiento ' || i,
+                    CASE WHEN i % 2 = 0 THEN :cat_ingreso ELSE :cat_egreso END,
+                    (ARRAY[:c0, :c1, :c2])[i % 3 + 1],
+                    CASE WHEN i % 2 = 0 THEN 'Ingreso' ELSE 'Egreso' END
+                        ::finanzas.tipo_movimiento_enum,
+                    CASE WHEN i % 2 = 0 THEN NULL ELSE 'Variable' END
+                        ::finanzas.tipo_egreso_enum,
+                    'Pendiente'::finanzas.estado_movimiento_enum,
+                    CASE WHEN i % 2 = 0 THEN 100 + (i % 97) ELSE 1 + (i % 89) END
+                        + (i % 100) / 100.0
+                FROM generate_series(1, :n) AS i
+            """),
+            {
+                "uid": usuario_id,
+                "cat_ingreso": categoria("Ingreso"),
+                "cat_egreso": categoria("Egreso"),
+                "c0": cuentas[0].id,
+                "c1": cuentas[1].id,
+                "c2": cuentas[2].id,
+                "n": movimientos
+            }
+        )
+        db.commit()
+
+        return usuario_id
+    finally:
+        db.close()
+
+
+def eliminar_usuario(usuario_id: str):
+    db = SessionLocal()
+    try:
+        db.query(Usuario).filter(Usuario.id == usuario_id).delete()
+        db.commit()
+    finally:
+        db.close()
+
+
+def antes(usuario_id: str) -> bytes:
+    """
+    Camino anterior: entidades ORM, dicts a mano y validación con el
+    response_model.
+    """
+    db = SessionLocal()
+    try:
+        flujos = (
+            db.query(Flujo)
+            .filter(Flujo.usuario_id == usuario_id)
+            .order_by(Flujo.fecha.desc(), Flujo.id.desc())
+            .all()
+        )
+
+        data = [
+            {
+                "id": f.id,
+                "fecha": f.fecha.isoformat(),
+                "descripcion": f.descripcion,
+                "categoria_id": f.categoria_id,
+                "cuenta_id": f.cuenta_id,
+                "tipo_movimiento": f.tipo_movimiento,
+                "tipo_egreso": f.tipo_egreso,
+                "estado": f.estado,
+                "monto": float(f.monto),  # type: ignore
+                "transferencia_id": f.transferencia_id
+            }
+            for f in flujos
+        ]
+
+        return a_json(list[FlujoOut], data)
+    finally:
+        db.close()
+
+
+flujo_json = FilasJSON(FlujoOut)
+
+
+def despues(usuario_id: str) -> bytes:
+    """
+    Camino proyectado: SELECT Core y JSON directo desde las tuplas.
+    """
+    db = SessionLocal()
+    try:
+        return flujo_json(filas_flujo(db, usuario_id))
+    finally:
+        db.close()
+
+
+def medir(funcion, usuario_id: str, repeticiones: int) -> list[float]:
+    tiempos = []
+
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion(usuario_id)
+        tiempos.append(time.perf_counter() - inicio)
+
+    return tiempos
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Filas/s del listado de flujo: ORM vs SELECT proyectado"
+    )
+    parser.add_argument("--movimientos", type=int, default=100_000)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument(
+        "--conservar",
+        action="store_true",
+        help="No elimina el usuario temporal al terminar"
+    )
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    usuario_id = preparar_usuario(args.movimientos)
+    print(
+        f"👤 usuario={usuario_id} con {args.movimientos} movimientos "
+        f"({time.perf_counter() - inicio:.1f}s)"
+    )
+
+    try:
+        # Calentamiento + verificación de que el JSON es idéntico
+        assert antes(usuario_id) == despues(usuario_id), \
+            "los dos caminos no producen el mismo JSON"
+
+        t_antes = statistics.median(
+            medir(antes, usuario_id, args.repeticiones)
+        )
+        t_despues = statistics.median(
+            medir(despues, usuario_id, args.repeticiones)
+        )
+
+        print(f"📊 {args.repeticiones} repeticiones (mediana)")
+        print(
+            f"   antes   (ORM + validación): {t_antes * 1000:8.1f}ms "
+            f"→ {args.movimientos / t_antes:>10,.0f} filas/s"
+        )
+        print(
+            f"   después (Core proyectado):  {t_despues * 1000:8.1f}ms "
+            f"→ {args.movimientos / t_despues:>10,.0f} filas/s"
+        )
+        print(f"   → {t_antes / t_despues:.1f}x más rápido por miss")
+    finally:
+        if not args.conservar:
+            eliminar_usuario(usuario_id)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+"""
+Compacta el log de cambios usado por GET /sync.
+
+Uso:
+    python -m scripts.compactar_sync              # retención de 30 días
+    python -m scripts.compactar_sync --dias 7
+"""
+import argparse
+
+from database import SessionLocal
+from repositories.sync import compactar_cambios
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compactación del log de sincronización"
+    )
+    parser.add_argument(
+        "--dias",
+        type=int,
+        default=30,
+        help="Días de historial a conservar (por defecto 30)"
+    )
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        filas = compactar_cambios(db, args.dias)
+        print(f"✔ Log compactado: {filas} filas afectadas")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+"""
+Prueba de concurrencia para la creación de transferencias.
+
+Crea un usuario temporal con dos cuentas, fondea la cuenta origen y
+dispara transferencias en paralelo (cada hilo con su propia sesión)
+por el mismo camino que usa la API. Al final verifica el invariante:
+
+- Ninguna cuenta queda con saldo negativo
+- La suma de saldos se conserva (las transferencias no crean dinero)
+- saldo_cuenta coincide con el saldo recalculado desde flujo
+
+Reporta throughput y latencias. Sale con código 1 si el invariante
+no se cumple.
+
+Uso:
+    python -m scripts.estres_transferencias
+    python -m scripts.estres_transferencias --transferencias 500 --hilos 12
+    python -m scripts.estres_transferencias --cruzadas   # A→B y B→A
+"""
+import argparse
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from decimal import Decimal
+
+from database import SessionLocal
+from models.usuario import Usuario
+from models.cuenta import Cuenta
+from models.categoria import Categoria
+from models.flujo import Flujo
+from models.transferencia import Transferencia  # noqa: F401 (FK de flujo)
+from schemas.transferencia import TransferenciaCreate
+from services.categorias import crear_categorias_default
+from services.transferencias_service import crear_transferencia
+from repositories.saldos import saldo_de_cuenta, verificar_saldos
+from utils.id_generator import generate_unique_user_id
+from security_tokens import get_password_hash
+
+
+def preparar_usuario(saldo_inicial: Decimal) -> tuple[str, int, int]:
+    """
+    Crea el usuario temporal, sus dos cuentas y el ingreso inicial
+    en la cuenta origen.
+    """
+    db = SessionLocal()
+    try:
+        usuario_id = generate_unique_user_id(db)
+
+        db.add(Usuario(
+            id=usuario_id,
+            nombre="Estres",
+            apellido="Transferencias",
+            correo=f"estres-{usuario_id}@example.com",
+            password=get_password_hash(usuario_id),
+            rol="user"
+        ))
+        db.flush()
+
+        crear_categorias_default(usuario_id, db)
+
+        origen = Cuenta(usuario_id=usuario_id, nombre="Origen")
+        destino = Cuenta(usuario_id=usuario_id, nombre="Destino")
+        db.add_all([origen, destino])
+        db.flush()
+
+        categoria_ingreso = (
+            db.query(Categoria)
+            .filter(
+                Categoria.usuario_id == usuario_id,
+                Categoria.tipo_movimiento == "Ingreso"
+            )
+            .first()
+        )
+
+        db.add(Flujo(
+            usuario_id=usuario_id,
+            fecha=date.today(),
+            descripcion="Saldo inicial",
+            categoria_id=categoria_ingreso.id,
+            cuenta_id=origen.id,
+            tipo_movimiento="Ingreso",
+            estado="Confirmado",
+            monto=saldo_inicial
+        ))
+
+        db.commit()
+
+        return usuario_id, origen.id, destino.id
+    finally:
+        db.close()
+
+
+def eliminar_usuario(usuario_id: str):
+    db = SessionLocal()
+    try:
+        db.query(Usuario).filter(Usuario.id == usuario_id).delete()
+        db.commit()
+    finally:
+        db.close()
+
+
+def transferir(
+    usuario_id: str,
+    origen: int,
+    destino: int,
+    monto: float
+) -> tuple[str, float]:
+    """
+    Ejecuta una transferencia en su propia sesión.
+
+    Retorna (resultado, segundos) con resultado en:
+    ok | rechazada | error
+    """
+    db = SessionLocal()
+    inicio = time.perf_counter()
+    try:
+        crear_transferencia(
+            db,
+            usuario_id,
+            TransferenciaCreate(
+                cuenta_origen_id=origen,
+                cuenta_destino_id=destino,
+                monto=monto,
+                descripcion="estres"
+            )
+        )
+        resultado = "ok"
+    except ValueError:
+        resultado = "rechazada"
+    except Exception as e:
+        print(f"⚠️ {type(e).__name__}: {e.__cause__ or e}")
+        resultado = "error"
+    finally:
+        db.close()
+
+    return resultado, time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Prueba de concurrencia de transferencias"
+    )
+    parser.add_argument("--transferencias", type=int, default=200)
+    parser.add_argument("--hilos", type=int, default=8)
+    parser.add_argument("--monto", type=float, default=10)
+    parser.add_argument(
+        "--saldo-inicial",
+        type=Decimal,
+        default=Decimal("1000"),
+        help="Saldo con el que se fondea la cuenta origen"
+    )
+    parser.add_argument(
+        "--cruzadas",
+        action="store_true",
+        help="Alterna transferencias A→B y B→A (prueba de deadlocks)"
+    )
+    parser.add_argument(
+        "--conservar",
+        action="store_true",
+        help="No elimina el usuario temporal al terminar"
+    )
+    args = parser.parse_args()
+
+    usuario_id, origen, destino = preparar_usuario(args.saldo_inicial)
+    print(f"👤 usuario={usuario_id} origen={origen} destino={destino}")
+
+    tareas = [
+        (destino, origen) if args.cruzadas and i % 2 else (origen, destino)
+        for i in range(args.transferencias)
+    ]
+
+    try:
+        inicio = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=args.hilos) as pool:
+            resultados = list(pool.map(
+                lambda t: transferir(usuario_id, t[0], t[1], args.monto),
+                tareas
+            ))
+
+        total = time.perf_counter() - inicio
+
+        conteo = {"ok": 0, "rechazada": 0, "error": 0}
+        for resultado, _ in resultados:
+            conteo[resultado] += 1
+
+        latencias = sorted(s * 1000 for _, s in resultados)
+        p95 = latencias[int(len(latencias) * 0.95) - 1] if latencias else 0
+
+        print(
+            f"📊 {args.transferencias} transferencias / {args.hilos} hilos "
+            f"en {total:.2f}s → {args.transferencias / total:.1f} tx/s"
+        )
+        print(
+            f"   ok={conteo['ok']} rechazadas={conteo['rechazada']} "
+            f"errores={conteo['error']} "
+            f"p50={statistics.median(latencias):.1f}ms p95={p95:.1f}ms"
+        )
+
+        # 🔒 Invariante
+        db = SessionLocal()
+        try:
+            saldo_origen = saldo_de_cuenta(db, usuario_id, origen)
+            saldo_destino = saldo_de_cuenta(db, usuario_id, destino)
+            drift = verificar_saldos(db, usuario_id)
+        finally:
+            db.close()
+
+        print(f"   saldo origen={saldo_origen} destino={saldo_destino}")
+
+        fallas = []
+        if saldo_origen < 0 or saldo_destino < 0:
+            fallas.append("saldo negativo")
+        if saldo_origen + saldo_destino != args.saldo_inicial:
+            fallas.append("la suma de saldos no se conserva")
+        if drift:
+            fallas.append("saldo_cuenta no coincide con flujo")
+        if conteo["error"]:
+            fallas.append("transferencias con error")
+
+        if fallas:
+            print("❌ " + "; ".join(fallas))
+            sys.exit(1)
+
+        print("✔ Invariante cumplido")
+    finally:
+        if not args.conservar:
+            eliminar_usuario(usuario_id)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+"""
+Reconstruye el resumen mensual por categoría desde la tabla flujo.
+
+Uso:
+    python -m scripts.reconstruir_resumenes            # todos los usuarios
+    python -m scripts.reconstruir_resumenes --usuario abc123def
+"""
+import argparse
+
+from database import SessionLocal
+from repositories.reportes import reconstruir_resumen_categorias
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Backfill del resumen mensual por categoría"
+    )
+    parser.add_argument(
+        "--usuario",
+        default=None,
+        help="ID del usuario a reconstruir (por defecto, todos)"
+    )
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        filas = reconstruir_resumen_categorias(db, args.usuario)
+        print(f"✔ Resumen reconstruido: {filas} filas")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
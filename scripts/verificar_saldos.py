@@ -0,0 +1,80 @@
+"""
+Verifica que saldo_cuenta y saldo_diario coincidan con los saldos
+recalculados desde flujo.
+
+Uso:
+    python -m scripts.verificar_saldos                  # solo reporta
+    python -m scripts.verificar_saldos --usuario abc123def
+    python -m scripts.verificar_saldos --reparar        # corrige el drift
+
+Sale con código 1 si se detectan diferencias y no se reparan.
+"""
+import argparse
+import sys
+
+from database import SessionLocal
+from repositories.saldos import (
+    verificar_saldos,
+    reconstruir_saldos,
+    verificar_saldos_diarios,
+    reconstruir_saldos_diarios
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Verificador de consistencia de saldos materializados"
+    )
+    parser.add_argument(
+        "--usuario",
+        default=None,
+        help="ID del usuario a verificar (por defecto, todos)"
+    )
+    parser.add_argument(
+        "--reparar",
+        action="store_true",
+        help="Reconstruye saldo_cuenta / saldo_diario si se detecta drift"
+    )
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        diferencias = verificar_saldos(db, args.usuario)
+
+        for d in diferencias:
+            print(
+                f"⚠️ cuenta={d['cuenta_id']} usuario={d['usuario_id']} "
+                f"materializado={d['saldo_materializado']} "
+                f"calculado={d['saldo_calculado']} "
+                f"diferencia={d['diferencia']}"
+            )
+
+        diferencias_diarias = verificar_saldos_diarios(db, args.usuario)
+
+        for d in diferencias_diarias:
+            print(
+                f"⚠️ cuenta={d['cuenta_id']} fecha={d['fecha']} "
+                f"cierre={d['saldo_cierre']} "
+                f"calculado={d['saldo_calculado']}"
+            )
+
+        if not diferencias and not diferencias_diarias:
+            print("✔ Sin diferencias")
+            return
+
+        if not args.reparar:
+            sys.exit(1)
+
+        if diferencias:
+            filas = reconstruir_saldos(db, args.usuario)
+            print(f"✔ {filas} cuentas reparadas")
+
+        if diferencias_diarias:
+            filas = reconstruir_saldos_diarios(db, args.usuario)
+            print(f"✔ {filas} snapshots diarios reconstruidos")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
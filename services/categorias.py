@@ -1,5 +1,8 @@
 from sqlalchemy.orm import Session
 from models.categoria import Categoria, TipoMovimientoEnum
+from repositories.categorias import (
+    fusionar_categorias as fusionar_categorias_db
+)
 from constants.categorias_default import (
     CATEGORIAS_INGRESO_DEFAULT,
     CATEGORIAS_EGRESO_DEFAULT
@@ -27,3 +30,34 @@ def crear_categorias_default(usuario_id: str, db: Session):
         )
 
     db.add_all(categorias)
+
+
+def fusionar_categorias(
+    db: Session,
+    usuario_id: str,
+    origenes: list[int],
+    destino: int
+) -> int:
+    """
+    Fusiona las categorías `origenes` en `destino`: todos sus
+    movimientos pasan a la destino y las origen se eliminan.
+
+    Se resuelve en finanzas.fn_fusionar_categorias con un UPDATE
+    set-based (sin importar cuántos movimientos tengan) y el resumen
+    mensual se ajusta en bloque, todo en una transacción.
+
+    Lanza:
+    - ValueError: categorías inválidas, ajenas o de distinto tipo
+    - RuntimeError: error al persistir
+
+    Retorna la cantidad de movimientos reasignados.
+    """
+    origenes = list(dict.fromkeys(origenes))
+
+    if not origenes:
+        raise ValueError("Debe indicar al menos una categoría origen")
+
+    if destino in origenes:
+        raise ValueError("La categoría destino no puede ser también origen")
+
+    return fusionar_categorias_db(db, usuario_id, origenes, destino)
@@ -0,0 +1,85 @@
+from datetime import date
+from typing import Any, Callable
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from repositories.dashboard import (
+    movimientos_recientes,
+    transferencias_recientes
+)
+from services.reportes_service import obtener_resumen_categorias
+
+
+def en_sesion_propia(funcion: Callable[..., Any], *args) -> Any:
+    """
+    Ejecuta funcion(db, *args) con una sesión propia.
+
+    Permite calcular las partes del dashboard en paralelo (en hilos):
+    una Session de SQLAlchemy no se comparte entre hilos.
+    """
+    db = SessionLocal()
+    try:
+        return funcion(db, *args)
+    finally:
+        db.close()
+
+
+def obtener_movimientos_recientes(
+    db: Session,
+    usuario_id: str,
+    limite: int
+) -> list[dict]:
+    """
+    Últimos movimientos del usuario, serializables a JSON.
+    """
+    return [
+        {
+            **row,
+            "fecha": row["fecha"].isoformat(),
+            "monto": float(row["monto"])
+        }
+        for row in movimientos_recientes(db, usuario_id, limite)
+    ]
+
+
+def obtener_transferencias_recientes(
+    db: Session,
+    usuario_id: str,
+    limite: int
+) -> list[dict]:
+    """
+    Últimas transferencias del usuario, serializables a JSON.
+    """
+    return [
+        {
+            **row,
+            "monto": float(row["monto"]),
+            "created_at": row["created_at"].isoformat()
+        }
+        for row in transferencias_recientes(db, usuario_id, limite)
+    ]
+
+
+def obtener_totales_categoria_mes(
+    db: Session,
+    usuario_id: str,
+    hoy: date
+) -> list[dict]:
+    """
+    Totales por categoría del mes en curso, desde la tabla de resumen
+    mensual (costo proporcional al número de categorías). El total se
+    conserva exacto (texto) para responder igual que /reportes.
+    """
+    return [
+        {
+            **row,
+            "mes": row["mes"].isoformat(),
+            "total": str(row["total"])
+        }
+        for row in obtener_resumen_categorias(
+            db,
+            usuario_id,
+            hoy.replace(day=1),
+            hoy
+        )
+    ]
@@ -0,0 +1,73 @@
+from sqlalchemy.orm import Session
+
+from repositories.eliminaciones import (
+    crear_eliminacion,
+    obtener_eliminacion,
+    cuenta_tiene_movimientos
+)
+
+
+def _con_progreso(eliminacion: dict) -> dict:
+    """
+    Agrega el porcentaje de avance (None hasta que el worker estima el
+    total en el primer lote).
+    """
+    if eliminacion["estado"] == "completada":
+        progreso = 100.0
+    elif eliminacion["total"]:
+        progreso = min(
+            100.0,
+            round(eliminacion["eliminados"] * 100 / eliminacion["total"], 1)
+        )
+    elif eliminacion["total"] == 0:
+        progreso = 100.0
+    else:
+        progreso = None
+
+    return {**eliminacion, "progreso": progreso}
+
+
+def eliminar_cuenta(db: Session, usuario_id: str, cuenta) -> dict | None:
+    """
+    Elimina una cuenta del usuario.
+
+    - Sin movimientos: se elimina en el acto (retorna None).
+    - Con movimientos: se registra una eliminación en segundo plano
+      (core.eliminaciones) y se retorna su estado; la cuenta deja de
+      listarse y de aceptar movimientos de inmediato.
+    """
+    if not cuenta_tiene_movimientos(db, cuenta.id):
+        db.delete(cuenta)
+        db.commit()
+        return None
+
+    return _con_progreso(
+        crear_eliminacion(db, usuario_id, "cuenta", str(cuenta.id))
+    )
+
+
+def eliminar_usuario(db: Session, usuario_id: str) -> dict:
+    """
+    Registra la eliminación en segundo plano del usuario y todos sus
+    datos. Sus sesiones se revocan de inmediato y no puede volver a
+    iniciar sesión mientras la eliminación está activa.
+    """
+    return _con_progreso(
+        crear_eliminacion(db, usuario_id, "usuario", usuario_id)
+    )
+
+
+def estado_eliminacion(
+    db: Session,
+    usuario_id: str,
+    eliminacion_id: int
+) -> dict | None:
+    """
+    Estado y progreso de una eliminación del usuario (None si no existe).
+    """
+    eliminacion = obtener_eliminacion(db, usuario_id, eliminacion_id)
+
+    if eliminacion is None:
+        return None
+
+    return _con_progreso(eliminacion)
@@ -0,0 +1,104 @@
+import csv
+import io
+import zipfile
+from datetime import datetime, timezone
+from typing import Iterator
+
+import orjson
+
+from core.settings import settings
+from database import SessionLocal
+from repositories.exportacion import (
+    ARCHIVOS_EXPORTACION,
+    iniciar_snapshot,
+    perfil_usuario,
+    filas_exportacion
+)
+
+
+class _SalidaZip:
+    """
+    Destino de escritura del ZipFile sin seek ni archivo temporal:
+    acumula los bytes comprimidos hasta que el generador los entrega.
+
+    Al no ser seekable, zipfile escribe cada entrada en modo streaming
+    (tamaños y CRC en un data descriptor al final de la entrada).
+    """
+
+    def __init__(self):
+        self._partes: list[bytes] = []
+
+    def write(self, data) -> int:
+        self._partes.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def vaciar(self) -> bytes:
+        data = b"".join(self._partes)
+        self._partes.clear()
+        return data
+
+
+def _csv(filas) -> bytes:
+    salida = io.StringIO()
+    csv.writer(salida).writerows(filas)
+    return salida.getvalue().encode()
+
+
+def exportar_zip(usuario_id: str) -> Iterator[bytes]:
+    """
+    Genera, trozo a trozo, un zip con todos los datos del usuario:
+
+    - usuario.json: perfil (sin contraseña) y fecha de exportación
+    - cuentas.csv, categorias.csv, flujo.csv, transferencias.csv y
+      auditoria.csv
+
+    Cada CSV se lee con un cursor del lado del servidor en lotes de
+    EXPORTACION_LOTE filas, se comprime y se entrega al cliente antes
+    de leer el siguiente lote: memoria constante y sin archivos
+    temporales. Todo sale de una misma transacción REPEATABLE READ
+    (un snapshot consistente) con su propia sesión, que vive lo que
+    dura la descarga.
+    """
+    salida = _SalidaZip()
+    db = SessionLocal()
+
+    try:
+        iniciar_snapshot(db)
+
+        with zipfile.ZipFile(
+            salida, "w", compression=zipfile.ZIP_DEFLATED
+        ) as zf:
+            zf.writestr(
+                "usuario.json",
+                orjson.dumps(
+                    {
+                        "usuario": perfil_usuario(db, usuario_id),
+                        "exportado": datetime.now(timezone.utc)
+                    },
+                    option=orjson.OPT_INDENT_2 | orjson.OPT_UTC_Z
+                )
+            )
+
+            for archivo in ARCHIVOS_EXPORTACION:
+                columnas, lotes = filas_exportacion(
+                    db, archivo, usuario_id, settings.exportacion_lote
+                )
+
+                with zf.open(f"{archivo}.csv", "w", force_zip64=True) as f:
+                    f.write(_csv([columnas]))
+
+                    for filas in lotes:
+                        f.write(_csv(filas))
+
+                        parte = salida.vaciar()
+                        if parte:
+                            yield parte
+
+        yield salida.vaciar()
+
+    finally:
+        db.rollback()
+        db.close()
@@ -0,0 +1,133 @@
+from typing import Callable, Iterable
+from sqlalchemy.orm import Session
+
+from repositories.propiedad import referencias_usuario
+from core.cache import cache_familia
+
+
+class IndicePropiedad:
+    """
+    Índice en memoria de lo que pertenece a un usuario: el conjunto de
+    sus cuentas y el tipo de movimiento de cada categoría.
+
+    Permite validar las referencias de una escritura (una fila o un
+    lote completo) sin consultas adicionales.
+    """
+
+    __slots__ = ("cuentas", "categorias")
+
+    def __init__(self, data: dict):
+        self.cuentas = frozenset(data["cuentas"])
+        self.categorias = {id_: tipo for id_, tipo in data["categorias"]}
+
+    def error_cuenta(self, cuenta_id: int) -> str | None:
+        if cuenta_id not in self.cuentas:
+            return "La cuenta no existe o no pertenece al usuario"
+        return None
+
+    def error_movimiento(
+        self,
+        cuenta_id: int,
+        categoria_id: int,
+        tipo_movimiento: str
+    ) -> str | None:
+        error = self.error_cuenta(cuenta_id)
+        if error:
+            return error
+
+        tipo = self.categorias.get(categoria_id)
+
+        if tipo is None:
+            return "La categoría no existe o no pertenece al usuario"
+
+        if tipo != tipo_movimiento:
+            return (
+                f"La categoría es de tipo {tipo} y el movimiento "
+                f"es {tipo_movimiento}"
+            )
+
+        return None
+
+
+async def indice_propiedad(db: Session, usuario_id: str) -> IndicePropiedad:
+    """
+    Índice de propiedad del usuario, cacheado en la familia
+    "propiedad" (Redis y tier local), que se invalida con cualquier
+    escritura sobre cuentas o categorías.
+    """
+    data = await cache_familia(
+        "propiedad",
+        usuario_id,
+        "indice",
+        lambda: referencias_usuario(db, usuario_id)
+    )
+
+    return IndicePropiedad(data)
+
+
+async def _validar(
+    db: Session,
+    usuario_id: str,
+    verificar: Callable[[IndicePropiedad], str | None]
+) -> None:
+    error = verificar(await indice_propiedad(db, usuario_id))
+
+    if error is None:
+        return
+
+    # 🔁 Un rechazo se confirma contra la base: el índice cacheado
+    # puede no incluir aún una cuenta/categoría recién creada (tier
+    # local de otro worker)
+    error = verificar(IndicePropiedad(referencias_usuario(db, usuario_id)))
+
+    if error is not None:
+        raise ValueError(error)
+
+
+async def validar_cuentas(
+    db: Session,
+    usuario_id: str,
+    cuenta_ids: Iterable[int]
+) -> None:
+    """
+    Verifica que todas las cuentas pertenezcan al usuario.
+
+    Lanza ValueError si alguna no existe o es de otro usuario.
+    """
+    cuenta_ids = list(cuenta_ids)
+
+    def verificar(indice: IndicePropiedad) -> str | None:
+        for cuenta_id in cuenta_ids:
+            error = indice.error_cuenta(cuenta_id)
+            if error:
+                return error
+        return None
+
+    await _validar(db, usuario_id, verificar)
+
+
+async def validar_movimientos(
+    db: Session,
+    usuario_id: str,
+    movimientos: Iterable[tuple[int, int, str]]
+) -> None:
+    """
+    Verifica las referencias de uno o varios movimientos
+    (cuenta_id, categoria_id, tipo_movimiento):
+
+    - La cuenta y la categoría pertenecen al usuario
+    - El tipo de la categoría coincide con el del movimiento
+
+    Un lote se valida completo con un solo índice. Lanza ValueError
+    con el primer problema encontrado (indicando la fila si es un lote).
+    """
+    movimientos = list(movimientos)
+
+    def verificar(indice: IndicePropiedad) -> str | None:
+        for fila, movimiento in enumerate(movimientos, start=1):
+            error = indice.error_movimiento(*movimiento)
+            if error:
+                return error if len(movimientos) == 1 else f"Fila {fila}: {error}"
+        return None
+
+    await _validar(db, usuario_id, verificar)
@@ -0,0 +1,57 @@
+from datetime import date
+from decimal import Decimal
+from sqlalchemy.orm import Session
+
+from repositories.reportes import resumen_categorias
+
+
+def obtener_resumen_categorias(
+    db: Session,
+    usuario_id: str,
+    inicio: date,
+    fin: date
+):
+    """
+    Obtiene los totales por mes y categoría del usuario.
+    """
+    if inicio > fin:
+        raise ValueError(
+            "La fecha inicial no puede ser mayor a la final"
+        )
+
+    return resumen_categorias(db, usuario_id, inicio, fin)
+
+
+def obtener_resumen_tipo_egreso(
+    db: Session,
+    usuario_id: str,
+    inicio: date,
+    fin: date,
+    estado: str = "Confirmado"
+):
+    """
+    Obtiene los egresos por mes separados en Fijo y Variable.
+
+    Se calcula sobre el resumen por categoría, por lo que su costo
+    es proporcional a meses × categorías.
+    """
+    totales: dict[tuple[date, str], dict] = {}
+
+    for row in obtener_resumen_categorias(db, usuario_id, inicio, fin):
+        if row["tipo_movimiento"] != "Egreso" or row["estado"] != estado:
+            continue
+
+        clave = (row["mes"], row["tipo_egreso"])
+        item = totales.setdefault(
+            clave,
+            {
+                "mes": row["mes"],
+                "tipo_egreso": row["tipo_egreso"],
+                "total": Decimal("0"),
+                "cantidad": 0
+            }
+        )
+        item["total"] += row["total"]
+        item["cantidad"] += row["cantidad"]
+
+    return [totales[clave] for clave in sorted(totales)]
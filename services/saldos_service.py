@@ -3,28 +3,71 @@ from sqlalchemy.orm import Session
 from decimal import Decimal
 
 from repositories.saldos import (
-    saldo_por_cuenta,
+    saldo_por_cuenta_con_secuencia,
     saldo_rango,
+    saldo_a_fecha,
+    saldo_historial,
     reajustar_saldo_cuenta
 )
 
+# Máximo de periodos por cuenta en una serie (evita series gigantes)
+MAX_PERIODOS_HISTORIAL = 1000
 
-def obtener_saldos_usuario(
+_DIAS_POR_INTERVALO = {
+    "dia": 1,
+    "semana": 7,
+    "mes": 28
+}
+
+
+def obtener_saldos_con_secuencia(
     db: Session,
     usuario_id: str
 ):
     """
-    Obtiene el saldo actual de todas las cuentas del usuario.
+    Saldo actual de cada cuenta y la secuencia de cambios a la que
+    corresponde, para el cache write-through de saldos.
 
-    La información proviene de la función SQL:
-        fn_saldo_por_cuenta(uid)
+    Retorna (filas, secuencia).
+    """
+    return saldo_por_cuenta_con_secuencia(db, usuario_id)
 
-    Retorna una lista de filas con:
-    - cuenta_id
-    - cuenta
-    - saldo
+
+def efecto_en_saldo(movimiento) -> dict[int, int]:
+    """
+    Aporte de un movimiento al saldo de su cuenta, en centavos:
+    {cuenta_id: centavos}. Mismo criterio que el trigger
+    trg_flujo_saldo_cuenta (solo cuentan los confirmados).
+    """
+    if movimiento.estado != "Confirmado":
+        return {}
+
+    centavos = int(Decimal(str(movimiento.monto)).scaleb(2))
+
+    if movimiento.tipo_movimiento != "Ingreso":
+        centavos = -centavos
+
+    return {movimiento.cuenta_id: centavos}
+
+
+def deltas_saldo(
+    antes: dict[int, int],
+    despues: dict[int, int]
+) -> dict[int, int]:
+    """
+    Diferencia por cuenta entre dos efectos (ver efecto_en_saldo).
+    Omite las cuentas cuyo saldo no cambia.
     """
-    return saldo_por_cuenta(db, usuario_id)
+    deltas = {
+        cuenta_id: despues.get(cuenta_id, 0) - antes.get(cuenta_id, 0)
+        for cuenta_id in antes.keys() | despues.keys()
+    }
+
+    return {
+        cuenta_id: delta
+        for cuenta_id, delta in deltas.items()
+        if delta
+    }
 
 
 def obtener_saldos_rango(
@@ -44,24 +87,63 @@ def obtener_saldos_rango(
     return saldo_rango(db, usuario_id, inicio, fin)
 
 
-def obtener_saldo_cuenta(
+def obtener_saldos_a_fecha(
     db: Session,
     usuario_id: str,
-    cuenta_id: int
-) -> float:
+    fecha: date
+):
     """
-    Obtiene el saldo actual de una cuenta específica del usuario.
+    Obtiene el saldo de cada cuenta del usuario al cierre de una fecha.
     """
+    return saldo_a_fecha(db, usuario_id, fecha)
 
-    resultados = saldo_por_cuenta(db, usuario_id)
 
-    for row in resultados:
-        if row["cuenta_id"] == cuenta_id:
-            return float(row["saldo"])
+def obtener_historial_saldos(
+    db: Session,
+    usuario_id: str,
+    inicio: date,
+    fin: date,
+    intervalo: str
+):
+    """
+    Obtiene la serie temporal de saldos de cada cuenta del usuario.
+
+    Retorna una lista por cuenta con:
+    - cuenta_id
+    - cuenta
+    - serie: [{periodo, saldo}] (saldo de cierre de cada periodo)
+    """
+    if intervalo not in _DIAS_POR_INTERVALO:
+        raise ValueError("Intervalo inválido (dia | semana | mes)")
+
+    if inicio > fin:
+        raise ValueError(
+            "La fecha inicial no puede ser mayor a la final"
+        )
+
+    periodos = (fin - inicio).days // _DIAS_POR_INTERVALO[intervalo] + 1
+    if periodos > MAX_PERIODOS_HISTORIAL:
+        raise ValueError(
+            f"El rango excede {MAX_PERIODOS_HISTORIAL} periodos; "
+            "use un intervalo mayor"
+        )
+
+    cuentas = {}
+    for row in saldo_historial(db, usuario_id, inicio, fin, intervalo):
+        cuenta = cuentas.setdefault(
+            row.cuenta_id,
+            {
+                "cuenta_id": row.cuenta_id,
+                "cuenta": row.cuenta,
+                "serie": []
+            }
+        )
+        cuenta["serie"].append({
+            "periodo": row.periodo.isoformat(),
+            "saldo": float(row.saldo)
+        })
 
-    raise ValueError(
-        "La cuenta no existe o no pertenece al usuario"
-    )
+    return list(cuentas.values())
 
 
 def reajustar_saldo(
@@ -0,0 +1,78 @@
+from sqlalchemy.orm import Session
+
+from repositories.sync import (
+    ENTIDADES_SYNC,
+    estado_secuencia,
+    cambios_desde,
+    entidades_usuario
+)
+
+
+def _serializar(row) -> dict:
+    item = dict(row)
+
+    if "monto" in item:
+        item["monto"] = float(item["monto"])
+
+    return item
+
+
+def sincronizar(db: Session, usuario_id: str, since: int) -> dict:
+    """
+    Construye la respuesta de sincronización incremental.
+
+    - since = 0 o anterior a la compactación → snapshot completo
+    - en otro caso → solo las entidades modificadas después de since
+
+    El costo es proporcional a la cantidad de cambios, no al tamaño
+    total de los datos del usuario.
+    """
+    ultima, minima = estado_secuencia(db, usuario_id)
+
+    respuesta: dict = {
+        "seq": ultima,
+        "completo": since <= 0 or since < minima,
+    }
+
+    if respuesta["completo"]:
+        for entidad in ENTIDADES_SYNC:
+            respuesta[entidad] = {
+                "upsert": [
+                    _serializar(row)
+                    for row in entidades_usuario(db, usuario_id, entidad)
+                ],
+                "eliminados": []
+            }
+        return respuesta
+
+    modificados: dict[str, list[int]] = {e: [] for e in ENTIDADES_SYNC}
+    eliminados: dict[str, list[int]] = {e: [] for e in ENTIDADES_SYNC}
+
+    for cambio in cambios_desde(db, usuario_id, since, ultima):
+        destino = eliminados if cambio.eliminado else modificados
+        destino[cambio.entidad].append(cambio.entidad_id)
+
+    for entidad in ENTIDADES_SYNC:
+        upsert = []
+
+        if modificados[entidad]:
+            rows = entidades_usuario(
+                db,
+                usuario_id,
+                entidad,
+                modificados[entidad]
+            )
+            upsert = [_serializar(row) for row in rows]
+
+            # Eliminadas después de leer el log → tombstone
+            presentes = {item["id"] for item in upsert}
+            eliminados[entidad].extend(
+                i for i in modificados[entidad] if i not in presentes
+            )
+
+        respuesta[entidad] = {
+            "upsert": upsert,
+            "eliminados": sorted(eliminados[entidad])
+        }
+
+    return respuesta
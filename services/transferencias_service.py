@@ -0,0 +1,47 @@
+from decimal import Decimal
+from sqlalchemy.orm import Session
+
+from schemas.transferencia import TransferenciaCreate
+from repositories.transferencias import (
+    crear_transferencia as crear_transferencia_db
+)
+
+
+def crear_transferencia(
+    db: Session,
+    usuario_id: str,
+    data: TransferenciaCreate
+) -> dict:
+    """
+    Crea una transferencia entre dos cuentas del usuario.
+
+    Genera automáticamente:
+    - Un Flujo Egreso (cuenta origen)
+    - Un Flujo Ingreso (cuenta destino)
+
+    Todo ocurre en finanzas.fn_crear_transferencia (un solo round
+    trip). La validación de saldo se hace con las filas de
+    saldo_cuenta de ambas cuentas bloqueadas, por lo que dos
+    transferencias concurrentes desde la misma cuenta se serializan
+    y no pueden sobregirarla.
+
+    Lanza:
+    - ValueError: datos inválidos o saldo insuficiente
+    - RuntimeError: categorías no configuradas o error al persistir
+    """
+    if data.cuenta_origen_id == data.cuenta_destino_id:
+        raise ValueError(
+            "La cuenta origen y destino no pueden ser la misma"
+        )
+
+    if data.monto <= 0:
+        raise ValueError("El monto debe ser mayor a 0")
+
+    return crear_transferencia_db(
+        db,
+        usuario_id,
+        data.cuenta_origen_id,
+        data.cuenta_destino_id,
+        Decimal(str(data.monto)),
+        data.descripcion
+    )